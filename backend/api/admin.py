@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr, validator, Field
 from datetime import datetime
 import re
 
+from backend.core.responses import ORJSONResponse
 from backend.database import get_db
 from backend.models.user import User, UserRole
 from backend.api.auth import get_current_user
 from backend.models.event import Event, EventStatus, EventCategory
+from backend.api.jobs import build_job_response, check_export_format
+from backend.services.export_service import ExportFormat, users_export_query, count_export_rows, stream_export, export_file_info
+from backend.services.job_service import job_runner
+from backend.services.event_service import invalidate_events_cache
+from backend.config import EXPORT_JOB_THRESHOLD
 
 router = APIRouter()
 
@@ -188,6 +195,40 @@ async def get_users(
     
     return query.all()
 
+@router.get("/users/export")
+async def export_users(
+    role: Optional[str] = None,
+    search: Optional[str] = None,
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Экспорт пользователей (csv, ndjson, parquet). Большие выгрузки уходят в фоновую задачу"""
+    if not current_user.is_admin():
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
+    check_export_format(export_format)
+
+    if role and role not in [r.value for r in UserRole]:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid role value"
+        )
+    if search:
+        search = re.sub(r'[^\w\s\-]', '', search)
+
+    params = {"role": role, "search": search, "format": export_format.value}
+
+    if count_export_rows(users_export_query(db, params)) > EXPORT_JOB_THRESHOLD:
+        job = job_runner.submit(db, current_user, "users_export", params)
+        return ORJSONResponse(build_job_response(job), status_code=202)
+
+    media_type, filename = export_file_info("users_export", params)
+    return StreamingResponse(
+        stream_export("users_export", params),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
 @router.get("/users/{user_id}", response_model=UserListItem)
 async def get_user(
     user_id: int,
@@ -422,6 +463,7 @@ async def update_event(
     
     try:
         db.commit()
+        invalidate_events_cache()
         return {"success": True}
     except Exception as e:
         db.rollback()
@@ -443,4 +485,5 @@ async def delete_event(
         raise HTTPException(status_code=404, detail="Мероприятие не найдено")
     db.delete(event)
     db.commit()
+    invalidate_events_cache()
     return {"success": True} 
\ No newline at end of file
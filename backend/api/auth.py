@@ -6,7 +6,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Header, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from pydantic import BaseModel, EmailStr, validator
+from pydantic import BaseModel, EmailStr, Field, validator
 import hashlib
 import hmac
 import json
@@ -44,6 +44,8 @@ class UserRegistrationRequest(BaseModel):
     phone: Optional[str] = None
     bio: Optional[str] = None
     location: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     role: str = "volunteer"
 
     # Профиль волонтера
@@ -117,6 +119,8 @@ class UserResponse(BaseModel):
     bio: Optional[str]
     avatar_url: Optional[str]
     location: Optional[str]
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     is_active: bool
     is_verified: bool
     full_name: str
@@ -137,6 +141,11 @@ class UserResponse(BaseModel):
     profile_completed: Optional[bool] = None
     completion_percentage: Optional[int] = None
 
+    # Оценки участия в мероприятиях (агрегаты хранятся у пользователя)
+    rating_average: Optional[float] = None
+    rating_count: int = 0
+    rating_distribution: Dict[str, int] = {}
+
     class Config:
         from_attributes = True
 
@@ -433,6 +442,8 @@ async def verify_auth(
             bio=user.bio,
             avatar_url=user.avatar_url,
             location=user.location,
+            latitude=user.latitude,
+            longitude=user.longitude,
             is_active=user.is_active,
             is_verified=user.is_verified,
             full_name=user.full_name,
@@ -447,7 +458,10 @@ async def verify_auth(
             org_email=user.org_email,
             org_address=user.org_address,
             profile_completed=profile_completed,
-            completion_percentage=completion_percentage
+            completion_percentage=completion_percentage,
+            rating_average=user.rating_average,
+            rating_count=user.rating_count or 0,
+            rating_distribution=user.rating_distribution
         )
 
         return AuthResponse(
@@ -507,6 +521,8 @@ async def get_current_user_info(
         bio=current_user.bio,
         avatar_url=current_user.avatar_url,
         location=current_user.location,
+        latitude=current_user.latitude,
+        longitude=current_user.longitude,
         is_active=current_user.is_active,
         is_verified=current_user.is_verified,
         full_name=current_user.full_name,
@@ -521,7 +537,10 @@ async def get_current_user_info(
         org_email=current_user.org_email,
         org_address=current_user.org_address,
         profile_completed=profile_completed,
-        completion_percentage=completion_percentage
+        completion_percentage=completion_percentage,
+        rating_average=current_user.rating_average,
+        rating_count=current_user.rating_count or 0,
+        rating_distribution=current_user.rating_distribution
     )
 
 
@@ -559,6 +578,14 @@ async def complete_registration(
             current_user.bio = registration_data.bio
         if registration_data.location:
             current_user.location = registration_data.location
+        if (registration_data.latitude is None) != (registration_data.longitude is None):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Latitude and longitude must be set together"
+            )
+        if registration_data.latitude is not None:
+            current_user.latitude = registration_data.latitude
+            current_user.longitude = registration_data.longitude
 
         # Обновляем данные в зависимости от роли
         if current_user.role == UserRole.ORGANIZER:
@@ -607,6 +634,9 @@ async def complete_registration(
         # Возвращаем обновленные данные
         return await get_current_user_info(current_user, db)
 
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         logger.error(f"Registration completion failed: {e}")
         db.rollback()
@@ -1,25 +1,46 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_
-from pydantic import BaseModel
-from typing import Optional, List
-from datetime import datetime
+from sqlalchemy.orm import Session, joinedload, load_only, contains_eager
+from sqlalchemy.orm.attributes import InstrumentedAttribute, set_committed_value
+from sqlalchemy import and_, or_, insert, literal, update, select, func, case, tuple_
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Literal, Union
+from datetime import datetime, date
 from fastapi.responses import StreamingResponse
-import csv
-from io import StringIO
 import logging
-from backend.models.registration import Registration, RegistrationStatus
 
+from backend.core.responses import ORJSONResponse
 from backend.database import get_db
 from backend.api.auth import get_current_user
 from backend.models.user import User, UserRole
+from backend.models.volunteer_profile import VolunteerProfile
 from backend.models.event import Event, EventStatus, EventCategory, EventLog, EventActionType
-from backend.models.registration import Registration, RegistrationStatus
-from backend.services.event_service import notify_volunteers_on_new_event, notify_organizer_on_full
+from backend.models.registration import Registration, RegistrationStatus, ACTIVE_STATUSES
+from backend.services.event_service import (
+    notify_volunteers_on_new_event, notify_organizer_on_full, get_calendar_counts, get_event_facets,
+    invalidate_events_cache, eligibility_filters
+)
+from backend.services.export_service import (
+    ExportFormat, events_export_query, event_registrations_export_query, count_export_rows,
+    stream_export, export_file_info
+)
+from backend.services.checkin_service import checkin_desk
+from backend.services.job_service import job_runner
+from backend.services.recommendation_service import recommend_events
+from backend.services.schedule_service import conflict_exists, find_conflicts, invalidate_schedules
+from backend.api.jobs import build_job_response, check_export_format
+from backend.api.registrations import REGISTRATIONS_PAGE_LIMIT
+from backend.config import EXPORT_JOB_THRESHOLD, GEO_MAX_RADIUS_KM
+from backend.utils.geo import parse_point, within_radius, haversine_km
+from backend.utils.helpers import normalize_skills, encode_cursor, decode_cursor
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Максимум мероприятий в одном запросе /batch
+EVENTS_BATCH_LIMIT = 100
+# Максимум QR-токенов в одном запросе чек-ина (сканер может копить их без сети)
+CHECKIN_BATCH_LIMIT = 500
+
 
 class EventCreateRequest(BaseModel):
     title: str
@@ -30,6 +51,8 @@ class EventCreateRequest(BaseModel):
 
     location: Optional[str] = None
     address: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     start_date: datetime
     end_date: datetime
     registration_deadline: Optional[datetime] = None
@@ -62,6 +85,8 @@ class EventUpdateRequest(BaseModel):
 
     location: Optional[str] = None
     address: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     registration_deadline: Optional[datetime] = None
@@ -97,6 +122,9 @@ class EventResponse(BaseModel):
 
     location: Optional[str]
     address: Optional[str]
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    distance_km: Optional[float] = None  # только при поиске по near
     start_date: datetime
     end_date: datetime
     registration_deadline: Optional[datetime]
@@ -130,14 +158,22 @@ class EventResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+    # Оценки участия волонтеров (агрегаты хранятся в мероприятии)
+    rating_average: Optional[float] = None
+    rating_count: int = 0
+    rating_distribution: Dict[str, int] = {}
+
     # Флаги для текущего пользователя
     can_register: bool
     user_registration_status: Optional[str]
+    # Пересекается по времени с другим подтвержденным мероприятием волонтера
+    conflicts: bool = False
 
     # Новые поля для статистики заявок
     total_registrations: Optional[int] = 0
     approved_registrations: Optional[int] = 0
     pending_registrations: Optional[int] = 0
+    waitlisted_registrations: Optional[int] = 0
 
     class Config:
         from_attributes = True
@@ -151,6 +187,57 @@ class RegistrationUserInfo(BaseModel):
     status: str
 
 
+class CheckinRequest(BaseModel):
+    tokens: List[str] = Field(..., min_length=1, max_length=CHECKIN_BATCH_LIMIT)
+
+
+class CheckinResult(BaseModel):
+    token: str
+    registration_id: Optional[int]
+    # checked_in / already_checked_in / not_registered / invalid_token / wrong_event
+    result: str
+
+
+class CheckinResponse(BaseModel):
+    results: List[CheckinResult]
+    checked_in_total: int
+    expected_total: int
+
+
+class DashboardEvent(BaseModel):
+    id: int
+    title: str
+    status: str
+    start_date: datetime
+    end_date: datetime
+    max_volunteers: int
+    current_volunteers_count: int
+    views_count: int
+    # Заявки по статусам (все статусы, в том числе нулевые) и отмеченные на чек-ине
+    registrations: Dict[str, int]
+    total_registrations: int
+    attended: int
+    # Доля занятых мест; None - без ограничения мест
+    fill_rate: Optional[float]
+    rating_average: Optional[float]
+    rating_count: int
+    # Дней до начала (отрицательное - уже началось)
+    days_to_start: int
+
+
+class DashboardTotals(BaseModel):
+    events: int
+    registrations: Dict[str, int]
+    total_registrations: int
+    attended: int
+    views_count: int
+
+
+class DashboardResponse(BaseModel):
+    events: List[DashboardEvent]
+    totals: DashboardTotals
+
+
 class EventStatusUpdateRequest(BaseModel):
     status: str
 
@@ -159,6 +246,38 @@ class BulkEventActionRequest(BaseModel):
     event_ids: list[int]
 
 
+class EventFacets(BaseModel):
+    category: Dict[str, int]
+    status: Dict[str, int]
+    meal_provided: int
+    transport_provided: int
+    has_free_slots: int
+
+
+class EventListResponse(BaseModel):
+    items: List[EventResponse]
+    facets: EventFacets
+
+
+class RecommendedEventResponse(EventResponse):
+    score: int
+    matched_skills: List[str]
+
+
+class CalendarBucket(BaseModel):
+    period_start: date
+    events_count: int
+    open_slots: int
+    unlimited_events: int
+
+
+class CalendarResponse(BaseModel):
+    date_from: date
+    date_to: date
+    granularity: str
+    buckets: List[CalendarBucket]
+
+
 class EventLogResponse(BaseModel):
     id: int
     user_id: int
@@ -175,51 +294,239 @@ async def log_event_action(db, event_id, user_id, action: EventActionType, detai
     db.commit()
 
 
-@router.get("", response_model=List[EventResponse])
+# Поля EventResponse: как получить значение из мероприятия
+EVENT_FIELD_GETTERS = {
+    "id": lambda event, user: event.id,
+    "title": lambda event, user: event.title,
+    "description": lambda event, user: event.description,
+    "short_description": lambda event, user: event.short_description,
+    "category": lambda event, user: event.category.value,
+    "tags": lambda event, user: event.tags or [],
+    "location": lambda event, user: event.location,
+    "address": lambda event, user: event.address,
+    "latitude": lambda event, user: event.latitude,
+    "longitude": lambda event, user: event.longitude,
+    "start_date": lambda event, user: event.start_date,
+    "end_date": lambda event, user: event.end_date,
+    "registration_deadline": lambda event, user: event.registration_deadline,
+    "max_volunteers": lambda event, user: event.max_volunteers,
+    "min_volunteers": lambda event, user: event.min_volunteers,
+    "current_volunteers_count": lambda event, user: event.current_volunteers_count,
+    # Для мероприятий без ограничения (max_volunteers = 0) свойство возвращает inf
+    "available_slots": lambda event, user: event.available_slots if event.max_volunteers else 0,
+    "progress_percentage": lambda event, user: event.progress_percentage,
+    "required_skills": lambda event, user: event.required_skills or [],
+    "preferred_skills": lambda event, user: event.preferred_skills or [],
+    "min_age": lambda event, user: event.min_age,
+    "max_age": lambda event, user: event.max_age,
+    "requirements_description": lambda event, user: event.requirements_description,
+    "what_to_bring": lambda event, user: event.what_to_bring,
+    "dress_code": lambda event, user: event.dress_code,
+    "meal_provided": lambda event, user: event.meal_provided if event.meal_provided is not None else False,
+    "transport_provided": lambda event, user: event.transport_provided if event.transport_provided is not None else False,
+    "contact_person": lambda event, user: event.contact_person,
+    "contact_phone": lambda event, user: event.contact_phone,
+    "contact_email": lambda event, user: event.contact_email,
+    "status": lambda event, user: event.status.value,
+    "is_featured": lambda event, user: event.is_featured or False,
+    "views_count": lambda event, user: event.views_count or 0,
+    "creator_name": lambda event, user: event.creator.full_name if event.creator else "Неизвестно",
+    "created_at": lambda event, user: event.created_at,
+    "updated_at": lambda event, user: event.updated_at,
+    "rating_average": lambda event, user: event.rating_average,
+    "rating_count": lambda event, user: event.rating_count or 0,
+    "rating_distribution": lambda event, user: event.rating_distribution,
+    "can_register": lambda event, user: event.can_register(user),
+    "user_registration_status": lambda event, user: None,
+    "conflicts": lambda event, user: False,
+    "total_registrations": lambda event, user: 0,
+    "approved_registrations": lambda event, user: 0,
+    "pending_registrations": lambda event, user: 0,
+    "waitlisted_registrations": lambda event, user: 0,
+}
+
+# Поля, которые передаются обработчиком, а не вычисляются из модели
+EVENT_EXTRA_FIELDS = {"distance_km"}
+
+# Колонки, нужные вычисляемым полям (остальные поля - одноименные колонки или без колонок)
+_SLOT_COLUMNS = (Event.max_volunteers, Event.current_volunteers_count)
+EVENT_FIELD_COLUMNS = {
+    "available_slots": _SLOT_COLUMNS,
+    "progress_percentage": _SLOT_COLUMNS,
+    "can_register": (
+        Event.status, Event.start_date, Event.registration_deadline,
+        Event.min_age, Event.max_age, Event.required_skills
+    ) + _SLOT_COLUMNS,
+    "creator_name": (Event.creator_id,),
+    "rating_average": (Event.rating_count, Event.rating_sum),
+    "rating_distribution": (Event.rating_1, Event.rating_2, Event.rating_3, Event.rating_4, Event.rating_5),
+    "conflicts": (Event.start_date, Event.end_date),
+    "distance_km": (Event.latitude, Event.longitude),
+}
+
+# Пресет view=card - то, что показывает карточка в списке
+EVENT_CARD_FIELDS = frozenset({
+    "id", "title", "short_description", "category", "location", "start_date", "end_date",
+    "max_volunteers", "current_volunteers_count", "available_slots", "progress_percentage",
+    "status", "can_register", "user_registration_status", "conflicts", "distance_km",
+})
+
+
+def parse_event_fields(fields: Optional[str], view: Optional[str]) -> Optional[frozenset]:
+    """Набор запрошенных полей (?fields=a,b и/или view=card); None - все поля"""
+    if not fields and not view:
+        return None
+    selected = {name.strip() for name in (fields or "").split(",") if name.strip()}
+    unknown = selected - EVENT_FIELD_GETTERS.keys() - EVENT_EXTRA_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    if view == "card":
+        selected |= EVENT_CARD_FIELDS
+    return frozenset(selected | {"id"})
+
+
+def event_load_options(selected: Optional[frozenset]) -> list:
+    """Опции загрузки: только нужные колонки (остальные не читаются из БД) и организатор, если нужен"""
+    options = []
+    if selected is not None:
+        columns = {Event.id}
+        for name in selected:
+            if name in EVENT_FIELD_COLUMNS:
+                columns.update(EVENT_FIELD_COLUMNS[name])
+            elif isinstance(getattr(Event, name, None), InstrumentedAttribute):
+                columns.add(getattr(Event, name))
+        options.append(load_only(*columns))
+    if selected is None or "creator_name" in selected:
+        options.append(joinedload(Event.creator).load_only(User.first_name, User.last_name))
+    return options
+
+
+def event_response_data(event: Event, current_user: User, fields: Optional[frozenset] = None) -> dict:
+    """Поля EventResponse для мероприятия (без статистики заявок); fields - только выбранные"""
+    return {
+        name: getter(event, current_user)
+        for name, getter in EVENT_FIELD_GETTERS.items()
+        if fields is None or name in fields
+    }
+
+
+def sparse_event_data(event: Event, current_user: User, fields: frozenset, **extra) -> dict:
+    """Урезанный ответ по ?fields= (отдается без EventResponse)"""
+    data = event_response_data(event, current_user, fields)
+    data.update((name, value) for name, value in extra.items() if name in fields)
+    return data
+
+
+def my_registration_status(user_id: int):
+    """Коррелированный подзапрос: статус последней заявки пользователя на мероприятие"""
+    return (
+        select(Registration.status)
+        .where(Registration.event_id == Event.id, Registration.user_id == user_id)
+        .order_by(Registration.id.desc())
+        .limit(1)
+        .correlate(Event)
+        .scalar_subquery()
+    )
+
+
+def schedule_conflicts(db: Session, current_user: User, events: List[Event],
+                       selected: Optional[frozenset] = None) -> set:
+    """id мероприятий списка, пересекающихся с подтвержденными мероприятиями волонтера (флаг conflicts)"""
+    if current_user.role != UserRole.VOLUNTEER or (selected is not None and "conflicts" not in selected):
+        return set()
+    return find_conflicts(db, current_user.id, events)
+
+
+def mark_published(event: Event, old_status: Optional[EventStatus]) -> bool:
+    """
+    Отметить переход мероприятия в PUBLISHED (published_at - при первой публикации).
+    True - опубликовано впервые: после коммита волонтерам уходит уведомление о новом мероприятии.
+    """
+    if event.status != EventStatus.PUBLISHED or event.published_at:
+        return False
+    event.published_at = datetime.utcnow()
+    return old_status != EventStatus.PUBLISHED
+
+
+def registration_counts(*where):
+    """Подзапрос: число заявок мероприятий по статусам (колонки total, <status>, attended)"""
+    return (
+        select(
+            Registration.event_id,
+            func.count(Registration.id).label("total"),
+            *(
+                func.sum(case((Registration.status == status, 1), else_=0)).label(status.value)
+                for status in RegistrationStatus
+            ),
+            func.sum(case((Registration.attended.is_(True), 1), else_=0)).label("attended"),
+        )
+        .where(*where)
+        .group_by(Registration.event_id)
+        .subquery()
+    )
+
+
+def build_event_response(event: Event, current_user: User, **extra) -> EventResponse:
+    return EventResponse(**{**event_response_data(event, current_user), **extra})
+
+
+@router.get("", response_model=Union[EventListResponse, List[EventResponse]])
 async def get_events_alias(
         status: Optional[EventStatus] = Query(None),
         category: Optional[EventCategory] = Query(None),
         search: Optional[str] = Query(None),
         upcoming_only: bool = Query(True),
+        eligible_only: bool = Query(False),
+        near: Optional[str] = Query(None, description="lat,lon"),
+        radius_km: float = Query(10, gt=0, le=GEO_MAX_RADIUS_KM),
+        facets: bool = Query(False),
+        fields: Optional[str] = Query(None, description="id,title,..."),
+        view: Optional[Literal["card"]] = Query(None),
         limit: int = Query(50, le=100),
         offset: int = Query(0),
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
-    return await get_events(status, category, search, upcoming_only, limit, offset, current_user, db)
+    return await get_events(
+        status, category, search, upcoming_only, eligible_only, near, radius_km, facets, fields, view, limit, offset,
+        current_user, db
+    )
 
 
-@router.get("/", response_model=List[EventResponse])
+@router.get("/", response_model=Union[EventListResponse, List[EventResponse]])
 async def get_events(
         status: Optional[EventStatus] = Query(None),
         category: Optional[EventCategory] = Query(None),
         search: Optional[str] = Query(None),
         upcoming_only: bool = Query(True),
+        eligible_only: bool = Query(False),
+        near: Optional[str] = Query(None, description="lat,lon"),
+        radius_km: float = Query(10, gt=0, le=GEO_MAX_RADIUS_KM),
+        facets: bool = Query(False),
+        fields: Optional[str] = Query(None, description="id,title,..."),
+        view: Optional[Literal["card"]] = Query(None),
         limit: int = Query(50, le=100),
         offset: int = Query(0),
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
-    """Получить список мероприятий"""
+    """
+    Получить список мероприятий (near=lat,lon - только в радиусе radius_km).
+    eligible_only=1 - только те, на которые волонтер может записаться (возраст, обязательные навыки).
+    С facets=1 возвращает {items, facets} со счетчиками для фильтров.
+    fields=a,b / view=card - только выбранные поля, остальные колонки не читаются.
+    """
+    selected = parse_event_fields(fields, view)
 
-    query = db.query(Event)
-
-    # Фильтры
-    if status:
-        query = query.filter(Event.status == status)
-    else:
-        # По умолчанию показываем только опубликованные
-        query = query.filter(Event.status == EventStatus.PUBLISHED)
-
-    if category:
-        query = query.filter(Event.category == category)
+    # Фильтры, не являющиеся фасетами: по ним же считаются счетчики фасетов
+    base_filters = []
 
     if upcoming_only:
-        query = query.filter(Event.start_date > datetime.utcnow())
+        base_filters.append(Event.start_date > datetime.utcnow())
 
     if search:
         search_term = f"%{search}%"
-        query = query.filter(
+        base_filters.append(
             or_(
                 Event.title.ilike(search_term),
                 Event.description.ilike(search_term),
@@ -227,68 +534,225 @@ async def get_events(
             )
         )
 
+    eligibility_key = None
+    if eligible_only:
+        if current_user.role != UserRole.VOLUNTEER:
+            raise HTTPException(status_code=403, detail="Only volunteers can filter events by eligibility")
+        profile = db.query(VolunteerProfile).filter(VolunteerProfile.user_id == current_user.id).first()
+        base_filters.extend(eligibility_filters(profile))
+        eligibility_key = (profile.age, frozenset(normalize_skills(profile.skills))) if profile else ()
+
+    point = None
+    if near:
+        try:
+            point = parse_point(near)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        base_filters.append(within_radius(Event, point[0], point[1], radius_km))
+
+    # По умолчанию показываем только опубликованные
+    status = status or EventStatus.PUBLISHED
+    query = db.query(Event).filter(*base_filters, Event.status == status)
+
+    if category:
+        query = query.filter(Event.category == category)
+
     # Сортировка
     query = query.order_by(Event.start_date.asc())
 
     # Пагинация
-    events = query.offset(offset).limit(limit).all()
+    events = query.options(*event_load_options(selected)).offset(offset).limit(limit).all()
 
     # Получаем статусы регистрации пользователя
     user_registrations = {}
-    if current_user.role == UserRole.VOLUNTEER:
-        registrations = db.query(Registration).filter(
+    if current_user.role == UserRole.VOLUNTEER and (selected is None or "user_registration_status" in selected):
+        registrations = db.query(Registration.event_id, Registration.status).filter(
             Registration.user_id == current_user.id,
             Registration.event_id.in_([e.id for e in events])
         ).all()
         user_registrations = {reg.event_id: reg.status.value for reg in registrations}
+    conflicts = schedule_conflicts(db, current_user, events, selected)
 
     # Формируем ответ
     result = []
     for event in events:
-        event_data = {
-            "id": event.id,
-            "title": event.title,
-            "description": event.description,
-            "short_description": event.short_description,
-            "category": event.category.value,
-            "tags": event.tags or [],
-            "location": event.location,
-            "address": event.address,
-            "start_date": event.start_date,
-            "end_date": event.end_date,
-            "registration_deadline": event.registration_deadline,
-            "max_volunteers": event.max_volunteers,
-            "min_volunteers": event.min_volunteers,
-            "current_volunteers_count": len(event.registrations) if hasattr(event, 'registrations') else 0,
-            "available_slots": event.available_slots if hasattr(event, 'available_slots') else 0,
-            "progress_percentage": event.progress_percentage if hasattr(event, 'progress_percentage') else 0,
-            "required_skills": event.required_skills or [],
-            "preferred_skills": event.preferred_skills or [],
-            "min_age": event.min_age,
-            "max_age": event.max_age,
-            "requirements_description": event.requirements_description,
-            "what_to_bring": event.what_to_bring,
-            "dress_code": event.dress_code,
-            "meal_provided": event.meal_provided if event.meal_provided is not None else False,
-            "transport_provided": event.transport_provided if event.transport_provided is not None else False,
-            "contact_person": event.contact_person,
-            "contact_phone": event.contact_phone,
-            "contact_email": event.contact_email,
-            "status": event.status.value,
-            "is_featured": event.is_featured if hasattr(event, 'is_featured') else False,
-            "views_count": event.views_count if hasattr(event, 'views_count') else 0,
-            "creator_name": event.creator.full_name if event.creator else "Неизвестно",
-            "created_at": event.created_at,
-            "updated_at": event.updated_at,
-            "can_register": event.can_register(current_user) if hasattr(event, 'can_register') else False,
+        extra = {
             "user_registration_status": user_registrations.get(event.id),
-            "total_registrations": 0,
-            "approved_registrations": 0,
-            "pending_registrations": 0,
+            "conflicts": event.id in conflicts,
+            "distance_km": (
+                round(haversine_km(point[0], point[1], event.latitude, event.longitude), 2) if point else None
+            ),
+        }
+        if selected is None:
+            result.append(build_event_response(event, current_user, **extra))
+        else:
+            result.append(sparse_event_data(event, current_user, selected, **extra))
+
+    if facets:
+        facets_key = (search, upcoming_only, point, radius_km if point else None, eligibility_key)
+        event_facets = get_event_facets(db, base_filters, facets_key, status, category)
+        return ORJSONResponse({"items": result, "facets": event_facets})
+    return ORJSONResponse(result)
+
+
+@router.get("/batch", response_model=List[EventResponse])
+async def get_events_batch(
+        ids: str = Query(..., description="1,2,3"),
+        fields: Optional[str] = Query(None, description="id,title,..."),
+        view: Optional[Literal["card"]] = Query(None),
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Несколько мероприятий по ID одним запросом (в порядке ids, ненайденные пропускаются)"""
+    selected = parse_event_fields(fields, view)
+    try:
+        event_ids = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if not event_ids:
+        return []
+    if len(event_ids) > EVENTS_BATCH_LIMIT:
+        raise HTTPException(status_code=400, detail=f"At most {EVENTS_BATCH_LIMIT} ids per request")
+
+    query = db.query(Event).options(*event_load_options(selected)).filter(Event.id.in_(event_ids))
+
+    # Статус заявки текущего волонтера - коррелированным подзапросом в том же SELECT
+    is_volunteer = current_user.role == UserRole.VOLUNTEER
+    if is_volunteer:
+        # Профиль волонтера (для can_register) - тем же запросом, а не ленивой загрузкой
+        query = query.add_columns(
+            my_registration_status(current_user.id).label("user_registration_status")
+        ).outerjoin(VolunteerProfile, VolunteerProfile.user_id == current_user.id).add_entity(VolunteerProfile)
+
+    result_rows = query.all()
+    if is_volunteer and result_rows:
+        set_committed_value(current_user, "volunteer_profile", result_rows[0].VolunteerProfile)
+    loaded = [
+        (row.Event, row.user_registration_status) if is_volunteer else (row, None)
+        for row in result_rows
+    ]
+    conflicts = schedule_conflicts(db, current_user, [event for event, _ in loaded], selected)
+
+    rows = {}
+    for event, registration_status in loaded:
+        extra = {
+            "user_registration_status": registration_status.value if registration_status else None,
+            "conflicts": event.id in conflicts,
         }
-        result.append(EventResponse(**event_data))
+        if selected is None:
+            rows[event.id] = build_event_response(event, current_user, **extra)
+        else:
+            rows[event.id] = sparse_event_data(event, current_user, selected, **extra)
 
-    return result
+    return ORJSONResponse([rows[event_id] for event_id in event_ids if event_id in rows])
+
+
+@router.get("/recommended", response_model=List[RecommendedEventResponse])
+async def get_recommended_events(
+        limit: int = Query(10, ge=1, le=50),
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Рекомендованные мероприятия по навыкам, интересам и предпочитаемым категориям волонтера"""
+    if current_user.role != UserRole.VOLUNTEER:
+        raise HTTPException(status_code=403, detail="Only volunteers can get recommendations")
+
+    profile = db.query(VolunteerProfile).filter(VolunteerProfile.user_id == current_user.id).first()
+    if not profile:
+        return []
+
+    registered_ids = {
+        row.event_id for row in db.query(Registration.event_id).filter(
+            Registration.user_id == current_user.id,
+            Registration.status.in_(ACTIVE_STATUSES)
+        )
+    }
+    ranked = recommend_events(db, profile, registered_ids, limit)
+    if not ranked:
+        return []
+
+    events = {
+        event.id: event for event in db.query(Event).options(joinedload(Event.creator)).filter(
+            Event.id.in_([event_id for event_id, _, _ in ranked]),
+            Event.status == EventStatus.PUBLISHED
+        )
+    }
+    conflicts = schedule_conflicts(db, current_user, list(events.values()))
+    return ORJSONResponse([
+        RecommendedEventResponse(
+            **{**event_response_data(events[event_id], current_user), "conflicts": event_id in conflicts},
+            score=score,
+            matched_skills=matched_skills
+        )
+        for event_id, score, matched_skills in ranked if event_id in events
+    ])
+
+
+@router.get("/calendar", response_model=CalendarResponse)
+async def get_events_calendar(
+        date_from: date = Query(..., alias="from"),
+        date_to: date = Query(..., alias="to"),
+        category: Optional[EventCategory] = Query(None),
+        granularity: Literal["day", "week"] = Query("day"),
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Число опубликованных мероприятий и свободных мест по дням/неделям для календаря"""
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' must not be earlier than 'from'")
+    if (date_to - date_from).days > 366:
+        raise HTTPException(status_code=400, detail="Calendar range is limited to one year")
+
+    buckets = get_calendar_counts(db, date_from, date_to, category, granularity)
+    return CalendarResponse(date_from=date_from, date_to=date_to, granularity=granularity, buckets=buckets)
+
+
+@router.get("/export")
+async def export_events(
+    status: Optional[EventStatus] = Query(None),
+    category: Optional[EventCategory] = Query(None),
+    search: Optional[str] = Query(None),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Экспорт мероприятий (csv, ndjson, parquet). Большие выгрузки уходят в фоновую задачу (202 + задача)"""
+    if not current_user.is_organizer():
+        raise HTTPException(status_code=403, detail="Only organizers and admins can export events")
+    check_export_format(export_format)
+
+    params = {
+        "format": export_format.value,
+        "status": status.value if status else None,
+        "category": category.value if category else None,
+        "search": search,
+        "start_date": start_date.isoformat() if start_date else None,
+        "end_date": end_date.isoformat() if end_date else None,
+    }
+    query = events_export_query(db, params)
+
+    # Логируем экспорт одной вставкой INSERT ... SELECT
+    log_rows = query.with_entities(
+        Event.id,
+        literal(current_user.id),
+        literal(EventActionType.EXPORT, EventLog.action.type),
+        literal(f"export events.{export_format.value}"),
+    ).order_by(None).statement
+    db.execute(insert(EventLog).from_select(["event_id", "user_id", "action", "details"], log_rows))
+    db.commit()
+
+    if count_export_rows(query) > EXPORT_JOB_THRESHOLD:
+        job = job_runner.submit(db, current_user, "events_export", params)
+        return ORJSONResponse(build_job_response(job), status_code=202)
+
+    media_type, filename = export_file_info("events_export", params)
+    return StreamingResponse(
+        stream_export("events_export", params),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
 
 
 @router.get("/{event_id}", response_model=EventResponse)
@@ -299,76 +763,58 @@ async def get_event(
 ):
     """Получить мероприятие по ID"""
 
-    event = db.query(Event).filter(Event.id == event_id).first()
-    if not event:
+    # Счетчик просмотров - атомарный UPDATE, он же проверка существования.
+    # Просмотр не считается изменением мероприятия - updated_at оставляем как есть.
+    updated = db.execute(
+        update(Event)
+        .where(Event.id == event_id)
+        .values(views_count=func.coalesce(Event.views_count, 0) + 1, updated_at=Event.updated_at)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not updated:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    # Увеличиваем счетчик просмотров
-    event.views_count += 1
-    db.commit()
+    # Мероприятие, организатор, заявка пользователя и статистика заявок - одним запросом
+    query = db.query(Event).options(joinedload(Event.creator)).filter(Event.id == event_id)
+
+    is_volunteer = current_user.role == UserRole.VOLUNTEER
+    if is_volunteer:
+        # Волонтеру - еще флаг пересечения и профиль (для can_register) вместо отдельных запросов
+        query = query.add_columns(
+            my_registration_status(current_user.id).label("user_registration_status"),
+            conflict_exists(current_user.id).label("conflicts")
+        ).outerjoin(VolunteerProfile, VolunteerProfile.user_id == current_user.id).add_entity(VolunteerProfile)
+
+    # Статистику видят только организатор мероприятия и админ (создателя проверяем в условии JOIN)
+    with_stats = current_user.is_organizer()
+    if with_stats:
+        stats = registration_counts(Registration.event_id == event_id)
+        join_condition = stats.c.event_id == Event.id
+        if not current_user.is_admin():
+            join_condition = and_(join_condition, Event.creator_id == current_user.id)
+        query = query.outerjoin(stats, join_condition).add_columns(
+            stats.c.total, stats.c.confirmed, stats.c.pending, stats.c.waitlisted
+        )
 
-    # Проверяем регистрацию пользователя
-    user_registration = None
-    if current_user.role == UserRole.VOLUNTEER:
-        user_registration = db.query(Registration).filter(
-            and_(
-                Registration.user_id == current_user.id,
-                Registration.event_id == event_id
-            )
-        ).first()
-
-    # Статистика по заявкам для организатора и админа
-    total_registrations = 0
-    approved_registrations = 0
-    pending_registrations = 0
-    if current_user.is_admin() or event.creator_id == current_user.id:
-        registrations = db.query(Registration).filter(Registration.event_id == event_id).all()
-        total_registrations = len(registrations)
-        approved_registrations = len([r for r in registrations if r.status == RegistrationStatus.CONFIRMED])
-        pending_registrations = len([r for r in registrations if r.status == RegistrationStatus.PENDING])
-
-    event_data = {
-        "id": event.id,
-        "title": event.title,
-        "description": event.description,
-        "short_description": event.short_description,
-        "category": event.category.value,
-        "tags": event.tags or [],
-        "location": event.location,
-        "address": event.address,
-        "start_date": event.start_date,
-        "end_date": event.end_date,
-        "registration_deadline": event.registration_deadline,
-        "max_volunteers": event.max_volunteers,
-        "min_volunteers": event.min_volunteers,
-        "current_volunteers_count": len(event.registrations) if hasattr(event, 'registrations') else 0,
-        "available_slots": event.available_slots if hasattr(event, 'available_slots') else 0,
-        "progress_percentage": event.progress_percentage if hasattr(event, 'progress_percentage') else 0,
-        "required_skills": event.required_skills or [],
-        "preferred_skills": event.preferred_skills or [],
-        "min_age": event.min_age,
-        "max_age": event.max_age,
-        "requirements_description": event.requirements_description,
-        "what_to_bring": event.what_to_bring,
-        "dress_code": event.dress_code,
-        "meal_provided": event.meal_provided if event.meal_provided is not None else False,
-        "transport_provided": event.transport_provided if event.transport_provided is not None else False,
-        "contact_person": event.contact_person,
-        "contact_phone": event.contact_phone,
-        "contact_email": event.contact_email,
-        "status": event.status.value,
-        "is_featured": event.is_featured if hasattr(event, 'is_featured') else False,
-        "views_count": event.views_count if hasattr(event, 'views_count') else 0,
-        "creator_name": event.creator.full_name if event.creator else "Неизвестно",
-        "created_at": event.created_at,
-        "updated_at": event.updated_at,
-        "can_register": event.can_register(current_user) if hasattr(event, 'can_register') else False,
-        "user_registration_status": user_registration.status.value if user_registration else None,
-        "total_registrations": total_registrations,
-        "approved_registrations": approved_registrations,
-        "pending_registrations": pending_registrations,
-    }
-    return EventResponse(**event_data)
+    row = query.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Event not found")
+    user_registration_status = row.user_registration_status if is_volunteer else None
+    if is_volunteer:
+        set_committed_value(current_user, "volunteer_profile", row.VolunteerProfile)
+
+    # Ответ собираем до коммита: после него атрибуты загруженных объектов сбрасываются
+    response = build_event_response(
+        row.Event, current_user,
+        user_registration_status=user_registration_status.value if user_registration_status else None,
+        conflicts=bool(row.conflicts) if is_volunteer else False,
+        total_registrations=(row.total or 0) if with_stats else 0,
+        approved_registrations=(row.confirmed or 0) if with_stats else 0,
+        pending_registrations=(row.pending or 0) if with_stats else 0,
+        waitlisted_registrations=(row.waitlisted or 0) if with_stats else 0,
+    )
+    db.commit()
+    return response
 
 
 @router.post("", response_model=EventResponse)
@@ -404,6 +850,12 @@ async def create_event(
             detail="End date must be after start date"
         )
 
+    if (event_data.latitude is None) != (event_data.longitude is None):
+        raise HTTPException(
+            status_code=400,
+            detail="Latitude and longitude must be set together"
+        )
+
     if event_data.registration_deadline and event_data.registration_deadline >= event_data.start_date:
         logger.warning(f"Некорректная дата регистрации: deadline={event_data.registration_deadline}, start_date={event_data.start_date}")
         raise HTTPException(
@@ -422,54 +874,15 @@ async def create_event(
 
         db.add(event)
         db.commit()
+        invalidate_events_cache()
         db.refresh(event)
         logger.info(f"Мероприятие успешно создано с ID: {event.id}")
         
         await log_event_action(db, event.id, current_user.id, EventActionType.CREATE)
 
-        event_data = {
-            "id": event.id,
-            "title": event.title,
-            "description": event.description,
-            "short_description": event.short_description,
-            "category": event.category.value,
-            "tags": event.tags or [],
-            "location": event.location,
-            "address": event.address,
-            "start_date": event.start_date,
-            "end_date": event.end_date,
-            "registration_deadline": event.registration_deadline,
-            "max_volunteers": event.max_volunteers,
-            "min_volunteers": event.min_volunteers,
-            "current_volunteers_count": 0,
-            "available_slots": event.available_slots if hasattr(event, 'available_slots') else 0,
-            "progress_percentage": event.progress_percentage if hasattr(event, 'progress_percentage') else 0,
-            "required_skills": event.required_skills or [],
-            "preferred_skills": event.preferred_skills or [],
-            "min_age": event.min_age,
-            "max_age": event.max_age,
-            "requirements_description": event.requirements_description,
-            "what_to_bring": event.what_to_bring,
-            "dress_code": event.dress_code,
-            "meal_provided": event.meal_provided if event.meal_provided is not None else False,
-            "transport_provided": event.transport_provided if event.transport_provided is not None else False,
-            "contact_person": event.contact_person,
-            "contact_phone": event.contact_phone,
-            "contact_email": event.contact_email,
-            "status": event.status.value,
-            "is_featured": event.is_featured if hasattr(event, 'is_featured') else False,
-            "views_count": event.views_count if hasattr(event, 'views_count') else 0,
-            "creator_name": current_user.full_name,
-            "created_at": event.created_at,
-            "updated_at": event.updated_at,
-            "can_register": False,
-            "user_registration_status": None,
-            "total_registrations": 0,
-            "approved_registrations": 0,
-            "pending_registrations": 0,
-        }
+        event_data = build_event_response(event, current_user, can_register=False)
         logger.info(f"Мероприятие успешно создано и возвращено: {event_data}")
-        return EventResponse(**event_data)
+        return event_data
     except Exception as e:
         logger.error(f"Ошибка при создании мероприятия: {str(e)}")
         db.rollback()
@@ -495,17 +908,36 @@ async def update_event(
         raise HTTPException(status_code=403, detail="У вас нет прав на редактирование этого мероприятия")
 
     # Обновляем поля мероприятия
-    for field, value in event_data.dict(exclude_unset=True).items():
+    changes = event_data.dict(exclude_unset=True)
+
+    # Координаты проверяем с учетом текущих значений: половина пары выпала бы из поиска near=
+    latitude = changes.get("latitude", event.latitude)
+    longitude = changes.get("longitude", event.longitude)
+    if (latitude is None) != (longitude is None):
+        raise HTTPException(
+            status_code=400,
+            detail="Latitude and longitude must be set together"
+        )
+
+    old_status = event.status
+    for field, value in changes.items():
         setattr(event, field, value)
 
+    first_publication = mark_published(event, old_status)
     event.updated_at = datetime.utcnow()
     db.commit()
+    invalidate_events_cache()
+    # Перенос мероприятия меняет расписания всех его участников
+    if "start_date" in changes or "end_date" in changes:
+        invalidate_schedules()
     db.refresh(event)
+    if first_publication:
+        notify_volunteers_on_new_event(db, event)
 
     # Логируем действие
     await log_event_action(db, event.id, current_user.id, EventActionType.UPDATE)
 
-    return event
+    return build_event_response(event, current_user)
 
 
 @router.delete("/{event_id}")
@@ -528,6 +960,7 @@ async def delete_event(
     event.status = EventStatus.CANCELLED
     event.updated_at = datetime.utcnow()
     db.commit()
+    invalidate_events_cache()
     db.refresh(event)
 
     # Логируем действие
@@ -543,95 +976,146 @@ async def get_my_events(
         db: Session = Depends(get_db)
 ):
     """Получить мероприятия созданные пользователем (с фильтрацией по статусу)"""
-    print(f"DEBUG: Запрос списка созданных мероприятий от пользователя {current_user.id} (роль: {current_user.role})")
-
     if not current_user.is_organizer():
-        print(f"DEBUG: Отказано в доступе: пользователь {current_user.id} не является организатором")
         raise HTTPException(
             status_code=403,
             detail="Only organizers can view created events"
         )
 
-    # Базовый запрос - все события пользователя
-    query = db.query(Event).filter(Event.creator_id == current_user.id)
-    print(f"DEBUG: Базовый запрос для пользователя {current_user.id}")
-    
+    # Мероприятия и статистика заявок - одним запросом
+    stats = registration_counts(
+        Registration.event_id.in_(select(Event.id).where(Event.creator_id == current_user.id))
+    )
+    query = db.query(Event).options(joinedload(Event.creator)).outerjoin(
+        stats, stats.c.event_id == Event.id
+    ).add_columns(
+        stats.c.total, stats.c.confirmed, stats.c.pending, stats.c.waitlisted
+    ).filter(Event.creator_id == current_user.id)
+
     # Если статус не указан, показываем все события, кроме удаленных
     if not status:
         query = query.filter(Event.status != EventStatus.CANCELLED)
-        print("DEBUG: Фильтр: все события, кроме удаленных")
     else:
         query = query.filter(Event.status == status)
-        print(f"DEBUG: Фильтр по статусу: {status}")
-        
-    events = query.order_by(Event.created_at.desc()).all()
-    print(f"DEBUG: Найдено {len(events)} мероприятий")
-    
-    for event in events:
-        print(f"DEBUG: Мероприятие {event.id}: {event.title} (статус: {event.status.value}, создатель: {event.creator_id})")
 
-    result = []
-    for event in events:
-        event_data = {
-            "id": event.id,
-            "title": event.title,
-            "description": event.description,
-            "short_description": event.short_description,
-            "category": event.category.value,
-            "tags": event.tags or [],
-            "location": event.location,
-            "address": event.address,
-            "start_date": event.start_date,
-            "end_date": event.end_date,
-            "registration_deadline": event.registration_deadline,
-            "max_volunteers": event.max_volunteers,
-            "min_volunteers": event.min_volunteers,
-            "current_volunteers_count": len(event.registrations) if hasattr(event, 'registrations') else 0,
-            "available_slots": event.available_slots if hasattr(event, 'available_slots') else 0,
-            "progress_percentage": event.progress_percentage if hasattr(event, 'progress_percentage') else 0,
-            "required_skills": event.required_skills or [],
-            "preferred_skills": event.preferred_skills or [],
-            "min_age": event.min_age,
-            "max_age": event.max_age,
-            "requirements_description": event.requirements_description,
-            "what_to_bring": event.what_to_bring,
-            "dress_code": event.dress_code,
-            "meal_provided": event.meal_provided if event.meal_provided is not None else False,
-            "transport_provided": event.transport_provided if event.transport_provided is not None else False,
-            "contact_person": event.contact_person,
-            "contact_phone": event.contact_phone,
-            "contact_email": event.contact_email,
-            "status": event.status.value,
-            "is_featured": event.is_featured if hasattr(event, 'is_featured') else False,
-            "views_count": event.views_count if hasattr(event, 'views_count') else 0,
-            "creator_name": event.creator.full_name if event.creator else "Неизвестно",
-            "created_at": event.created_at,
-            "updated_at": event.updated_at,
-            "can_register": event.can_register(current_user) if hasattr(event, 'can_register') else False,
-            "user_registration_status": None,
-            "total_registrations": 0,
-            "approved_registrations": 0,
-            "pending_registrations": 0,
-        }
-        result.append(EventResponse(**event_data))
-        print(f"DEBUG: Добавлено мероприятие в результат: {event.id} - {event.title}")
+    return ORJSONResponse([
+        build_event_response(
+            row.Event, current_user,
+            total_registrations=row.total or 0,
+            approved_registrations=row.confirmed or 0,
+            pending_registrations=row.pending or 0,
+            waitlisted_registrations=row.waitlisted or 0,
+        )
+        for row in query.order_by(Event.created_at.desc())
+    ])
 
-    print(f"DEBUG: Возвращаем {len(result)} мероприятий")
-    return result
+
+@router.get("/my/dashboard", response_model=DashboardResponse)
+async def get_my_dashboard(
+        status: Optional[EventStatus] = Query(None),
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Панель организатора: все его мероприятия с заявками по статусам,
+    заполненностью, просмотрами и днями до начала. Один запрос - колонки
+    мероприятий и сгруппированные счетчики заявок.
+    """
+    if not current_user.is_organizer():
+        raise HTTPException(status_code=403, detail="Only organizers can view the dashboard")
+
+    stats = registration_counts(
+        Registration.event_id.in_(select(Event.id).where(Event.creator_id == current_user.id))
+    )
+    query = select(
+        Event.id, Event.title, Event.status, Event.start_date, Event.end_date,
+        Event.max_volunteers, Event.current_volunteers_count, Event.views_count,
+        Event.rating_count, Event.rating_sum,
+        stats.c.total, stats.c.attended, *(stats.c[item.value] for item in RegistrationStatus)
+    ).outerjoin(stats, stats.c.event_id == Event.id).where(Event.creator_id == current_user.id)
+    if status:
+        query = query.where(Event.status == status)
+
+    now = datetime.utcnow()
+    events = []
+    totals = DashboardTotals(
+        events=0, registrations={item.value: 0 for item in RegistrationStatus},
+        total_registrations=0, attended=0, views_count=0
+    )
+    for row in db.execute(query.order_by(Event.start_date.desc(), Event.id.desc())):
+        registrations = {item.value: int(row._mapping[item.value] or 0) for item in RegistrationStatus}
+        event = DashboardEvent(
+            id=row.id,
+            title=row.title,
+            status=row.status.value,
+            start_date=row.start_date,
+            end_date=row.end_date,
+            max_volunteers=row.max_volunteers or 0,
+            current_volunteers_count=row.current_volunteers_count,
+            views_count=row.views_count or 0,
+            registrations=registrations,
+            total_registrations=row.total or 0,
+            attended=int(row.attended or 0),
+            fill_rate=(
+                round(row.current_volunteers_count / row.max_volunteers, 4) if row.max_volunteers else None
+            ),
+            rating_average=round(row.rating_sum / row.rating_count, 2) if row.rating_count else None,
+            rating_count=row.rating_count,
+            days_to_start=(row.start_date.date() - now.date()).days,
+        )
+        events.append(event)
+
+        totals.events += 1
+        totals.total_registrations += event.total_registrations
+        totals.attended += event.attended
+        totals.views_count += event.views_count
+        for name, count in registrations.items():
+            totals.registrations[name] += count
+
+    return ORJSONResponse(DashboardResponse(events=events, totals=totals))
 
 
 @router.get("/{event_id}/registrations", response_model=List[RegistrationUserInfo])
 async def get_event_registrations(
     event_id: int,
+    limit: int = Query(50, ge=1, le=REGISTRATIONS_PAGE_LIMIT),
+    cursor: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    event = db.query(Event).filter(Event.id == event_id).first()
+    """
+    Заявки мероприятия постранично, по порядку подачи (с фильтрами - GET /api/registrations/event/{event_id}).
+    Следующая страница - с cursor из заголовка X-Next-Cursor; нет заголовка - это последняя страница.
+    """
+    event = db.query(Event).options(load_only(Event.creator_id)).filter(Event.id == event_id).first()
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     if not (current_user.is_admin() or event.creator_id == current_user.id):
         raise HTTPException(status_code=403, detail="Нет доступа")
-    registrations = db.query(Registration).filter(Registration.event_id == event_id).all()
+    # Колонки волонтера берем тем же запросом, без ленивой загрузки reg.user на каждую строку
+    query = db.query(Registration).join(Registration.user).options(
+        load_only(Registration.status, Registration.registered_at),
+        contains_eager(Registration.user).load_only(User.first_name, User.last_name, User.email, User.phone)
+    ).filter(Registration.event_id == event_id)
+
+    # Keyset-пагинация по (registered_at, id), как в GET /api/registrations/event/{event_id}
+    if cursor:
+        try:
+            registered_at, registration_id = decode_cursor(cursor)
+            after = tuple_(datetime.fromisoformat(registered_at), int(registration_id))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(tuple_(Registration.registered_at, Registration.id) > after)
+
+    registrations = query.order_by(
+        Registration.registered_at.asc(), Registration.id.asc()
+    ).limit(limit + 1).all()
+    headers = {}
+    if len(registrations) > limit:
+        registrations = registrations[:limit]
+        last = registrations[-1]
+        headers["X-Next-Cursor"] = encode_cursor([last.registered_at.isoformat(), last.id])
+
     result = []
     for reg in registrations:
         user = reg.user
@@ -642,7 +1126,39 @@ async def get_event_registrations(
             phone=user.phone,
             status=reg.status.value
         ))
-    return result
+    return ORJSONResponse(result, headers=headers)
+
+
+@router.post("/{event_id}/checkin", response_model=CheckinResponse)
+async def checkin_volunteers(
+    event_id: int,
+    data: CheckinRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Отметить явку волонтеров по QR-токенам (организатор мероприятия или админ).
+    Проверка идет по списку участников в памяти, запись в БД - пачками в фоне.
+    """
+    roster = checkin_desk.get_roster(db, event_id)
+    if roster is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if not (current_user.is_admin() or roster.creator_id == current_user.id):
+        raise HTTPException(status_code=403, detail="Нет доступа")
+    if not roster.is_open(datetime.utcnow()):
+        raise HTTPException(status_code=400, detail="Check-in is not open for this event")
+
+    results = checkin_desk.check_in(db, roster, data.tokens)
+    # Список мог быть перечитан во время скана - счетчики берем из актуального
+    roster = checkin_desk.get_roster(db, event_id) or roster
+    return ORJSONResponse({
+        "results": [
+            {"token": token, "registration_id": registration_id, "result": result}
+            for token, (registration_id, result) in zip(data.tokens, results)
+        ],
+        "checked_in_total": len(roster.attended),
+        "expected_total": len(roster.confirmed),
+    })
 
 
 @router.patch("/{event_id}/status", response_model=EventResponse)
@@ -665,10 +1181,15 @@ async def update_event_status(
     except ValueError:
         raise HTTPException(status_code=400, detail="Недопустимый статус мероприятия")
 
+    old_status = event.status
     event.status = new_status
+    first_publication = mark_published(event, old_status)
     event.updated_at = datetime.utcnow()
     db.commit()
+    invalidate_events_cache()
     db.refresh(event)
+    if first_publication:
+        notify_volunteers_on_new_event(db, event)
 
     # Логируем действие
     await log_event_action(db, event.id, current_user.id, EventActionType.STATUS_CHANGE, f"Статус изменен на {new_status}")
@@ -698,6 +1219,7 @@ async def restore_event(
     event.status = EventStatus.DRAFT
     event.updated_at = datetime.utcnow()
     db.commit()
+    invalidate_events_cache()
     db.refresh(event)
     await log_event_action(db, event.id, current_user.id, EventActionType.RESTORE)
     return await get_event(event_id, current_user, db)
@@ -717,6 +1239,7 @@ async def hard_delete_event(
         raise HTTPException(status_code=404, detail="Event not found")
     db.delete(event)
     db.commit()
+    invalidate_events_cache()
     await log_event_action(db, event_id, current_user.id, EventActionType.DELETE)
     return {"message": "Event permanently deleted"}
 
@@ -734,12 +1257,15 @@ async def bulk_publish_events(
             continue
         if not (current_user.is_admin() or event.creator_id == current_user.id):
             continue
+        old_status = event.status
         event.status = EventStatus.PUBLISHED
-        if not event.published_at:
-            event.published_at = datetime.utcnow()
+        first_publication = mark_published(event, old_status)
         event.updated_at = datetime.utcnow()
         db.commit()
+        invalidate_events_cache()
         db.refresh(event)
+        if first_publication:
+            notify_volunteers_on_new_event(db, event)
         await log_event_action(db, event.id, current_user.id, EventActionType.PUBLISH, "bulk")
         result.append(await get_event(event_id, current_user, db))
     return result
@@ -761,6 +1287,7 @@ async def bulk_cancel_events(
         event.status = EventStatus.CANCELLED
         event.updated_at = datetime.utcnow()
         db.commit()
+        invalidate_events_cache()
         db.refresh(event)
         await log_event_action(db, event.id, current_user.id, EventActionType.CANCEL, "bulk")
         result.append(await get_event(event_id, current_user, db))
@@ -782,60 +1309,16 @@ async def bulk_delete_events(
             continue
         db.delete(event)
         db.commit()
+        invalidate_events_cache()
         await log_event_action(db, event_id, current_user.id, EventActionType.DELETE, "bulk")
         result.append({"id": event_id, "deleted": True})
     return result
 
 
-@router.get("/export")
-async def export_events(
-    status: Optional[EventStatus] = Query(None),
-    category: Optional[EventCategory] = Query(None),
-    search: Optional[str] = Query(None),
-    start_date: Optional[datetime] = Query(None),
-    end_date: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
-):
-    query = db.query(Event)
-    if status:
-        query = query.filter(Event.status == status)
-    if category:
-        query = query.filter(Event.category == category)
-    if start_date:
-        query = query.filter(Event.start_date >= start_date)
-    if end_date:
-        query = query.filter(Event.end_date <= end_date)
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Event.title.ilike(search_term),
-                Event.description.ilike(search_term),
-                Event.location.ilike(search_term)
-            )
-        )
-    events = query.all()
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        "id", "title", "status", "category", "start_date", "end_date", "location", "max_volunteers", "current_volunteers_count"
-    ])
-    for event in events:
-        writer.writerow([
-            event.id, event.title, event.status.value, event.category.value,
-            event.start_date, event.end_date, event.location,
-            event.max_volunteers, len(event.registrations) if hasattr(event, 'registrations') else 0
-        ])
-    output.seek(0)
-    # Логируем экспорт
-    for event in events:
-        await log_event_action(db, event.id, None, EventActionType.EXPORT, "export events.csv")
-    return StreamingResponse(output, media_type="text/csv", headers={"Content-Disposition": "attachment; filename=events.csv"})
-
-
 @router.get("/{event_id}/registrations/export")
 async def export_event_registrations(
     event_id: int,
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -844,15 +1327,18 @@ async def export_event_registrations(
         raise HTTPException(status_code=404, detail="Event not found")
     if not (current_user.is_admin() or event.creator_id == current_user.id):
         raise HTTPException(status_code=403, detail="Нет доступа")
-    registrations = db.query(Registration).filter(Registration.event_id == event_id).all()
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["user_id", "full_name", "email", "phone", "status"])
-    for reg in registrations:
-        user = reg.user
-        writer.writerow([
-            user.id, user.full_name, user.email, user.phone, reg.status.value
-        ])
-    output.seek(0)
-    await log_event_action(db, event_id, current_user.id, EventActionType.EXPORT, "export registrations.csv")
-    return StreamingResponse(output, media_type="text/csv", headers={"Content-Disposition": f"attachment; filename=event_{event_id}_registrations.csv"})
\ No newline at end of file
+    check_export_format(export_format)
+
+    params = {"event_id": event_id, "format": export_format.value}
+    await log_event_action(db, event_id, current_user.id, EventActionType.EXPORT, f"export registrations.{export_format.value}")
+
+    if count_export_rows(event_registrations_export_query(db, params)) > EXPORT_JOB_THRESHOLD:
+        job = job_runner.submit(db, current_user, "event_registrations_export", params)
+        return ORJSONResponse(build_job_response(job), status_code=202)
+
+    media_type, filename = export_file_info("event_registrations_export", params)
+    return StreamingResponse(
+        stream_export("event_registrations_export", params),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=event_{event_id}_{filename}"}
+    )
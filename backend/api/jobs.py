@@ -0,0 +1,151 @@
+"""API фоновых задач (тяжелые экспорты и отчеты)"""
+
+import os
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+
+from backend.database import get_db
+from backend.api.auth import get_current_user
+from backend.models.user import User
+from backend.models.event import Event
+from backend.models.job import Job, JobStatus
+from backend.services.export_service import EXPORTS, ExportFormat, parquet_available
+from backend.services.job_service import job_runner
+
+router = APIRouter()
+
+
+class JobCreateRequest(BaseModel):
+    job_type: str
+    params: Dict[str, Any] = {}
+
+
+class JobResponse(BaseModel):
+    id: str
+    job_type: str
+    status: str
+    params: Optional[Dict[str, Any]]
+    rows_count: Optional[int]
+    error: Optional[str]
+    result_url: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+
+def build_job_response(job: Job) -> JobResponse:
+    return JobResponse(
+        id=job.id,
+        job_type=job.job_type,
+        status=job.status.value,
+        params=job.params,
+        rows_count=job.rows_count,
+        error=job.error,
+        result_url=f"/api/jobs/{job.id}/result" if job.status == JobStatus.COMPLETED else None,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+def check_export_format(export_format: ExportFormat):
+    if export_format == ExportFormat.PARQUET and not parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export is not available: pyarrow is not installed")
+
+
+def check_export_access(db: Session, current_user: User, job_type: str, params: Dict):
+    """Проверка прав на экспорт - те же правила, что и у синхронных эндпоинтов"""
+    if job_type == "events_export":
+        if not current_user.is_organizer():
+            raise HTTPException(status_code=403, detail="Only organizers and admins can export events")
+    elif job_type == "users_export":
+        if not current_user.is_admin():
+            raise HTTPException(status_code=403, detail="Доступ запрещен")
+    elif job_type == "event_registrations_export":
+        event = db.query(Event).filter(Event.id == params.get("event_id")).first()
+        if not event:
+            raise HTTPException(status_code=404, detail="Event not found")
+        if not (current_user.is_admin() or event.creator_id == current_user.id):
+            raise HTTPException(status_code=403, detail="Нет доступа")
+
+
+def get_own_job(db: Session, job_id: str, current_user: User) -> Job:
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.user_id != current_user.id and not current_user.is_admin():
+        raise HTTPException(status_code=403, detail="Access denied")
+    return job
+
+
+@router.post("/", response_model=JobResponse, status_code=202)
+async def submit_job(
+        job_data: JobCreateRequest,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Поставить задачу в очередь"""
+    if job_data.job_type not in EXPORTS:
+        raise HTTPException(status_code=400, detail="Unknown job type")
+
+    check_export_access(db, current_user, job_data.job_type, job_data.params)
+
+    try:
+        job = job_runner.submit(db, current_user, job_data.job_type, job_data.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return build_job_response(job)
+
+
+@router.get("/", response_model=List[JobResponse])
+async def get_my_jobs(
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Получить свои задачи"""
+    jobs = db.query(Job).filter(
+        Job.user_id == current_user.id
+    ).order_by(Job.created_at.desc()).limit(50).all()
+    return [build_job_response(job) for job in jobs]
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+        job_id: str,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Статус задачи"""
+    return build_job_response(get_own_job(db, job_id, current_user))
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(
+        job_id: str,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Отменить задачу"""
+    job = get_own_job(db, job_id, current_user)
+    if job.is_finished:
+        raise HTTPException(status_code=400, detail="Job is already finished")
+    return build_job_response(job_runner.cancel(db, job))
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(
+        job_id: str,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Скачать результат задачи (отдается через sendfile, без копирования в память)"""
+    job = get_own_job(db, job_id, current_user)
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail="Job result is not ready")
+    if not job.result_path or not os.path.exists(job.result_path):
+        raise HTTPException(status_code=410, detail="Job result has expired")
+    return FileResponse(job.result_path, media_type=job.media_type, filename=job.result_filename)
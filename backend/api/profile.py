@@ -2,8 +2,8 @@
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Dict
 from datetime import datetime, date
 
 from backend.database import get_db
@@ -22,6 +22,9 @@ class ProfileUpdateRequest(BaseModel):
     phone: Optional[str] = None
     bio: Optional[str] = None
     location: Optional[str] = None
+    # Координаты для подбора мероприятий по радиусу - только парой
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
     # Данные профиля волонтера
     middle_name: Optional[str] = None
@@ -59,6 +62,8 @@ class ProfileResponse(BaseModel):
     phone: Optional[str]
     bio: Optional[str]
     location: Optional[str]
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     avatar_url: Optional[str]
     role: str
 
@@ -85,6 +90,11 @@ class ProfileResponse(BaseModel):
     max_travel_distance: Optional[int]
     preferred_activities: Optional[List[str]]
 
+    # Оценки участия в мероприятиях (агрегаты хранятся у пользователя)
+    rating_average: Optional[float] = None
+    rating_count: int = 0
+    rating_distribution: Dict[str, int] = {}
+
     # Метаданные
     profile_completed: bool
     completion_percentage: int
@@ -116,8 +126,13 @@ async def get_profile(
         "phone": current_user.phone,
         "bio": current_user.bio,
         "location": current_user.location,
+        "latitude": current_user.latitude,
+        "longitude": current_user.longitude,
         "avatar_url": current_user.avatar_url,
         "role": current_user.role.value,
+        "rating_average": current_user.rating_average,
+        "rating_count": current_user.rating_count or 0,
+        "rating_distribution": current_user.rating_distribution,
 
         # Значения по умолчанию для волонтерского профиля
         "profile_completed": False,
@@ -163,8 +178,14 @@ async def update_profile(
     # Обновляем данные пользователя
     update_data = profile_data.dict(exclude_unset=True)
 
+    # Координаты - только парой, с учетом текущих значений
+    latitude = update_data.get("latitude", current_user.latitude)
+    longitude = update_data.get("longitude", current_user.longitude)
+    if (latitude is None) != (longitude is None):
+        raise HTTPException(status_code=400, detail="Latitude and longitude must be set together")
+
     # Поля пользователя
-    user_fields = ['first_name', 'last_name', 'email', 'phone', 'bio', 'location']
+    user_fields = ['first_name', 'last_name', 'email', 'phone', 'bio', 'location', 'latitude', 'longitude']
 
     for field in user_fields:
         if field in update_data:
@@ -1,21 +1,39 @@
 """API для регистрации на мероприятия"""
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from pydantic import BaseModel
-from typing import Optional, List
+from collections import defaultdict
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session, contains_eager, load_only
+from sqlalchemy import select, update, tuple_
+from sqlalchemy.exc import IntegrityError
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal, Tuple
 from datetime import datetime
 
+from backend.core.responses import ORJSONResponse
 from backend.database import get_db
 from backend.api.auth import get_current_user
 from backend.models.user import User, UserRole
 from backend.models.event import Event
-from backend.models.registration import Registration, RegistrationStatus
-from backend.services.event_service import notify_organizer_on_full
+from backend.models.registration import Registration, RegistrationStatus, SEAT_STATUSES
+from backend.services.event_service import (
+    notify_organizer_on_full, notify_volunteer_promoted, notify_registrations_status_changed
+)
+from backend.services.change_log_service import record_registration_changes
+from backend.services.checkin_service import make_checkin_token
+from backend.services.registration_admission import registration_admission, DuplicateRegistrationError
+from backend.services.registration_service import (
+    reserve_slot, reserve_slots, release_slot, promote_from_waitlist,
+    my_registrations_cache, invalidate_user_registrations
+)
+from backend.services.schedule_service import get_schedule
+from backend.services.rating_service import rate_registration
+from backend.utils.helpers import encode_cursor, decode_cursor
 
 router = APIRouter()
 
+REGISTRATIONS_BULK_LIMIT = 500
+REGISTRATIONS_PAGE_LIMIT = 200
+
 
 class RegistrationCreateRequest(BaseModel):
     event_id: int
@@ -34,6 +52,29 @@ class RegistrationUpdateRequest(BaseModel):
     status: Optional[RegistrationStatus] = None
 
 
+class RegistrationBulkUpdateRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=REGISTRATIONS_BULK_LIMIT)
+    status: RegistrationStatus
+
+
+class RegistrationBulkUpdateResponse(BaseModel):
+    updated: List[int]
+    skipped: List[int]  # не найдены, нет доступа или статус уже такой
+    no_capacity: List[int]
+    promoted: List[int]  # подтверждены из листа ожидания на освободившиеся места
+
+
+class RegistrationRatingRequest(BaseModel):
+    rating: int = Field(..., ge=1, le=5)
+    feedback: Optional[str] = Field(None, max_length=2000)
+
+
+class CheckinTokenResponse(BaseModel):
+    registration_id: int
+    event_id: int
+    token: str
+
+
 class RegistrationResponse(BaseModel):
     id: int
     event_id: int
@@ -48,6 +89,10 @@ class RegistrationResponse(BaseModel):
     special_requirements: Optional[str]
     organizer_notes: Optional[str]
 
+    # Оценка участия организатором
+    rating: Optional[int] = None
+    feedback: Optional[str] = None
+
     registered_at: datetime
     confirmed_at: Optional[datetime]
 
@@ -59,6 +104,29 @@ class RegistrationResponse(BaseModel):
         orm_mode = True
 
 
+def build_registration_response(registration: Registration, event: Event, volunteer: User) -> RegistrationResponse:
+    return RegistrationResponse(
+        id=registration.id,
+        event_id=registration.event_id,
+        event_title=event.title,
+        event_start_date=event.start_date,
+        event_location=event.location,
+        status=registration.status.value,
+        motivation=registration.motivation,
+        relevant_experience=registration.relevant_experience,
+        availability_notes=registration.availability_notes,
+        special_requirements=registration.special_requirements,
+        organizer_notes=registration.organizer_notes,
+        rating=registration.rating,
+        feedback=registration.feedback,
+        registered_at=registration.registered_at,
+        confirmed_at=registration.confirmed_at,
+        volunteer_name=volunteer.full_name,
+        volunteer_phone=volunteer.phone,
+        volunteer_email=volunteer.email
+    )
+
+
 @router.post("/", response_model=RegistrationResponse)
 async def register_for_event(
         registration_data: RegistrationCreateRequest,
@@ -79,80 +147,123 @@ async def register_for_event(
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    # Проверяем возможность регистрации
-    if not event.can_register(current_user):
+    # Проверяем возможность регистрации (свободные места проверяются атомарно ниже)
+    if not event.is_registration_open:
         raise HTTPException(
             status_code=400,
             detail="Registration is not available for this event"
         )
 
-    # Проверяем что пользователь еще не зарегистрирован
-    existing_registration = db.query(Registration).filter(
-        and_(
-            Registration.user_id == current_user.id,
-            Registration.event_id == registration_data.event_id,
-            Registration.status.in_([RegistrationStatus.PENDING, RegistrationStatus.CONFIRMED])
+    # Возраст и обязательные навыки (профиль читаем, только если требования есть)
+    if event.has_requirements and not event.is_eligible(current_user.volunteer_profile):
+        raise HTTPException(
+            status_code=400,
+            detail="You do not meet the age or skill requirements for this event"
         )
-    ).first()
 
-    if existing_registration:
+    # Пересечение по времени с другим подтвержденным мероприятием волонтера (расписание из кэша)
+    conflict_id = get_schedule(db, current_user.id).conflict(event.start_date, event.end_date, exclude_event_id=event.id)
+    if conflict_id is not None:
         raise HTTPException(
             status_code=400,
-            detail="You are already registered for this event"
+            detail=f"Event overlaps with your confirmed event {conflict_id}"
         )
 
-    # Создаем регистрацию
-    # В методе register_for_event заменить строки 111-115:
-
-    # Создаем регистрацию
-    registration = Registration(
-        user_id=current_user.id,
-        event_id=registration_data.event_id,
-        motivation=registration_data.motivation,
-        relevant_experience=registration_data.relevant_experience,
-        availability_notes=registration_data.availability_notes,
-        special_requirements=registration_data.special_requirements,
-        status=RegistrationStatus.PENDING  # Всегда начинаем с PENDING
-    )
-
-    db.add(registration)
-    db.commit()
-    db.refresh(registration)
-
-    # Увеличиваем счетчик волонтеров (если автоподтверждение)
-    # Пока делаем автоподтверждение для простоты
-    registration.status = RegistrationStatus.CONFIRMED
-    registration.confirmed_at = datetime.utcnow()
-    event.current_volunteers_count += 1
-
-    db.commit()
-    db.refresh(registration)
-
-    # Проверяем, не укомплектовано ли мероприятие после подтверждения
-    if registration.status == RegistrationStatus.CONFIRMED and event.is_full:
-        notify_organizer_on_full(db, event)
-
-    # Формируем ответ
+    # Заявка записывается пачкой вместе с другими, пришедшими в те же миллисекунды:
+    # место занимается условным UPDATE, заявка сразу получает итоговый статус -
+    # подтверждена (пока делаем автоподтверждение для простоты) или в листе ожидания.
+    # Повторную активную заявку отсекает проверка пачки и уникальный индекс.
+    fields = {
+        "motivation": registration_data.motivation,
+        "relevant_experience": registration_data.relevant_experience,
+        "availability_notes": registration_data.availability_notes,
+        "special_requirements": registration_data.special_requirements,
+    }
     response_data = {
-        **registration.__dict__,
+        "event_id": event.id,
         "event_title": event.title,
         "event_start_date": event.start_date,
         "event_location": event.location,
-        "status": registration.status.value,
+        "organizer_notes": None,
         "volunteer_name": current_user.full_name,
         "volunteer_phone": current_user.phone,
-        "volunteer_email": current_user.email
+        "volunteer_email": current_user.email,
+        **fields,
     }
+    volunteer_id = current_user.id
+    # Пока заявка ждет своей пачки, транзакция чтения не должна оставаться открытой
+    db.rollback()
+
+    try:
+        admitted = await registration_admission.submit(volunteer_id, response_data["event_id"], fields)
+    except DuplicateRegistrationError:
+        raise HTTPException(
+            status_code=400,
+            detail="You are already registered for this event"
+        )
+    invalidate_user_registrations(volunteer_id)
+
+    response = RegistrationResponse(
+        id=admitted.registration_id,
+        status=admitted.status.value,
+        registered_at=admitted.registered_at,
+        confirmed_at=admitted.confirmed_at,
+        **response_data
+    )
+
+    # Проверяем, не укомплектовано ли мероприятие после подтверждения
+    if admitted.event_full:
+        notify_organizer_on_full(db, event)
+
+    return response
+
 
-    return RegistrationResponse(**response_data)
+def _load_my_registrations(db: Session, volunteer: User, when: Optional[str], limit: int,
+                           cursor: Optional[str]) -> Tuple[List[RegistrationResponse], Optional[str]]:
+    """Страница заявок волонтера с колонками мероприятия - одним запросом"""
+    query = db.query(Registration).join(Registration.event).options(
+        contains_eager(Registration.event).load_only(Event.title, Event.start_date, Event.location)
+    ).filter(Registration.user_id == volunteer.id)
+
+    if when == "upcoming":
+        query = query.filter(Event.start_date > datetime.utcnow())
+    elif when == "past":
+        query = query.filter(Event.start_date <= datetime.utcnow())
+
+    if cursor:
+        try:
+            registered_at, registration_id = decode_cursor(cursor)
+            after = tuple_(datetime.fromisoformat(registered_at), int(registration_id))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(tuple_(Registration.registered_at, Registration.id) < after)
+
+    registrations = query.order_by(
+        Registration.registered_at.desc(), Registration.id.desc()
+    ).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(registrations) > limit:
+        registrations = registrations[:limit]
+        last = registrations[-1]
+        next_cursor = encode_cursor([last.registered_at.isoformat(), last.id])
+
+    return [build_registration_response(reg, reg.event, volunteer) for reg in registrations], next_cursor
 
 
 @router.get("/my", response_model=List[RegistrationResponse])
 async def get_my_registrations(
+        when: Optional[Literal["upcoming", "past"]] = Query(None),
+        limit: int = Query(50, ge=1, le=REGISTRATIONS_PAGE_LIMIT),
+        cursor: Optional[str] = Query(None),
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
-    """Получить свои регистрации"""
+    """
+    Получить свои регистрации (новые сверху), постранично.
+    when=upcoming/past - только предстоящие или прошедшие мероприятия.
+    Следующая страница - с cursor из заголовка X-Next-Cursor.
+    """
 
     if current_user.role != UserRole.VOLUNTEER:
         raise HTTPException(
@@ -160,25 +271,150 @@ async def get_my_registrations(
             detail="Only volunteers can view registrations"
         )
 
-    registrations = db.query(Registration).filter(
-        Registration.user_id == current_user.id
-    ).order_by(Registration.registered_at.desc()).all()
+    cache_key = (current_user.id, when, limit, cursor)
+    cached = my_registrations_cache.get(cache_key)
+    if cached is None:
+        cached = _load_my_registrations(db, current_user, when, limit, cursor)
+        my_registrations_cache.set(cache_key, cached)
+
+    result, next_cursor = cached
+    return ORJSONResponse(result, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+
+@router.patch("/bulk", response_model=RegistrationBulkUpdateResponse)
+async def bulk_update_registrations(
+        update_data: RegistrationBulkUpdateRequest,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Сменить статус сразу многих заявок (для организаторов).
+    Подтверждаются заявки в порядке подачи, пока есть места; остальные - в no_capacity.
+    """
+    if not current_user.is_organizer():
+        raise HTTPException(
+            status_code=403,
+            detail="Only organizers and admins can update registrations"
+        )
 
-    result = []
-    for reg in registrations:
-        response_data = {
-            **reg.__dict__,
-            "event_title": reg.event.title,
-            "event_start_date": reg.event.start_date,
-            "event_location": reg.event.location,
-            "status": reg.status.value,
-            "volunteer_name": current_user.full_name,
-            "volunteer_phone": current_user.phone,
-            "volunteer_email": current_user.email
-        }
-        result.append(RegistrationResponse(**response_data))
+    target = update_data.status
+    registration_ids = list(dict.fromkeys(update_data.ids))
+
+    # Заявки, которые пользователь может менять: права проверяются в том же запросе
+    query = select(
+        Registration.id, Registration.event_id, Registration.status, Registration.user_id, User.telegram_user_id
+    ).join(
+        Event, Event.id == Registration.event_id
+    ).join(
+        User, User.id == Registration.user_id
+    ).where(
+        Registration.id.in_(registration_ids),
+        Registration.status != target
+    )
+    if not current_user.is_admin():
+        query = query.where(Event.creator_id == current_user.id)
+    rows = db.execute(query.order_by(Registration.id).with_for_update(of=Registration)).all()
+
+    rows_by_event = defaultdict(list)
+    for row in rows:
+        rows_by_event[row.event_id].append(row)
+
+    # Счетчики мест - одним UPDATE на мероприятие. Место занимают SEAT_STATUSES:
+    # CONFIRMED -> COMPLETED счетчик не меняет и лист ожидания не трогает
+    updated, no_capacity, released = [], [], {}
+    for event_id, event_rows in rows_by_event.items():
+        if target in SEAT_STATUSES:
+            seated = [row for row in event_rows if row.status in SEAT_STATUSES]
+            waiting = [row for row in event_rows if row.status not in SEAT_STATUSES]
+            granted = reserve_slots(db, event_id, len(waiting)) if waiting else 0
+            updated.extend(seated + waiting[:granted])
+            no_capacity.extend(row.id for row in waiting[granted:])
+        else:
+            updated.extend(event_rows)
+            freed = sum(1 for row in event_rows if row.status in SEAT_STATUSES)
+            if freed:
+                release_slot(db, event_id, freed)
+                released[event_id] = freed
+
+    updated_ids = [row.id for row in updated]
+    if updated_ids:
+        now = datetime.utcnow()
+        values = {"status": target, "updated_at": now}
+        if target == RegistrationStatus.CONFIRMED:
+            values["confirmed_at"] = now
+        try:
+            db.execute(
+                update(Registration)
+                .where(Registration.id.in_(updated_ids))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail="Some volunteers already have an active registration for these events"
+            )
+        record_registration_changes(db, [(row.id, row.event_id, row.user_id) for row in updated])
+
+    # Освободившиеся места сразу отдаем листу ожидания
+    promoted = []
+    for event_id, freed in released.items():
+        promoted.extend(promote_from_waitlist(db, event_id, exclude_ids=updated_ids, limit=freed))
+
+    # Данные для уведомлений и ответ - до коммита
+    events = {
+        row.id: row for row in db.execute(
+            select(
+                Event.id, Event.title, Event.start_date, Event.max_volunteers, Event.current_volunteers_count
+            ).where(Event.id.in_({row.event_id for row in updated}))
+        )
+    }
+    volunteers_by_event = defaultdict(list)
+    for row in updated:
+        if row.telegram_user_id:
+            volunteers_by_event[events[row.event_id]].append(row.telegram_user_id)
+    full_event_ids = [
+        event.id for event in events.values()
+        if target == RegistrationStatus.CONFIRMED and 0 < event.max_volunteers <= event.current_volunteers_count
+    ]
+    handled = set(updated_ids) | set(no_capacity)
+    response = RegistrationBulkUpdateResponse(
+        updated=updated_ids,
+        skipped=[registration_id for registration_id in registration_ids if registration_id not in handled],
+        no_capacity=no_capacity,
+        promoted=[registration.id for registration in promoted]
+    )
+    affected_user_ids = [row.user_id for row in updated] + [registration.user_id for registration in promoted]
 
-    return result
+    db.commit()
+    invalidate_user_registrations(*affected_user_ids)
+
+    # Уведомления - одним сообщением боту на всю пачку
+    notify_registrations_status_changed(target, volunteers_by_event)
+    for promoted_registration in promoted:
+        notify_volunteer_promoted(promoted_registration)
+    for event_id in full_event_ids:
+        notify_organizer_on_full(db, db.get(Event, event_id))
+
+    return response
+
+
+def _change_status(db: Session, registration: Registration, from_statuses: List[RegistrationStatus],
+                   status: RegistrationStatus, **values) -> bool:
+    """
+    Сменить статус заявки, только если он все еще один из from_statuses (условный UPDATE).
+    True - статус изменен этим запросом. Объект registration в сессии не обновляется.
+    """
+    changed = db.execute(
+        update(Registration)
+        .where(Registration.id == registration.id, Registration.status.in_(from_statuses))
+        .values(status=status, updated_at=datetime.utcnow(), **values)
+        .execution_options(synchronize_session=False)
+    ).rowcount == 1
+    if changed:
+        record_registration_changes(db, [(registration.id, registration.event_id, registration.user_id)])
+    return changed
 
 
 @router.put("/{registration_id}", response_model=RegistrationResponse)
@@ -205,49 +441,62 @@ async def update_registration(
             detail="Access denied"
         )
 
-    # Обновление полей
+    # Обновление полей (статус - отдельно, ниже)
     update_fields = update_data.dict(exclude_unset=True)
+    old_status = registration.status
+    new_status = old_status
 
     for field, value in update_fields.items():
         # Только организатор может менять статус и заметки организатора
         if field in ['status', 'organizer_notes'] and not (is_event_creator or is_admin):
             continue
+        if field == 'status':
+            new_status = value or old_status
+            continue
 
         setattr(registration, field, value)
 
-    # Обновляем счетчик волонтеров при изменении статуса
-    if 'status' in update_fields:
-        old_status = registration.status
-        new_status = update_fields['status']
-
-        if old_status == RegistrationStatus.CONFIRMED and new_status != RegistrationStatus.CONFIRMED:
-            registration.event.current_volunteers_count -= 1
-        elif old_status != RegistrationStatus.CONFIRMED and new_status == RegistrationStatus.CONFIRMED:
-            registration.event.current_volunteers_count += 1
-            registration.confirmed_at = datetime.utcnow()
-
-        # Проверяем, не укомплектовано ли мероприятие после подтверждения
-        if new_status == RegistrationStatus.CONFIRMED and registration.event.is_full:
-            notify_organizer_on_full(db, registration.event)
-
     registration.updated_at = datetime.utcnow()
-
+    db.flush()
+
+    promoted = []
+    confirmed = False
+    if new_status != old_status:
+        # Статус меняется условным UPDATE по прочитанному значению: из двух параллельных
+        # смен одной заявки счетчик мест меняет только одна, вторая получает 409.
+        # Место занимают SEAT_STATUSES, так что CONFIRMED -> COMPLETED счетчик не меняет.
+        confirmed = old_status not in SEAT_STATUSES and new_status in SEAT_STATUSES
+        values = {"confirmed_at": datetime.utcnow()} if new_status == RegistrationStatus.CONFIRMED else {}
+        # Возврат заявки в активный статус может нарушить уникальность активной заявки
+        try:
+            changed = _change_status(db, registration, [old_status], new_status, **values)
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Volunteer already has an active registration for this event")
+        if not changed:
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Registration status was changed by another request")
+
+        if old_status in SEAT_STATUSES and new_status not in SEAT_STATUSES:
+            release_slot(db, registration.event_id)
+            promoted = promote_from_waitlist(db, registration.event_id, exclude_ids=[registration.id])
+        elif confirmed and not reserve_slot(db, registration.event_id):
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Event is full")
+
+    affected_user_ids = [registration.user_id] + [promoted_registration.user_id for promoted_registration in promoted]
     db.commit()
+    invalidate_user_registrations(*affected_user_ids)
     db.refresh(registration)
 
-    # Формируем ответ
-    response_data = {
-        **registration.__dict__,
-        "event_title": registration.event.title,
-        "event_start_date": registration.event.start_date,
-        "event_location": registration.event.location,
-        "status": registration.status.value,
-        "volunteer_name": registration.user.full_name,
-        "volunteer_phone": registration.user.phone,
-        "volunteer_email": registration.user.email
-    }
+    for promoted_registration in promoted:
+        notify_volunteer_promoted(promoted_registration)
 
-    return RegistrationResponse(**response_data)
+    # Проверяем, не укомплектовано ли мероприятие после подтверждения
+    if confirmed and registration.event.is_full:
+        notify_organizer_on_full(db, registration.event)
+
+    return build_registration_response(registration, registration.event, registration.user)
 
 
 @router.delete("/{registration_id}")
@@ -276,30 +525,123 @@ async def cancel_registration(
             detail="This registration cannot be cancelled"
         )
 
-    # Отменяем регистрацию
-    if registration.status == RegistrationStatus.CONFIRMED:
-        # Уменьшаем счетчик только если это было подтверждено
-        # Но так как у нас счетчик вычисляется динамически, это не нужно
-        pass
-
-    registration.status = RegistrationStatus.CANCELLED
-    registration.updated_at = datetime.utcnow()
+    # Отменяем регистрацию условным UPDATE: из параллельных отмен (или повтора запроса) место
+    # освобождает только та, что застала заявку подтвержденной, - его сразу получает первый из листа ожидания
+    promoted = []
+    if _change_status(db, registration, [RegistrationStatus.CONFIRMED], RegistrationStatus.CANCELLED):
+        release_slot(db, registration.event_id)
+        promoted = promote_from_waitlist(db, registration.event_id)
+    elif not _change_status(db, registration, [RegistrationStatus.PENDING, RegistrationStatus.WAITLISTED],
+                            RegistrationStatus.CANCELLED):
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="This registration cannot be cancelled"
+        )
 
+    affected_user_ids = [registration.user_id] + [promoted_registration.user_id for promoted_registration in promoted]
     db.commit()
+    invalidate_user_registrations(*affected_user_ids)
+
+    for promoted_registration in promoted:
+        notify_volunteer_promoted(promoted_registration)
 
     return {"message": "Registration cancelled successfully"}
 
 
+@router.get("/{registration_id}/checkin-token", response_model=CheckinTokenResponse)
+async def get_checkin_token(
+        registration_id: int,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Токен для QR-кода чек-ина на площадке (только своя подтвержденная заявка)"""
+
+    row = db.execute(
+        select(Registration.user_id, Registration.event_id, Registration.status)
+        .where(Registration.id == registration_id)
+    ).one_or_none()
+    if row is None or row.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Registration not found")
+    if row.status != RegistrationStatus.CONFIRMED:
+        raise HTTPException(
+            status_code=400,
+            detail="Only confirmed registrations can check in"
+        )
+
+    return CheckinTokenResponse(
+        registration_id=registration_id,
+        event_id=row.event_id,
+        token=make_checkin_token(registration_id, row.event_id)
+    )
+
+
+def _set_registration_rating(db: Session, current_user: User, registration_id: int,
+                             rating: Optional[int], feedback: Optional[str]) -> RegistrationResponse:
+    """Поставить или снять оценку участия (организатор мероприятия или админ)"""
+    registration = db.query(Registration).join(Registration.event).options(
+        contains_eager(Registration.event).load_only(Event.creator_id, Event.title, Event.start_date, Event.location)
+    ).filter(Registration.id == registration_id).first()
+    if not registration:
+        raise HTTPException(status_code=404, detail="Registration not found")
+    if registration.event.creator_id != current_user.id and not current_user.is_admin():
+        raise HTTPException(status_code=403, detail="Only the event organizer can rate participation")
+    if registration.status not in (RegistrationStatus.CONFIRMED, RegistrationStatus.COMPLETED):
+        raise HTTPException(status_code=400, detail="Only confirmed or completed registrations can be rated")
+    if registration.event.start_date > datetime.utcnow():
+        raise HTTPException(status_code=400, detail="Participation can be rated after the event starts")
+
+    if not rate_registration(db, registration_id, rating, feedback):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Rating was changed concurrently, please retry")
+    volunteer_id = registration.user_id
+    db.commit()
+    invalidate_user_registrations(volunteer_id)
+
+    db.refresh(registration)
+    return build_registration_response(registration, registration.event, registration.user)
+
+
+@router.put("/{registration_id}/rating", response_model=RegistrationResponse)
+async def rate_participation(
+        registration_id: int,
+        rating_data: RegistrationRatingRequest,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Оценить участие волонтера (1-5) с отзывом; повторный вызов заменяет оценку"""
+    return _set_registration_rating(db, current_user, registration_id, rating_data.rating, rating_data.feedback)
+
+
+@router.delete("/{registration_id}/rating", response_model=RegistrationResponse)
+async def remove_participation_rating(
+        registration_id: int,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Снять оценку участия"""
+    return _set_registration_rating(db, current_user, registration_id, None, None)
+
+
 @router.get("/event/{event_id}", response_model=List[RegistrationResponse])
 async def get_event_registrations(
         event_id: int,
+        status: Optional[RegistrationStatus] = Query(None),
+        sort: Literal["registered_at", "-registered_at"] = Query("-registered_at"),
+        limit: int = Query(50, ge=1, le=REGISTRATIONS_PAGE_LIMIT),
+        cursor: Optional[str] = Query(None),
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
-    """Получить регистрации на мероприятие (для организаторов)"""
+    """
+    Получить регистрации на мероприятие (для организаторов), постранично.
+    Следующая страница - с cursor из заголовка X-Next-Cursor; нет заголовка - это последняя страница.
+    """
 
     # Проверяем мероприятие
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = db.query(Event).options(
+        load_only(Event.id, Event.creator_id, Event.title, Event.start_date, Event.location)
+    ).filter(Event.id == event_id).first()
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
@@ -310,22 +652,36 @@ async def get_event_registrations(
             detail="You can only view registrations for your own events"
         )
 
-    registrations = db.query(Registration).filter(
-        Registration.event_id == event_id
-    ).order_by(Registration.registered_at.desc()).all()
-
-    result = []
-    for reg in registrations:
-        response_data = {
-            **reg.__dict__,
-            "event_title": event.title,
-            "event_start_date": event.start_date,
-            "event_location": event.location,
-            "status": reg.status.value,
-            "volunteer_name": reg.user.full_name,
-            "volunteer_phone": reg.user.phone,
-            "volunteer_email": reg.user.email
-        }
-        result.append(RegistrationResponse(**response_data))
-
-    return result
\ No newline at end of file
+    # Заявки вместе с колонками волонтера - одним запросом
+    query = db.query(Registration).join(Registration.user).options(
+        contains_eager(Registration.user).load_only(User.first_name, User.last_name, User.phone, User.email)
+    ).filter(Registration.event_id == event_id)
+
+    if status:
+        query = query.filter(Registration.status == status)
+
+    # Keyset-пагинация по (registered_at, id): страница - диапазон индекса, без OFFSET
+    descending = sort.startswith("-")
+    sort_key = tuple_(Registration.registered_at, Registration.id)
+    if cursor:
+        try:
+            registered_at, registration_id = decode_cursor(cursor)
+            after = tuple_(datetime.fromisoformat(registered_at), int(registration_id))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(sort_key < after if descending else sort_key > after)
+
+    if descending:
+        query = query.order_by(Registration.registered_at.desc(), Registration.id.desc())
+    else:
+        query = query.order_by(Registration.registered_at.asc(), Registration.id.asc())
+
+    registrations = query.limit(limit + 1).all()
+    headers = {}
+    if len(registrations) > limit:
+        registrations = registrations[:limit]
+        last = registrations[-1]
+        headers["X-Next-Cursor"] = encode_cursor([last.registered_at.isoformat(), last.id])
+
+    result = [build_registration_response(reg, event, reg.user) for reg in registrations]
+    return ORJSONResponse(result, headers=headers)
@@ -0,0 +1,126 @@
+"""API инкрементальной синхронизации (мероприятия и заявки, измененные после токена)"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy import or_
+from pydantic import BaseModel
+from typing import Optional, List, Literal, Union, Dict, Any
+
+from backend.core.responses import ORJSONResponse
+from backend.database import get_db
+from backend.api.auth import get_current_user
+from backend.api.events import (
+    EventResponse, parse_event_fields, event_load_options, my_registration_status,
+    build_event_response, sparse_event_data, schedule_conflicts
+)
+from backend.api.registrations import RegistrationResponse, build_registration_response
+from backend.models.user import User, UserRole
+from backend.models.event import Event, EventStatus
+from backend.models.registration import Registration
+from backend.services.change_log_service import read_changes
+from backend.utils.helpers import encode_cursor, decode_cursor
+
+router = APIRouter()
+
+# Максимум записей журнала за один запрос (дальше - has_more и следующий токен)
+SYNC_PAGE_LIMIT = 1000
+
+
+class SyncDeleted(BaseModel):
+    events: List[int]
+    registrations: List[int]
+
+
+class SyncResponse(BaseModel):
+    events: List[Union[EventResponse, Dict[str, Any]]]
+    registrations: List[RegistrationResponse]
+    deleted: SyncDeleted  # удалены или больше не видны пользователю
+    next: str  # токен для следующего запроса
+    has_more: bool
+    reset: bool  # токен не передан или устарел - списки нужно перечитать целиком
+
+
+@router.get("", response_model=SyncResponse)
+async def sync_changes(
+        since: Optional[str] = Query(None, description="токен из поля next прошлого ответа"),
+        limit: int = Query(500, ge=1, le=SYNC_PAGE_LIMIT),
+        fields: Optional[str] = Query(None, description="id,title,..."),
+        view: Optional[Literal["card"]] = Query(None),
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Изменения мероприятий и заявок после токена since.
+    Без since (или со слишком старым токеном) - reset=true и токен текущего состояния:
+    клиент перечитывает списки обычными запросами и дальше синхронизируется с этого токена.
+    fields/view - как в /api/events/ для измененных мероприятий.
+    """
+    selected = parse_event_fields(fields, view)
+
+    since_seq = None
+    if since:
+        try:
+            (since_seq,) = decode_cursor(since)
+            since_seq = int(since_seq)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid sync token")
+
+    changes = read_changes(db, current_user, since_seq, limit)
+
+    events = []
+    deleted_events = set(changes.deleted_event_ids)
+    if changes.event_ids:
+        query = db.query(Event).options(*event_load_options(selected)).filter(Event.id.in_(changes.event_ids))
+        # Черновики видны только своему организатору (и админу)
+        if not current_user.is_admin():
+            query = query.filter(or_(Event.status != EventStatus.DRAFT, Event.creator_id == current_user.id))
+
+        is_volunteer = current_user.role == UserRole.VOLUNTEER
+        if is_volunteer:
+            query = query.add_columns(my_registration_status(current_user.id).label("user_registration_status"))
+
+        loaded = [
+            (row.Event, row.user_registration_status) if is_volunteer else (row, None)
+            for row in query
+        ]
+        conflicts = schedule_conflicts(db, current_user, [event for event, _ in loaded], selected)
+
+        found = set()
+        for event, registration_status in loaded:
+            found.add(event.id)
+            extra = {
+                "user_registration_status": registration_status.value if registration_status else None,
+                "conflicts": event.id in conflicts,
+            }
+            if selected is None:
+                events.append(build_event_response(event, current_user, **extra))
+            else:
+                events.append(sparse_event_data(event, current_user, selected, **extra))
+        deleted_events |= changes.event_ids - found
+
+    registrations = []
+    deleted_registrations = set(changes.deleted_registration_ids)
+    if changes.registration_ids:
+        query = db.query(Registration).join(Registration.event).join(Registration.user).options(
+            contains_eager(Registration.event).load_only(Event.title, Event.start_date, Event.location),
+            contains_eager(Registration.user).load_only(User.first_name, User.last_name, User.phone, User.email)
+        ).filter(Registration.id.in_(changes.registration_ids))
+        if current_user.role == UserRole.VOLUNTEER:
+            query = query.filter(Registration.user_id == current_user.id)
+        elif not current_user.is_admin():
+            query = query.filter(Event.creator_id == current_user.id)
+
+        found = set()
+        for registration in query:
+            found.add(registration.id)
+            registrations.append(build_registration_response(registration, registration.event, registration.user))
+        deleted_registrations |= changes.registration_ids - found
+
+    return ORJSONResponse({
+        "events": events,
+        "registrations": registrations,
+        "deleted": {"events": sorted(deleted_events), "registrations": sorted(deleted_registrations)},
+        "next": encode_cursor([changes.next_seq]),
+        "has_more": changes.has_more,
+        "reset": changes.reset,
+    })
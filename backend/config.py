@@ -87,7 +87,7 @@ if IS_PRODUCTION:
         ALLOWED_ORIGINS.extend([origin.strip() for origin in additional_origins.split(",")])
 
 # Список разрешенных методов
-ALLOWED_METHODS = ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
+ALLOWED_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
 
 # Список разрешенных заголовков
 ALLOWED_HEADERS = [
@@ -95,7 +95,8 @@ ALLOWED_HEADERS = [
     "Authorization",
     "X-Requested-With",
     "X-Telegram-Init-Data",
-    "X-Request-ID"
+    "X-Request-ID",
+    "Idempotency-Key"
 ]
 
 # === ЛОГИРОВАНИЕ ===
@@ -117,6 +118,49 @@ MEDIA_ROOT.mkdir(exist_ok=True)
 (MEDIA_ROOT / "avatars").mkdir(exist_ok=True)
 (MEDIA_ROOT / "documents").mkdir(exist_ok=True)
 
+# === ФОНОВЫЕ ЗАДАЧИ ===
+JOBS_RESULT_DIR = MEDIA_ROOT / "exports"
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "2"))
+JOBS_RESULT_TTL_HOURS = int(os.getenv("JOBS_RESULT_TTL_HOURS", "24"))
+# Экспорты больше этого числа строк выполняются фоновой задачей
+EXPORT_JOB_THRESHOLD = int(os.getenv("EXPORT_JOB_THRESHOLD", "5000"))
+
+JOBS_RESULT_DIR.mkdir(exist_ok=True)
+
+# === ПЛАНИРОВЩИК ===
+# Как часто завершать прошедшие мероприятия и сколько мероприятий обрабатывать за одну транзакцию
+SCHEDULER_INTERVAL_SECONDS = int(os.getenv("SCHEDULER_INTERVAL_SECONDS", "300"))
+SCHEDULER_BATCH_SIZE = int(os.getenv("SCHEDULER_BATCH_SIZE", "500"))
+
+# === ПРИЕМ ЗАЯВОК ===
+# Заявки, пришедшие в пределах окна, записываются одной транзакцией (один коммит на пачку)
+REGISTRATION_BATCH_WINDOW_MS = int(os.getenv("REGISTRATION_BATCH_WINDOW_MS", "5"))
+REGISTRATION_BATCH_MAX_SIZE = int(os.getenv("REGISTRATION_BATCH_MAX_SIZE", "200"))
+
+# === ЧЕК-ИН ===
+# За сколько минут до начала открывается чек-ин (и заранее загружаются списки участников)
+CHECKIN_OPENS_MINUTES = int(os.getenv("CHECKIN_OPENS_MINUTES", "120"))
+# Как часто отмеченные явки записываются в БД (одним UPDATE на мероприятие)
+CHECKIN_FLUSH_SECONDS = float(os.getenv("CHECKIN_FLUSH_SECONDS", "1"))
+
+# === ИДЕМПОТЕНТНОСТЬ ===
+# Сколько хранится ответ на запрос с заголовком Idempotency-Key
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+# Ответы больше этого размера не сохраняются (повтор выполнит запрос заново)
+IDEMPOTENCY_MAX_BODY_BYTES = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", "65536"))
+
+# === СИНХРОНИЗАЦИЯ ===
+# Сколько дней хранится журнал изменений (клиент со старым токеном получает reset)
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+# Записи моложе этого не отдаются: параллельная транзакция могла взять меньший номер и еще не закоммититься
+SYNC_SAFETY_LAG_SECONDS = int(os.getenv("SYNC_SAFETY_LAG_SECONDS", "1"))
+
+# === ГЕОПОИСК ===
+# Радиус поиска волонтеров для уведомлений, если в профиле не указан max_travel_distance
+GEO_DEFAULT_TRAVEL_DISTANCE_KM = int(os.getenv("GEO_DEFAULT_TRAVEL_DISTANCE_KM", "10"))
+# Верхняя граница радиуса (и для поиска мероприятий, и для max_travel_distance)
+GEO_MAX_RADIUS_KM = int(os.getenv("GEO_MAX_RADIUS_KM", "200"))
+
 # === REDIS (для кэширования и очередей) ===
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 ENABLE_REDIS = os.getenv("ENABLE_REDIS", "false").lower() == "true"
@@ -173,6 +217,22 @@ class Settings:
         self.MEDIA_ROOT = MEDIA_ROOT
         self.MEDIA_URL = MEDIA_URL
         self.MAX_UPLOAD_SIZE = MAX_UPLOAD_SIZE
+        self.JOBS_RESULT_DIR = JOBS_RESULT_DIR
+        self.JOBS_MAX_WORKERS = JOBS_MAX_WORKERS
+        self.JOBS_RESULT_TTL_HOURS = JOBS_RESULT_TTL_HOURS
+        self.EXPORT_JOB_THRESHOLD = EXPORT_JOB_THRESHOLD
+        self.SCHEDULER_INTERVAL_SECONDS = SCHEDULER_INTERVAL_SECONDS
+        self.SCHEDULER_BATCH_SIZE = SCHEDULER_BATCH_SIZE
+        self.REGISTRATION_BATCH_WINDOW_MS = REGISTRATION_BATCH_WINDOW_MS
+        self.REGISTRATION_BATCH_MAX_SIZE = REGISTRATION_BATCH_MAX_SIZE
+        self.CHECKIN_OPENS_MINUTES = CHECKIN_OPENS_MINUTES
+        self.CHECKIN_FLUSH_SECONDS = CHECKIN_FLUSH_SECONDS
+        self.IDEMPOTENCY_TTL_HOURS = IDEMPOTENCY_TTL_HOURS
+        self.IDEMPOTENCY_MAX_BODY_BYTES = IDEMPOTENCY_MAX_BODY_BYTES
+        self.CHANGE_LOG_RETENTION_DAYS = CHANGE_LOG_RETENTION_DAYS
+        self.SYNC_SAFETY_LAG_SECONDS = SYNC_SAFETY_LAG_SECONDS
+        self.GEO_DEFAULT_TRAVEL_DISTANCE_KM = GEO_DEFAULT_TRAVEL_DISTANCE_KM
+        self.GEO_MAX_RADIUS_KM = GEO_MAX_RADIUS_KM
         self.REDIS_URL = REDIS_URL
         self.ENABLE_REDIS = ENABLE_REDIS
         self.EMAIL_HOST = EMAIL_HOST
@@ -205,7 +265,7 @@ def get_cors_config():
         "allow_credentials": True,
         "allow_methods": ALLOWED_METHODS,
         "allow_headers": ALLOWED_HEADERS,
-        "expose_headers": ["X-Request-ID", "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"],
+        "expose_headers": ["X-Request-ID", "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "X-Next-Cursor", "Idempotent-Replayed"],
         "max_age": 3600,  # 1 час
     }
 
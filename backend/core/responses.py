@@ -0,0 +1,45 @@
+# backend/core/responses.py
+"""
+JSON-ответы на orjson.
+
+orjson сам сериализует dict/list, datetime/date, Enum и UUID, поэтому
+обработчикам не нужно прогонять результат через jsonable_encoder.
+Pydantic-модели, множества и Decimal разбираются в _default.
+"""
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse as _BaseORJSONResponse
+from pydantic import BaseModel
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Сериализация в JSON (bytes)"""
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class ORJSONResponse(_BaseORJSONResponse):
+    """
+    Ответ по умолчанию для всего приложения.
+
+    Обработчик может вернуть ORJSONResponse(модели) напрямую - тогда FastAPI
+    не валидирует результат повторно по response_model (response_model
+    остается только для документации).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
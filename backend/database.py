@@ -18,14 +18,15 @@ is_postgres = DATABASE_URL.startswith("postgresql")
 
 # Настройки для разных типов БД
 if is_sqlite:
-    # SQLite настройки
+    # SQLite настройки. Одно общее соединение (StaticPool) нужно только in-memory БД:
+    # с файлом параллельные сессии делили бы одну транзакцию
     engine = create_engine(
         DATABASE_URL,
         connect_args={
             "check_same_thread": False,
             "timeout": 20,
         },
-        poolclass=StaticPool,
+        poolclass=StaticPool if DATABASE_URL.endswith(":memory:") else None,
         echo=False  # Отключаем SQL логи по умолчанию
     )
 
@@ -109,6 +110,9 @@ def init_db():
         from backend.models.volunteer_profile import VolunteerProfile
         from backend.models.event import Event, EventStatus, EventCategory
         from backend.models.registration import Registration, RegistrationStatus
+        from backend.models.job import Job, JobStatus
+        from backend.models.idempotency import IdempotencyKey
+        from backend.models.change_log import ChangeLog
 
         logger.info("🔨 Создание таблиц...")
         Base.metadata.create_all(bind=engine)
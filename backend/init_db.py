@@ -10,6 +10,9 @@ from backend.models.user import User, UserRole
 from backend.models.volunteer_profile import VolunteerProfile
 from backend.models.event import Event
 from backend.models.registration import Registration, RegistrationStatus
+from backend.models.job import Job
+from backend.models.idempotency import IdempotencyKey
+from backend.models.change_log import ChangeLog
 from backend.core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -51,11 +54,23 @@ def init_db():
 
     # Применяем миграции
     from backend.migrations.add_last_activity import upgrade as add_last_activity
-    try:
-        add_last_activity()
-        logger.info("✅ Миграции применены")
-    except Exception as e:
-        logger.warning(f"⚠️ Ошибка при применении миграций: {e}")
+    from backend.migrations.add_event_volunteers_count import upgrade as add_event_volunteers_count
+    from backend.migrations.add_geo_columns import upgrade as add_geo_columns
+    from backend.migrations.add_registration_indexes import upgrade as add_registration_indexes
+    from backend.migrations.add_event_completion import upgrade as add_event_completion
+    from backend.migrations.add_registration_unique_active import upgrade as add_registration_unique_active
+    from backend.migrations.add_registration_waitlist import upgrade as add_registration_waitlist
+    from backend.migrations.add_registration_listing_index import upgrade as add_registration_listing_index
+    from backend.migrations.add_event_required_skills import upgrade as add_event_required_skills
+    from backend.migrations.add_rating_aggregates import upgrade as add_rating_aggregates
+    for migration in (add_last_activity, add_event_volunteers_count, add_geo_columns, add_registration_indexes,
+                      add_event_completion, add_registration_unique_active, add_registration_waitlist,
+                      add_registration_listing_index, add_event_required_skills, add_rating_aggregates):
+        try:
+            migration()
+            logger.info(f"✅ Миграция {migration.__module__} применена")
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка при применении миграции {migration.__module__}: {e}")
 
     # Создаем тестового админа если нет пользователей
     db = SessionLocal()
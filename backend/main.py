@@ -19,10 +19,16 @@ from backend.config import (
     FRONTEND_BUILD_DIR, IS_DEVELOPMENT, IS_PRODUCTION
 )
 from backend.core.logging import setup_logging, get_logger
+from backend.core.responses import ORJSONResponse
 from backend.database import init_db, check_db_connection, get_db_info
 from backend.middleware.rate_limit import (
     RateLimitMiddleware, general_rate_limiter, auth_rate_limiter
 )
+from backend.middleware.idempotency import IdempotencyMiddleware
+from backend.services.job_service import job_runner
+from backend.services.scheduler_service import scheduler
+from backend.services.registration_admission import registration_admission
+from backend.services.checkin_service import checkin_desk
 
 # Настройка логирования при запуске
 logging_config = get_logging_config()
@@ -77,6 +83,13 @@ async def lifespan(app: FastAPI):
         logger.error(f"💥 Ошибка инициализации БД: {e}")
         raise
 
+    # Запуск координатора фоновых задач
+    await job_runner.start()
+    await scheduler.start()
+    await registration_admission.start()
+    await checkin_desk.start()
+    logger.info("✅ Фоновые задачи запущены")
+
     # Проверяем наличие фронтенда
     if FRONTEND_BUILD_DIR.exists():
         logger.info("✅ Frontend build найден")
@@ -93,6 +106,10 @@ async def lifespan(app: FastAPI):
     # Остановка фоновых задач
     await general_rate_limiter.stop_cleanup()
     await auth_rate_limiter.stop_cleanup()
+    await job_runner.stop()
+    await scheduler.stop()
+    await registration_admission.stop()
+    await checkin_desk.stop()
 
     logger.info("✅ Приложение остановлено")
 
@@ -102,11 +119,14 @@ app = FastAPI(
     description=APP_DESCRIPTION,
     version=APP_VERSION,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs" if not IS_PRODUCTION else None,
     redoc_url="/redoc" if not IS_PRODUCTION else None
 )
 
 # Добавляем middleware в правильном порядке
+# Idempotency-Key - ближе всех к роутерам: сохраняется несжатый ответ, а повтор проходит rate limiting
+app.add_middleware(IdempotencyMiddleware)
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 app.add_middleware(RequestIDMiddleware)
 
@@ -219,12 +239,14 @@ async def general_exception_handler(request: Request, exc: Exception):
 logger.info("🔌 Подключение API роутеров...")
 
 try:
-    from backend.api import auth, events, registrations, admin
+    from backend.api import auth, events, registrations, admin, jobs, sync
 
     app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
     app.include_router(events.router, prefix="/api/events", tags=["Events"])
     app.include_router(registrations.router, prefix="/api/registrations", tags=["Registrations"])
     app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+    app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
+    app.include_router(sync.router, prefix="/api/sync", tags=["Sync"])
 
     logger.info("✅ API роутеры подключены")
 
@@ -0,0 +1,184 @@
+# backend/middleware/idempotency.py
+"""
+Idempotency-Key для изменяющих запросов.
+
+Telegram WebView на плохой сети повторяет POST, и без ключа каждый повтор
+заново создает заявку или мероприятие. Если клиент прислал заголовок
+Idempotency-Key, первый запрос выполняется как обычно, а его ответ
+сохраняется (services/idempotency_service.py). Повтор с тем же ключом
+получает сохраненный ответ с заголовком Idempotent-Replayed: true и до
+обработчиков не доходит.
+
+Ключ действует в пределах пользователя: он определяется так же, как в
+get_current_user (JWT, затем X-Telegram-Init-Data), и один и тот же
+пользователь с разными способами входа делит ключи, а разные - нет.
+Запросы без проверенной аутентификации и ответы 401/403 не сохраняются.
+Повтор с тем же ключом, но другим методом, путем или телом - 422; пока
+первый запрос еще выполняется - 409. Запросы без заголовка middleware не трогает.
+
+Хранилище ключей - синхронная БД, поэтому обращения к нему идут в пуле потоков.
+"""
+
+import hashlib
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
+
+from backend.api.auth import TelegramAuthError, verify_telegram_data, verify_token
+from backend.config import IDEMPOTENCY_MAX_BODY_BYTES
+from backend.core.logging import get_logger
+from backend.services.idempotency_service import acquire_key, save_response, release_key
+
+logger = get_logger(__name__)
+
+IDEMPOTENT_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+# Ответы, которые зависят от учетных данных, а не от запроса, - не сохраняем
+UNSAVED_STATUSES = {status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN}
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _principal(scope) -> Optional[str]:
+    """
+    Telegram id пользователя запроса, как его определяет get_current_user:
+    сначала JWT, при неудаче - X-Telegram-Init-Data. None - не аутентифицирован.
+    """
+    authorization = _header(scope, b"authorization")
+    if authorization:
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                telegram_user_id = verify_token(token).get("telegram_user_id")
+                if telegram_user_id:
+                    return str(telegram_user_id)
+            except HTTPException:
+                pass
+
+    init_data = _header(scope, b"x-telegram-init-data")
+    if init_data:
+        try:
+            telegram_user_id = verify_telegram_data(init_data).get("user_id")
+            if telegram_user_id:
+                return str(telegram_user_id)
+        except TelegramAuthError:
+            pass
+    return None
+
+
+class IdempotencyMiddleware:
+    """Middleware, повторяющее сохраненный ответ для запросов с тем же Idempotency-Key"""
+
+    def __init__(self, app, path_prefix: str = "/api/"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS
+                or not scope["path"].startswith(self.path_prefix)):
+            await self.app(scope, receive, send)
+            return
+
+        idempotency_key = _header(scope, b"idempotency-key")
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await self._error(scope, receive, send, status.HTTP_400_BAD_REQUEST,
+                              f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+            return
+
+        # Без пользователя ключу не в чем действовать: запрос выполняется как обычно (и получит 401)
+        principal = _principal(scope)
+        if principal is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Тело читаем целиком: оно нужно и для отпечатка запроса, и обработчику
+        body_parts: List[bytes] = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body_parts.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(body_parts)
+
+        key = hashlib.sha256(f"{principal}\n{idempotency_key}".encode()).hexdigest()
+        request_hash = hashlib.sha256(
+            b"\n".join([scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body])
+        ).hexdigest()
+
+        stored = await run_in_threadpool(acquire_key, key, request_hash)
+        if stored is not None:
+            if stored.request_hash != request_hash:
+                await self._error(scope, receive, send, status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                  "Idempotency-Key was already used with a different request")
+            elif not stored.is_completed:
+                await self._error(scope, receive, send, status.HTTP_409_CONFLICT,
+                                  "A request with this Idempotency-Key is still in progress")
+            else:
+                response = Response(
+                    content=stored.body,
+                    status_code=stored.status_code,
+                    media_type=stored.content_type,
+                    headers={"Idempotent-Replayed": "true"}
+                )
+                await response(scope, receive, send)
+            return
+
+        body_sent = False
+
+        async def receive_wrapper():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status_code = None
+        content_type = None
+        response_parts: List[bytes] = []
+        response_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, content_type, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = _header(message, b"content-type")
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                response_size += len(chunk)
+                if response_size <= IDEMPOTENCY_MAX_BODY_BYTES:
+                    response_parts.append(chunk)
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            # Ответы 5xx, 401/403, оборванные и слишком большие не сохраняем - повтор выполнится заново
+            if (status_code is not None and status_code < 500 and status_code not in UNSAVED_STATUSES
+                    and response_size <= IDEMPOTENCY_MAX_BODY_BYTES):
+                await run_in_threadpool(save_response, key, status_code, content_type, b"".join(response_parts))
+            else:
+                await run_in_threadpool(release_key, key)
+
+    async def _error(self, scope, receive, send, status_code: int, detail: str):
+        response = JSONResponse(
+            status_code=status_code,
+            content={
+                "error": detail,
+                "status_code": status_code,
+                "request_id": scope.get("request_id", "unknown")
+            }
+        )
+        await response(scope, receive, send)
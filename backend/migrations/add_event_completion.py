@@ -0,0 +1,26 @@
+"""Индекс для планировщика завершения мероприятий и действие COMPLETE в журнале"""
+
+from sqlalchemy import text
+from backend.database import engine, is_postgres
+
+
+def upgrade():
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_events_status_end_date ON events (status, end_date)"
+        ))
+
+    # В Postgres enum нативный - новое значение добавляется вне транзакции
+    if is_postgres:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ALTER TYPE eventactiontype ADD VALUE IF NOT EXISTS 'COMPLETE'"))
+
+
+def downgrade():
+    # Значение enum в Postgres не удаляется - остается неиспользуемым
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_events_status_end_date"))
+
+
+if __name__ == "__main__":
+    upgrade()
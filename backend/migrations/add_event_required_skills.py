@@ -0,0 +1,32 @@
+"""Таблица нормализованных обязательных навыков мероприятий (фильтр eligible_only)"""
+
+from sqlalchemy import insert, select, text
+from backend.database import engine
+from backend.models.event import Event, EventRequiredSkill
+from backend.utils.helpers import normalize_skills
+
+
+def upgrade():
+    EventRequiredSkill.__table__.create(engine, checkfirst=True)
+
+    with engine.begin() as conn:
+        # Заполняем по уже существующим мероприятиям (нормализация - та же, что в модели)
+        conn.execute(text("DELETE FROM event_required_skills"))
+        rows = [
+            {"event_id": event_id, "skill": skill}
+            for event_id, required_skills in conn.execute(
+                select(Event.id, Event.required_skills).where(Event.required_skills.isnot(None))
+            )
+            for skill in sorted(normalize_skills(required_skills))
+        ]
+        if rows:
+            conn.execute(insert(EventRequiredSkill), rows)
+
+
+def downgrade():
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS event_required_skills"))
+
+
+if __name__ == "__main__":
+    upgrade()
@@ -0,0 +1,41 @@
+"""Счетчик подтвержденных волонтеров в events и индексы по дате начала"""
+
+from sqlalchemy import text
+from backend.database import engine
+from backend.migrations.helpers import column_exists
+from backend.models.registration import SEAT_STATUSES_SQL
+
+
+def upgrade():
+    with engine.begin() as conn:
+        # Колонка была перекрыта свойством модели и в старых базах не создавалась
+        if not column_exists(conn, "events", "current_volunteers_count"):
+            conn.execute(text("""
+                ALTER TABLE events
+                ADD COLUMN current_volunteers_count INTEGER NOT NULL DEFAULT 0
+            """))
+
+        # Пересчитываем счетчик по заявкам - по тем же статусам, что занимают место во время работы
+        conn.execute(text(f"""
+            UPDATE events SET current_volunteers_count = (
+                SELECT COUNT(*) FROM registrations
+                WHERE registrations.event_id = events.id
+                  AND registrations.{SEAT_STATUSES_SQL}
+            )
+        """))
+
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_events_start_date ON events (start_date)"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_events_status_start_date ON events (status, start_date)"
+        ))
+
+
+def downgrade():
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_events_status_start_date"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_events_start_date"))
+        conn.execute(text("ALTER TABLE events DROP COLUMN current_volunteers_count"))
+
+
+if __name__ == "__main__":
+    upgrade()
@@ -0,0 +1,28 @@
+"""Координаты и geohash для мероприятий и пользователей"""
+
+from sqlalchemy import text
+from backend.database import engine
+from backend.migrations.helpers import column_exists
+
+GEO_TABLES = ("events", "users")
+
+
+def upgrade():
+    with engine.begin() as conn:
+        for table in GEO_TABLES:
+            for column, column_type in (("latitude", "FLOAT"), ("longitude", "FLOAT"), ("geohash", "VARCHAR(12)")):
+                if not column_exists(conn, table, column):
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_geohash ON {table} (geohash)"))
+
+
+def downgrade():
+    with engine.begin() as conn:
+        for table in GEO_TABLES:
+            conn.execute(text(f"DROP INDEX IF EXISTS ix_{table}_geohash"))
+            for column in ("geohash", "longitude", "latitude"):
+                conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+
+
+if __name__ == "__main__":
+    upgrade()
@@ -0,0 +1,41 @@
+"""Агрегаты оценок участия у пользователей и мероприятий"""
+
+from sqlalchemy import text
+from backend.database import engine
+from backend.migrations.helpers import column_exists
+from backend.models.rating import RATING_VALUES
+
+RATING_TABLES = (("users", "user_id"), ("events", "event_id"))
+RATING_COLUMNS = ("rating_count", "rating_sum") + tuple(f"rating_{value}" for value in RATING_VALUES)
+
+
+def upgrade():
+    with engine.begin() as conn:
+        for table, key in RATING_TABLES:
+            for column in RATING_COLUMNS:
+                if not column_exists(conn, table, column):
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+
+            # Пересчитываем по уже поставленным оценкам
+            conditions = {"rating_count": "rating IS NOT NULL"}
+            conditions.update((f"rating_{value}", f"rating = {value}") for value in RATING_VALUES)
+            assignments = [
+                f"{column} = (SELECT COUNT(*) FROM registrations WHERE registrations.{key} = {table}.id AND {condition})"
+                for column, condition in conditions.items()
+            ]
+            assignments.append(
+                f"rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM registrations "
+                f"WHERE registrations.{key} = {table}.id)"
+            )
+            conn.execute(text(f"UPDATE {table} SET {', '.join(assignments)}"))
+
+
+def downgrade():
+    with engine.begin() as conn:
+        for table, _ in RATING_TABLES:
+            for column in reversed(RATING_COLUMNS):
+                conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+
+
+if __name__ == "__main__":
+    upgrade()
@@ -0,0 +1,24 @@
+"""Индексы заявок по мероприятию/статусу и пользователю/мероприятию"""
+
+from sqlalchemy import text
+from backend.database import engine
+
+
+def upgrade():
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_registrations_event_status ON registrations (event_id, status)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_registrations_user_event ON registrations (user_id, event_id)"
+        ))
+
+
+def downgrade():
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_registrations_user_event"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_registrations_event_status"))
+
+
+if __name__ == "__main__":
+    upgrade()
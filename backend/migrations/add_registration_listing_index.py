@@ -0,0 +1,21 @@
+"""Индекс для постраничного списка заявок мероприятия (event_id, registered_at, id)"""
+
+from sqlalchemy import text
+from backend.database import engine
+
+
+def upgrade():
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_registrations_event_registered "
+            "ON registrations (event_id, registered_at, id)"
+        ))
+
+
+def downgrade():
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_registrations_event_registered"))
+
+
+if __name__ == "__main__":
+    upgrade()
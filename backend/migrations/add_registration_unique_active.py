@@ -0,0 +1,23 @@
+"""Уникальность активной заявки (user_id, event_id) - частичный уникальный индекс"""
+
+from sqlalchemy import text
+from backend.database import engine
+from backend.models.registration import ACTIVE_STATUSES_SQL
+
+
+def upgrade():
+    # Если в БД уже есть дубли активных заявок, индекс не создастся - их нужно сначала отменить
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_registrations_active_user_event "
+            f"ON registrations (user_id, event_id) WHERE {ACTIVE_STATUSES_SQL}"
+        ))
+
+
+def downgrade():
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS uq_registrations_active_user_event"))
+
+
+if __name__ == "__main__":
+    upgrade()
@@ -0,0 +1,44 @@
+"""
+Лист ожидания: статус WAITLISTED, индекс очереди (заменяет индекс по event_id, status)
+и уникальность активной заявки с учетом WAITLISTED
+"""
+
+from sqlalchemy import text
+from backend.database import engine, is_postgres
+from backend.migrations.helpers import index_definition
+from backend.models.registration import ACTIVE_STATUSES_SQL
+
+
+def upgrade():
+    # В Postgres enum нативный - новое значение добавляется вне транзакции
+    if is_postgres:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ALTER TYPE registrationstatus ADD VALUE IF NOT EXISTS 'WAITLISTED'"))
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_registrations_event_status_id ON registrations (event_id, status, id)"
+        ))
+        # (event_id, status) - левый префикс нового индекса, второй индекс только удорожал бы запись
+        conn.execute(text("DROP INDEX IF EXISTS ix_registrations_event_status"))
+        # Индекс мог быть создан раньше без WAITLISTED в условии - пересоздаем
+        definition = index_definition(conn, "uq_registrations_active_user_event")
+        if definition is not None and "WAITLISTED" not in definition:
+            conn.execute(text("DROP INDEX uq_registrations_active_user_event"))
+            conn.execute(text(
+                "CREATE UNIQUE INDEX uq_registrations_active_user_event "
+                f"ON registrations (user_id, event_id) WHERE {ACTIVE_STATUSES_SQL}"
+            ))
+
+
+def downgrade():
+    # Значение enum в Postgres не удаляется - остается неиспользуемым
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_registrations_event_status ON registrations (event_id, status)"
+        ))
+        conn.execute(text("DROP INDEX IF EXISTS ix_registrations_event_status_id"))
+
+
+if __name__ == "__main__":
+    upgrade()
@@ -0,0 +1,19 @@
+"""Общие функции для миграций"""
+
+from typing import Optional
+
+from sqlalchemy import inspect, text
+
+
+def column_exists(conn, table: str, column: str) -> bool:
+    """Есть ли колонка в таблице"""
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+def index_definition(conn, index: str) -> Optional[str]:
+    """SQL-определение индекса или None, если индекса нет"""
+    if conn.dialect.name == "postgresql":
+        query = "SELECT indexdef FROM pg_indexes WHERE indexname = :name"
+    else:
+        query = "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = :name"
+    return conn.execute(text(query), {"name": index}).scalar()
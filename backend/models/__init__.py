@@ -5,10 +5,16 @@ from .user import User, UserRole
 from .volunteer_profile import VolunteerProfile
 from .event import Event, EventStatus, EventCategory
 from .registration import Registration, RegistrationStatus
+from .job import Job, JobStatus
+from .idempotency import IdempotencyKey
+from .change_log import ChangeLog
 
 __all__ = [
     'User', 'UserRole',
     'VolunteerProfile',
     'Event', 'EventStatus', 'EventCategory',
-    'Registration', 'RegistrationStatus'
+    'Registration', 'RegistrationStatus',
+    'Job', 'JobStatus',
+    'IdempotencyKey',
+    'ChangeLog'
 ]
\ No newline at end of file
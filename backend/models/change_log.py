@@ -0,0 +1,72 @@
+"""Журнал изменений мероприятий и заявок для инкрементальной синхронизации (/api/sync)"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index, event as sa_event, inspect
+from sqlalchemy.orm import Session
+from datetime import datetime
+from backend.database import Base
+from backend.models.event import Event
+from backend.models.registration import Registration
+
+
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+    __table_args__ = (
+        Index("ix_change_log_changed_at", "changed_at"),
+        # В SQLite без AUTOINCREMENT номер после удаления последних строк может повториться
+        {"sqlite_autoincrement": True},
+    )
+
+    # Монотонный номер изменения - он же токен синхронизации
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+
+    entity = Column(String(20), nullable=False)  # event / registration
+    entity_id = Column(Integer, nullable=False)
+    # Для фильтра видимости: мероприятие заявки (у мероприятия - оно само) и волонтер заявки
+    event_id = Column(Integer)
+    user_id = Column(Integer)
+    deleted = Column(Boolean, default=False, nullable=False)
+
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ChangeLog(seq={self.seq}, entity='{self.entity}', entity_id={self.entity_id})>"
+
+
+def change_row(entity: str, entity_id: int, event_id: int = None, user_id: int = None,
+               deleted: bool = False) -> dict:
+    return {
+        "entity": entity,
+        "entity_id": entity_id,
+        "event_id": event_id,
+        "user_id": user_id,
+        "deleted": deleted,
+        "changed_at": datetime.utcnow(),
+    }
+
+
+def _object_change_row(obj, deleted: bool) -> dict:
+    # У удаленных объектов читаем только уже загруженные значения - догружать их неоткуда
+    entity_id = inspect(obj).identity[0] if deleted else obj.id
+    if isinstance(obj, Event):
+        return change_row("event", entity_id, event_id=entity_id, deleted=deleted)
+    values = obj.__dict__ if deleted else {"event_id": obj.event_id, "user_id": obj.user_id}
+    return change_row(
+        "registration", entity_id, event_id=values.get("event_id"), user_id=values.get("user_id"), deleted=deleted
+    )
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _log_flushed_changes(session, flush_context):
+    """Изменения мероприятий и заявок через ORM пишутся в журнал в той же транзакции"""
+    rows = []
+    for obj in session.new:
+        if isinstance(obj, (Event, Registration)):
+            rows.append(_object_change_row(obj, deleted=False))
+    for obj in session.dirty:
+        if isinstance(obj, (Event, Registration)) and session.is_modified(obj, include_collections=False):
+            rows.append(_object_change_row(obj, deleted=False))
+    for obj in session.deleted:
+        if isinstance(obj, (Event, Registration)):
+            rows.append(_object_change_row(obj, deleted=True))
+    if rows:
+        session.connection().execute(ChangeLog.__table__.insert(), rows)
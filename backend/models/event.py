@@ -1,10 +1,14 @@
 """Упрощенная модель мероприятия"""
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, JSON, Enum as SAEnum
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, JSON, Float, Index, Enum as SAEnum
+from sqlalchemy import event as sa_event, delete, insert, inspect
 from sqlalchemy.orm import relationship, backref
 from datetime import datetime
 from backend.database import Base
 from backend.models.user import User
+from backend.models.rating import RatingAggregateMixin
+from backend.utils.geo import geohash_or_none
+from backend.utils.helpers import normalize_skills
 from enum import Enum
 
 class EventStatus(Enum):
@@ -32,10 +36,17 @@ class EventActionType(str, Enum):
     RESTORE = "restore"
     PUBLISH = "publish"
     EXPORT = "export"
+    COMPLETE = "complete"
     OTHER = "other"
 
-class Event(Base):
+class Event(RatingAggregateMixin, Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # Листинги и календарь: опубликованные мероприятия по дате начала
+        Index("ix_events_status_start_date", "status", "start_date"),
+        # Планировщик: опубликованные мероприятия с прошедшей датой окончания
+        Index("ix_events_status_end_date", "status", "end_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -52,14 +63,18 @@ class Event(Base):
     # Место и время
     location = Column(String(255))
     address = Column(Text)
-    start_date = Column(DateTime, nullable=False)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    geohash = Column(String(12), index=True)  # заполняется из координат при сохранении
+    start_date = Column(DateTime, nullable=False, index=True)
     end_date = Column(DateTime, nullable=False)
     registration_deadline = Column(DateTime)
 
     # Участники
     max_volunteers = Column(Integer, default=0)
     min_volunteers = Column(Integer, default=1)
-    current_volunteers_count = Column(Integer, default=0)
+    # Число подтвержденных заявок, поддерживается при изменении статусов заявок
+    current_volunteers_count = Column(Integer, default=0, nullable=False)
 
     # Требования
     required_skills = Column(JSON)
@@ -137,24 +152,60 @@ class Event(Base):
             return 0
         return int((self.current_volunteers_count / self.max_volunteers) * 100)
 
+    @property
+    def has_requirements(self) -> bool:
+        """Есть ли требования к возрасту или навыкам (иначе профиль волонтера для проверки не нужен)"""
+        return bool(self.min_age or self.max_age or normalize_skills(self.required_skills))
+
+    def is_eligible(self, profile) -> bool:
+        """Подходит ли волонтер по возрасту и обязательным навыкам (profile - VolunteerProfile или None)"""
+        age = profile.age if profile else None
+        if self.min_age and (age is None or age < self.min_age):
+            return False
+        if self.max_age and (age is None or age > self.max_age):
+            return False
+        return normalize_skills(self.required_skills) <= normalize_skills(profile.skills if profile else None)
+
     def can_register(self, user) -> bool:
         """Может ли пользователь зарегистрироваться"""
         from backend.models.user import UserRole
         return (
             self.is_registration_open and
             not self.is_full and
-            user.role == UserRole.VOLUNTEER
+            user.role == UserRole.VOLUNTEER and
+            (not self.has_requirements or self.is_eligible(user.volunteer_profile))
         )
 
     def __repr__(self):
         return f"<Event(id={self.id}, title='{self.title}', status='{self.status.value}')>"
 
-    @property
-    def current_volunteers_count(self):
-        """Текущее количество подтвержденных волонтеров"""
-        if hasattr(self, 'registrations'):
-            return len([r for r in self.registrations if r.status == RegistrationStatus.CONFIRMED])
-        return 0
+
+@sa_event.listens_for(Event, "before_insert")
+@sa_event.listens_for(Event, "before_update")
+def _set_event_geohash(mapper, connection, target):
+    target.geohash = geohash_or_none(target.latitude, target.longitude)
+
+
+class EventRequiredSkill(Base):
+    """Нормализованные обязательные навыки мероприятия (копия required_skills для фильтров в SQL)"""
+    __tablename__ = "event_required_skills"
+
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    skill = Column(String(255), primary_key=True)
+
+
+@sa_event.listens_for(Event, "after_insert")
+@sa_event.listens_for(Event, "after_update")
+def _sync_required_skills(mapper, connection, target):
+    """event_required_skills обновляется в той же транзакции, если изменились required_skills"""
+    if not inspect(target).attrs.required_skills.history.has_changes():
+        return
+    connection.execute(delete(EventRequiredSkill).where(EventRequiredSkill.event_id == target.id))
+    skills = normalize_skills(target.required_skills)
+    if skills:
+        connection.execute(
+            insert(EventRequiredSkill), [{"event_id": target.id, "skill": skill} for skill in sorted(skills)]
+        )
 
 
 class EventLog(Base):
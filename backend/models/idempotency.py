@@ -0,0 +1,31 @@
+"""Модель сохраненного ответа на запрос с заголовком Idempotency-Key"""
+
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
+from datetime import datetime
+from backend.database import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # sha256 от авторизации клиента и значения заголовка
+    key = Column(String(64), primary_key=True)
+    # sha256 от метода, пути и тела запроса - повтор с другим телом отклоняется
+    request_hash = Column(String(64), nullable=False)
+
+    # Сохраненный ответ (status_code NULL - запрос еще выполняется)
+    status_code = Column(Integer)
+    content_type = Column(String(100))
+    body = Column(LargeBinary)
+
+    # Временные метки
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    @property
+    def is_completed(self):
+        """Есть ли сохраненный ответ"""
+        return self.status_code is not None
+
+    def __repr__(self):
+        return f"<IdempotencyKey(key={self.key[:12]}, status_code={self.status_code})>"
@@ -0,0 +1,53 @@
+"""Модель фоновой задачи (экспорты, отчеты)"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Enum
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from backend.database import Base
+import enum
+import uuid
+
+
+class JobStatus(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # Что выполняем
+    job_type = Column(String(50), nullable=False)
+    params = Column(JSON)
+
+    # Статус
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, index=True)
+    error = Column(Text)
+
+    # Результат
+    result_path = Column(String(500))
+    result_filename = Column(String(255))
+    media_type = Column(String(100))
+    rows_count = Column(Integer)
+
+    # Временные метки
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    # Связи
+    user = relationship("User")
+
+    @property
+    def is_finished(self):
+        """Завершена ли задача (успешно или нет)"""
+        return self.status in [JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED]
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, type='{self.job_type}', status='{self.status.value}')>"
@@ -0,0 +1,33 @@
+"""Агрегаты оценок участия: у волонтера (users) и у мероприятия (events)"""
+
+from typing import Dict, Optional
+from sqlalchemy import Column, Integer
+
+# Допустимые оценки
+RATING_VALUES = range(1, 6)
+
+
+class RatingAggregateMixin:
+    """
+    Число, сумма и распределение оценок. Меняются только инкрементом
+    в транзакции самой оценки (services/rating_service.py).
+    """
+    rating_count = Column(Integer, default=0, nullable=False)
+    rating_sum = Column(Integer, default=0, nullable=False)
+    rating_1 = Column(Integer, default=0, nullable=False)
+    rating_2 = Column(Integer, default=0, nullable=False)
+    rating_3 = Column(Integer, default=0, nullable=False)
+    rating_4 = Column(Integer, default=0, nullable=False)
+    rating_5 = Column(Integer, default=0, nullable=False)
+
+    @property
+    def rating_average(self) -> Optional[float]:
+        """Средняя оценка (None - оценок нет)"""
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 2)
+
+    @property
+    def rating_distribution(self) -> Dict[str, int]:
+        """Число оценок по баллам: {"1": ..., "5": ...}"""
+        return {str(value): getattr(self, f"rating_{value}") or 0 for value in RATING_VALUES}
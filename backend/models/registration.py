@@ -1,6 +1,6 @@
 """Упрощенная модель регистрации"""
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Index, Enum, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from backend.database import Base
@@ -12,9 +12,34 @@ class RegistrationStatus(enum.Enum):
     REJECTED = "rejected"
     CANCELLED = "cancelled"
     COMPLETED = "completed"
+    WAITLISTED = "waitlisted"  # Лист ожидания: мест нет, ждет освобождения
+
+# Активные заявки: у пользователя на мероприятие может быть только одна такая
+ACTIVE_STATUSES = (RegistrationStatus.PENDING, RegistrationStatus.CONFIRMED, RegistrationStatus.WAITLISTED)
+# То же для условий индексов (в БД enum хранится по именам)
+ACTIVE_STATUSES_SQL = "status IN ({})".format(", ".join(f"'{status.name}'" for status in ACTIVE_STATUSES))
+
+# Заявки, занимающие место (events.current_volunteers_count): подтвержденная
+# остается на своем месте и после завершения мероприятия
+SEAT_STATUSES = (RegistrationStatus.CONFIRMED, RegistrationStatus.COMPLETED)
+SEAT_STATUSES_SQL = "status IN ({})".format(", ".join(f"'{status.name}'" for status in SEAT_STATUSES))
+
 
 class Registration(Base):
     __tablename__ = "registrations"
+    __table_args__ = (
+        Index("ix_registrations_user_event", "user_id", "event_id"),
+        # Заявки мероприятия по статусу и очередь листа ожидания (по id в порядке подачи);
+        # запросам по (event_id, status) служит левый префикс
+        Index("ix_registrations_event_status_id", "event_id", "status", "id"),
+        # Постраничный список заявок мероприятия (keyset по дате подачи)
+        Index("ix_registrations_event_registered", "event_id", "registered_at", "id"),
+        # Не больше одной активной заявки пользователя на мероприятие
+        Index(
+            "uq_registrations_active_user_event", "user_id", "event_id", unique=True,
+            sqlite_where=text(ACTIVE_STATUSES_SQL), postgresql_where=text(ACTIVE_STATUSES_SQL)
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -50,7 +75,7 @@ class Registration(Base):
 
     def can_cancel(self) -> bool:
         """Можно ли отменить регистрацию"""
-        return self.status in [RegistrationStatus.PENDING, RegistrationStatus.CONFIRMED]
+        return self.status in ACTIVE_STATUSES
 
     def can_confirm(self) -> bool:
         """Можно ли подтвердить регистрацию"""
@@ -1,9 +1,12 @@
 """Упрощенная модель пользователя"""
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, Enum
+from sqlalchemy import event as sa_event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from backend.database import Base
+from backend.models.rating import RatingAggregateMixin
+from backend.utils.geo import geohash_or_none
 import enum
 
 class UserRole(enum.Enum):
@@ -11,7 +14,7 @@ class UserRole(enum.Enum):
     ORGANIZER = "organizer"
     ADMIN = "admin"
 
-class User(Base):
+class User(RatingAggregateMixin, Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -27,6 +30,9 @@ class User(Base):
     bio = Column(Text)
     avatar_url = Column(String(500))
     location = Column(String(255))
+    latitude = Column(Float)
+    longitude = Column(Float)
+    geohash = Column(String(12), index=True)  # заполняется из координат при сохранении
     birth_date = Column(DateTime)
 
     # Статус
@@ -79,4 +85,10 @@ class User(Base):
         return self.role in [UserRole.ORGANIZER, UserRole.ADMIN]
 
     def __repr__(self):
-        return f"<User(id={self.id}, name='{self.full_name}', role='{self.role.value}')>"
\ No newline at end of file
+        return f"<User(id={self.id}, name='{self.full_name}', role='{self.role.value}')>"
+
+
+@sa_event.listens_for(User, "before_insert")
+@sa_event.listens_for(User, "before_update")
+def _set_user_geohash(mapper, connection, target):
+    target.geohash = geohash_or_none(target.latitude, target.longitude)
@@ -0,0 +1,132 @@
+"""
+Журнал изменений для инкрементальной синхронизации.
+
+Каждое изменение мероприятия или заявки получает монотонный номер seq в
+таблице change_log в той же транзакции, что и само изменение. Изменения
+через ORM записывает слушатель after_flush (models/change_log.py);
+set-based UPDATE/INSERT мимо ORM (счетчики мест, массовая смена статусов,
+планировщик) записываются явно функциями record_*_changes.
+
+Клиент хранит токен (последний прочитанный seq) и забирает через
+/api/sync только то, что изменилось после него. Счетчик просмотров
+изменением не считается.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Set, Tuple
+
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from backend.config import CHANGE_LOG_RETENTION_DAYS, SYNC_SAFETY_LAG_SECONDS
+from backend.core.logging import get_logger
+from backend.database import get_db_context
+from backend.models.change_log import ChangeLog, change_row
+from backend.models.event import Event
+from backend.models.user import User, UserRole
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ChangeSet:
+    """Что изменилось после токена (последнее состояние по каждому объекту)"""
+    next_seq: int
+    has_more: bool = False
+    reset: bool = False
+    event_ids: Set[int] = field(default_factory=set)
+    registration_ids: Set[int] = field(default_factory=set)
+    deleted_event_ids: Set[int] = field(default_factory=set)
+    deleted_registration_ids: Set[int] = field(default_factory=set)
+
+
+def record_event_changes(db: Session, *event_ids: int):
+    """Записать изменение мероприятий, сделанное мимо ORM"""
+    if event_ids:
+        db.execute(insert(ChangeLog), [change_row("event", event_id, event_id=event_id) for event_id in event_ids])
+
+
+def record_registration_changes(db: Session, rows: Iterable[Tuple[int, int, int]]):
+    """Записать изменение заявок (id, event_id, user_id), сделанное мимо ORM"""
+    values = [
+        change_row("registration", registration_id, event_id=event_id, user_id=user_id)
+        for registration_id, event_id, user_id in rows
+    ]
+    if values:
+        db.execute(insert(ChangeLog), values)
+
+
+def _visible_changes(user: User):
+    """Условие на записи журнала, которые пользователь вправе видеть"""
+    if user.is_admin():
+        return None
+    if user.role == UserRole.VOLUNTEER:
+        own_registrations = ChangeLog.user_id == user.id
+    else:
+        own_registrations = ChangeLog.event_id.in_(select(Event.id).where(Event.creator_id == user.id))
+    return or_(ChangeLog.entity == "event", (ChangeLog.entity == "registration") & own_registrations)
+
+
+def read_changes(db: Session, user: User, since: Optional[int], limit: int) -> ChangeSet:
+    """
+    Изменения после since, видимые пользователю, не больше limit записей журнала.
+    since=None или токен старше хранимого журнала - reset: клиенту нужно перечитать списки целиком.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=SYNC_SAFETY_LAG_SECONDS)
+    head, first = db.execute(
+        select(
+            select(func.max(ChangeLog.seq)).where(ChangeLog.changed_at <= cutoff).scalar_subquery(),
+            select(func.min(ChangeLog.seq)).scalar_subquery(),
+        )
+    ).one()
+    head = head or since or 0
+
+    if since is None or (first is not None and since + 1 < first):
+        return ChangeSet(next_seq=head, reset=True)
+    if since >= head:
+        return ChangeSet(next_seq=since)
+
+    query = select(ChangeLog.seq, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.deleted).where(
+        ChangeLog.seq > since, ChangeLog.seq <= head
+    )
+    visible = _visible_changes(user)
+    if visible is not None:
+        query = query.where(visible)
+    rows = db.execute(query.order_by(ChangeLog.seq).limit(limit + 1)).all()
+
+    changes = ChangeSet(next_seq=head)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        changes.has_more = True
+        changes.next_seq = rows[-1].seq
+
+    # Записи идут по возрастанию seq - последняя по объекту определяет, удален ли он
+    for row in rows:
+        alive, deleted = (
+            (changes.event_ids, changes.deleted_event_ids) if row.entity == "event"
+            else (changes.registration_ids, changes.deleted_registration_ids)
+        )
+        if row.deleted:
+            alive.discard(row.entity_id)
+            deleted.add(row.entity_id)
+        else:
+            deleted.discard(row.entity_id)
+            alive.add(row.entity_id)
+    return changes
+
+
+def purge_change_log(now: Optional[datetime] = None) -> int:
+    """Удалить записи старше CHANGE_LOG_RETENTION_DAYS. Возвращает число удаленных"""
+    now = now or datetime.utcnow()
+    with get_db_context() as db:
+        # Последнюю запись оставляем всегда: по ней read_changes отличает устаревший токен
+        result = db.execute(
+            delete(ChangeLog).where(
+                ChangeLog.changed_at < now - timedelta(days=CHANGE_LOG_RETENTION_DAYS),
+                ChangeLog.seq < select(func.max(ChangeLog.seq)).scalar_subquery()
+            )
+        )
+    if result.rowcount:
+        logger.info(f"Удалено старых записей журнала изменений: {result.rowcount}")
+    return result.rowcount
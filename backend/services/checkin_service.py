@@ -0,0 +1,256 @@
+"""
+Чек-ин волонтеров на площадке по QR-коду.
+
+QR содержит подписанный токен заявки: "<registration_id>.<event_id>.<подпись>",
+подпись - HMAC-SHA256 на SECRET_KEY. Проверка токена не требует БД.
+
+Список подтвержденных заявок мероприятия (roster) держится в памяти:
+планировщик загружает его заранее, за CHECKIN_OPENS_MINUTES до начала,
+а если нет - он загружается при первом скане. Скан проверяется по
+множествам в памяти, отметки о явке копятся и раз в CHECKIN_FLUSH_SECONDS
+записываются одним UPDATE на мероприятие. Список перечитывается раз в
+ROSTER_TTL_SECONDS и при скане заявки, которой в нем нет (поздно
+подтвержденные заявки).
+
+При нескольких воркерах у каждого свой список. Повторный скан в другом
+воркере просто еще раз ставит attended = true.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from backend.config import DATABASE_URL, SECRET_KEY, CHECKIN_OPENS_MINUTES, CHECKIN_FLUSH_SECONDS
+from backend.core.logging import get_logger
+from backend.database import get_db_context
+from backend.models.event import Event, EventStatus
+from backend.models.registration import Registration, RegistrationStatus
+from backend.services.change_log_service import record_registration_changes
+
+logger = get_logger(__name__)
+
+# Через сколько секунд список участников перечитывается из БД
+ROSTER_TTL_SECONDS = 60
+
+# Результаты скана
+CHECKED_IN = "checked_in"
+ALREADY_CHECKED_IN = "already_checked_in"
+NOT_REGISTERED = "not_registered"
+INVALID_TOKEN = "invalid_token"
+WRONG_EVENT = "wrong_event"
+
+
+def _sign(registration_id: int, event_id: int) -> str:
+    digest = hmac.new(SECRET_KEY.encode(), f"checkin:{registration_id}:{event_id}".encode(), hashlib.sha256).digest()
+    # 128 бит подписи достаточно, а QR получается мельче
+    return base64.urlsafe_b64encode(digest[:16]).decode().rstrip("=")
+
+
+def make_checkin_token(registration_id: int, event_id: int) -> str:
+    """Токен для QR-кода заявки"""
+    return f"{registration_id}.{event_id}.{_sign(registration_id, event_id)}"
+
+
+def parse_checkin_token(token: str) -> Tuple[int, int]:
+    """(registration_id, event_id) из токена (ValueError, если токен поддельный или испорчен)"""
+    try:
+        registration_id, event_id, signature = token.strip().split(".")
+        registration_id, event_id = int(registration_id), int(event_id)
+    except (AttributeError, ValueError):
+        raise ValueError("Invalid check-in token")
+    if not hmac.compare_digest(signature, _sign(registration_id, event_id)):
+        raise ValueError("Invalid check-in token")
+    return registration_id, event_id
+
+
+@dataclass
+class EventRoster:
+    """Подтвержденные заявки мероприятия и уже отмеченные явки"""
+    event_id: int
+    creator_id: int
+    status: EventStatus
+    start_date: datetime
+    end_date: Optional[datetime]
+    confirmed: Set[int] = field(default_factory=set)
+    attended: Set[int] = field(default_factory=set)
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def is_open(self, now: datetime) -> bool:
+        """Идет ли чек-ин: опубликованное мероприятие, от CHECKIN_OPENS_MINUTES до начала и до конца"""
+        opens_at = self.start_date - timedelta(minutes=CHECKIN_OPENS_MINUTES)
+        closes_at = self.end_date or self.start_date + timedelta(days=1)
+        return self.status == EventStatus.PUBLISHED and opens_at <= now <= closes_at
+
+
+def _load_rosters(db: Session, event_ids: Iterable[int]) -> Dict[int, EventRoster]:
+    """Списки участников нескольких мероприятий - двумя запросами"""
+    event_ids = list(event_ids)
+    rosters = {
+        row.id: EventRoster(row.id, row.creator_id, row.status, row.start_date, row.end_date)
+        for row in db.execute(
+            select(Event.id, Event.creator_id, Event.status, Event.start_date, Event.end_date)
+            .where(Event.id.in_(event_ids))
+        )
+    }
+    if rosters:
+        registrations = db.execute(
+            select(Registration.id, Registration.event_id, Registration.attended).where(
+                Registration.event_id.in_(rosters),
+                Registration.status == RegistrationStatus.CONFIRMED
+            )
+        )
+        for row in registrations:
+            roster = rosters[row.event_id]
+            roster.confirmed.add(row.id)
+            if row.attended:
+                roster.attended.add(row.id)
+    return rosters
+
+
+class CheckinDesk:
+    """Списки участников в памяти и фоновая запись явок пачками"""
+
+    def __init__(self, flush_interval_seconds: float = 1):
+        self.flush_interval_seconds = flush_interval_seconds
+        self.rosters: Dict[int, EventRoster] = {}
+        # Отмеченные, но еще не записанные явки: event_id -> id заявок
+        self.pending: Dict[int, Set[int]] = defaultdict(set)
+        self.lock = threading.Lock()
+        self.task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        # Отмеченное за последнюю секунду не должно потеряться
+        await self._flush_async()
+
+    def _store(self, rosters: Dict[int, EventRoster]):
+        with self.lock:
+            for event_id, roster in rosters.items():
+                roster.attended |= self.pending.get(event_id, set())
+                self.rosters[event_id] = roster
+
+    def get_roster(self, db: Session, event_id: int, refresh: bool = False) -> Optional[EventRoster]:
+        """Список участников мероприятия (None - мероприятия нет)"""
+        roster = self.rosters.get(event_id)
+        if roster is None or refresh or time.monotonic() - roster.loaded_at > ROSTER_TTL_SECONDS:
+            loaded = _load_rosters(db, [event_id])
+            self._store(loaded)
+            roster = loaded.get(event_id)
+        return roster
+
+    def preload(self, now: Optional[datetime] = None) -> int:
+        """Загрузить списки мероприятий, у которых скоро начало или которые идут; забыть прошедшие"""
+        now = now or datetime.utcnow()
+        with get_db_context() as db:
+            event_ids = db.execute(
+                select(Event.id).where(
+                    Event.status == EventStatus.PUBLISHED,
+                    Event.start_date <= now + timedelta(minutes=CHECKIN_OPENS_MINUTES),
+                    Event.end_date >= now
+                )
+            ).scalars().all()
+            loaded = _load_rosters(db, event_ids) if event_ids else {}
+        self._store(loaded)
+        with self.lock:
+            for event_id, roster in list(self.rosters.items()):
+                if not roster.is_open(now) and event_id not in self.pending:
+                    del self.rosters[event_id]
+        return len(loaded)
+
+    def check_in(self, db: Session, roster: EventRoster, tokens: List[str]) -> List[Tuple[Optional[int], str]]:
+        """Отметить явку по токенам. Для каждого токена - (registration_id, результат)"""
+        parsed = []
+        for token in tokens:
+            try:
+                parsed.append(parse_checkin_token(token))
+            except ValueError:
+                parsed.append(None)
+
+        # Заявки, которых нет в списке, - возможно, подтверждены после загрузки: перечитываем один раз
+        if any(item and item[1] == roster.event_id and item[0] not in roster.confirmed for item in parsed):
+            roster = self.get_roster(db, roster.event_id, refresh=True) or roster
+
+        results = []
+        with self.lock:
+            for item in parsed:
+                if item is None:
+                    results.append((None, INVALID_TOKEN))
+                    continue
+                registration_id, event_id = item
+                if event_id != roster.event_id:
+                    results.append((registration_id, WRONG_EVENT))
+                elif registration_id not in roster.confirmed:
+                    results.append((registration_id, NOT_REGISTERED))
+                elif registration_id in roster.attended:
+                    results.append((registration_id, ALREADY_CHECKED_IN))
+                else:
+                    roster.attended.add(registration_id)
+                    self.pending[roster.event_id].add(registration_id)
+                    results.append((registration_id, CHECKED_IN))
+        return results
+
+    def flush(self) -> int:
+        """Записать накопленные явки: один UPDATE на мероприятие, одна транзакция. Возвращает число заявок"""
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(set)
+        if not pending:
+            return 0
+        now = datetime.utcnow()
+        try:
+            with get_db_context() as db:
+                for event_id, registration_ids in pending.items():
+                    rows = db.execute(
+                        update(Registration)
+                        .where(
+                            Registration.id.in_(registration_ids),
+                            Registration.event_id == event_id,
+                            Registration.status == RegistrationStatus.CONFIRMED
+                        )
+                        .values(attended=True, updated_at=now)
+                        .returning(Registration.id, Registration.event_id, Registration.user_id)
+                        .execution_options(synchronize_session=False)
+                    ).all()
+                    record_registration_changes(db, rows)
+        except Exception as e:
+            # Вернем отметки в очередь - запишутся следующей попыткой
+            logger.error(f"Ошибка записи явок: {e}")
+            with self.lock:
+                for event_id, registration_ids in pending.items():
+                    self.pending[event_id] |= registration_ids
+            return 0
+        return sum(len(registration_ids) for registration_ids in pending.values())
+
+    async def _flush_async(self):
+        # In-memory SQLite - одно соединение на всех (StaticPool), из другого потока в него не пишем
+        if DATABASE_URL.endswith(":memory:"):
+            self.flush()
+        else:
+            await asyncio.to_thread(self.flush)
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.sleep(self.flush_interval_seconds)
+                await self._flush_async()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in check-in flush task: {e}")
+
+
+checkin_desk = CheckinDesk(flush_interval_seconds=CHECKIN_FLUSH_SECONDS)
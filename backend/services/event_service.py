@@ -1,27 +1,58 @@
 import requests
-from backend.config import settings
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+from backend.config import settings, GEO_DEFAULT_TRAVEL_DISTANCE_KM, GEO_MAX_RADIUS_KM
 from backend.models.user import User, UserRole
-from backend.models.event import Event
+from backend.models.volunteer_profile import VolunteerProfile
+from backend.models.event import Event, EventStatus, EventCategory, EventRequiredSkill
 from backend.models.registration import Registration, RegistrationStatus
+from backend.utils.cache import TTLCache
+from backend.utils.geo import within_radius
+from backend.utils.helpers import normalize_skills
+from sqlalchemy import func, case, and_, or_, select
 from sqlalchemy.orm import Session
 
 # URL бота для отправки уведомлений (замените на свой)
 BOT_NOTIFY_URL = getattr(settings, 'BOT_NOTIFY_URL', 'http://localhost:8081/bot/notify')
 
 
+def _matching_volunteer_ids(db: Session, event: Event) -> List[int]:
+    """
+    Telegram ID волонтеров для уведомления о новом мероприятии.
+
+    Если у мероприятия есть координаты - волонтеры с координатами в пределах
+    их max_travel_distance (поиск по geohash-индексу), а волонтеры без
+    координат - по совпадению города. Иначе - только по городу.
+    """
+    conditions = []
+    if event.location:
+        conditions.append(and_(User.latitude.is_(None), func.lower(User.location) == event.location.lower()))
+    if event.latitude is not None and event.longitude is not None:
+        travel_distance = func.coalesce(VolunteerProfile.max_travel_distance, GEO_DEFAULT_TRAVEL_DISTANCE_KM)
+        travel_distance = case((travel_distance > GEO_MAX_RADIUS_KM, GEO_MAX_RADIUS_KM), else_=travel_distance)
+        conditions.append(within_radius(
+            User, event.latitude, event.longitude, GEO_MAX_RADIUS_KM, max_distance_km=travel_distance
+        ))
+    if not conditions:
+        return []
+
+    rows = db.query(User.telegram_user_id).outerjoin(
+        VolunteerProfile, VolunteerProfile.user_id == User.id
+    ).filter(
+        User.role == UserRole.VOLUNTEER,
+        User.telegram_user_id.isnot(None),
+        or_(*conditions)
+    ).all()
+    return [row.telegram_user_id for row in rows]
+
+
 def notify_volunteers_on_new_event(db: Session, event: Event):
-    # Получаем всех волонтёров по городу или радиусу
-    volunteers = db.query(User).filter(User.role == UserRole.VOLUNTEER).all()
-    matched = []
-    for v in volunteers:
-        if v.location and event.location and v.location.lower() == event.location.lower():
-            matched.append(v)
-        # Здесь можно добавить проверку по радиусу, если есть координаты
-    if not matched:
+    volunteer_ids = _matching_volunteer_ids(db, event)
+    if not volunteer_ids:
         return
     payload = {
         "type": "volunteers_new_event",
-        "volunteer_ids": [v.telegram_user_id for v in matched if v.telegram_user_id],
+        "volunteer_ids": volunteer_ids,
         "event": {
             "id": event.id,
             "title": event.title,
@@ -40,9 +71,7 @@ def notify_organizer_on_full(db: Session, event: Event):
     # Проверяем, укомплектован ли штат
     if event.max_volunteers == 0:
         return
-    # Используем CONFIRMED вместо APPROVED
-    confirmed = [r for r in getattr(event, 'registrations', []) if r.status == RegistrationStatus.CONFIRMED]
-    if len(confirmed) < event.max_volunteers:
+    if event.current_volunteers_count < event.max_volunteers:
         return
     organizer = event.creator
     if not organizer or not organizer.telegram_user_id:
@@ -60,4 +89,197 @@ def notify_organizer_on_full(db: Session, event: Event):
     try:
         requests.post(BOT_NOTIFY_URL, json=payload, timeout=5)
     except Exception as e:
-        print(f"[Notify] Ошибка отправки уведомления организатору: {e}")
\ No newline at end of file
+        print(f"[Notify] Ошибка отправки уведомления организатору: {e}")
+
+
+def notify_volunteer_promoted(registration: Registration):
+    """Уведомить волонтера, что его заявка из листа ожидания подтверждена"""
+    volunteer, event = registration.user, registration.event
+    if not volunteer or not volunteer.telegram_user_id:
+        return
+    payload = {
+        "type": "volunteer_waitlist_promoted",
+        "volunteer_id": volunteer.telegram_user_id,
+        "event": {
+            "id": event.id,
+            "title": event.title,
+            "location": event.location,
+            "start_date": str(event.start_date)
+        }
+    }
+    try:
+        requests.post(BOT_NOTIFY_URL, json=payload, timeout=5)
+    except Exception as e:
+        print(f"[Notify] Ошибка отправки уведомления волонтёру: {e}")
+
+
+def notify_registrations_status_changed(status: RegistrationStatus, volunteers_by_event: Dict):
+    """
+    Одно уведомление о смене статуса сразу многих заявок.
+    volunteers_by_event: {мероприятие (объект или строка с id, title, start_date): [telegram id волонтеров]}
+    """
+    events = [
+        {"id": event.id, "title": event.title, "start_date": str(event.start_date), "volunteer_ids": volunteer_ids}
+        for event, volunteer_ids in volunteers_by_event.items() if volunteer_ids
+    ]
+    if not events:
+        return
+    payload = {
+        "type": "volunteers_registration_status",
+        "status": status.value,
+        "events": events
+    }
+    try:
+        requests.post(BOT_NOTIFY_URL, json=payload, timeout=5)
+    except Exception as e:
+        print(f"[Notify] Ошибка отправки уведомления волонтёрам: {e}")
+
+
+# === АГРЕГАТЫ ПО МЕРОПРИЯТИЯМ ===
+# Кэш агрегатов (календарь и т.п.). Сбрасывается при изменении мероприятий,
+# число свободных мест может отставать от заявок не больше чем на TTL.
+events_cache = TTLCache(ttl_seconds=60, max_size=512)
+
+
+def invalidate_events_cache():
+    events_cache.invalidate()
+
+
+def _calendar_rows(db: Session, date_from: date, date_to: date, category: Optional[EventCategory]):
+    """Один GROUP BY по дню начала: число опубликованных мероприятий и свободных мест"""
+    day = func.date(Event.start_date)
+    limited = Event.max_volunteers > 0
+    open_slots = case(
+        (limited & (Event.max_volunteers > Event.current_volunteers_count),
+         Event.max_volunteers - Event.current_volunteers_count),
+        else_=0
+    )
+
+    query = db.query(
+        day.label("day"),
+        func.count(Event.id).label("events_count"),
+        func.coalesce(func.sum(open_slots), 0).label("open_slots"),
+        func.coalesce(func.sum(case((limited, 0), else_=1)), 0).label("unlimited_events"),
+    ).filter(
+        Event.status == EventStatus.PUBLISHED,
+        Event.start_date >= datetime.combine(date_from, time.min),
+        Event.start_date < datetime.combine(date_to + timedelta(days=1), time.min),
+    )
+    if category:
+        query = query.filter(Event.category == category)
+
+    return query.group_by(day).order_by(day).all()
+
+
+def get_calendar_counts(
+        db: Session,
+        date_from: date,
+        date_to: date,
+        category: Optional[EventCategory] = None,
+        granularity: str = "day"
+) -> List[Dict]:
+    """Счетчики для календаря по дням или неделям (неделя начинается с понедельника)"""
+    key = ("calendar", date_from, date_to, category, granularity)
+
+    def build():
+        buckets: Dict[date, Dict] = {}
+        for row in _calendar_rows(db, date_from, date_to, category):
+            # SQLite возвращает date() строкой, Postgres - датой
+            day = row.day if isinstance(row.day, date) else date.fromisoformat(str(row.day))
+            start = day - timedelta(days=day.weekday()) if granularity == "week" else day
+            bucket = buckets.setdefault(start, {
+                "period_start": start, "events_count": 0, "open_slots": 0, "unlimited_events": 0
+            })
+            bucket["events_count"] += row.events_count
+            bucket["open_slots"] += int(row.open_slots)
+            bucket["unlimited_events"] += int(row.unlimited_events)
+        return [buckets[start] for start in sorted(buckets)]
+
+    return events_cache.get_or_set(key, build)
+
+
+def eligibility_filters(profile: Optional[VolunteerProfile], now: Optional[datetime] = None) -> list:
+    """
+    Условия списка eligible_only - то же, что Event.is_eligible, но в SQL:
+    возраст в пределах min_age/max_age и все обязательные навыки есть у
+    волонтера (NOT EXISTS по event_required_skills, навыки нормализованы).
+    Плюс регистрация еще открыта. Заполненные мероприятия остаются - в них
+    можно встать в лист ожидания.
+    """
+    now = now or datetime.utcnow()
+    age = profile.age if profile else None
+    skills = normalize_skills(profile.skills if profile else None)
+
+    missing_skill = select(EventRequiredSkill.event_id).where(EventRequiredSkill.event_id == Event.id)
+    if skills:
+        missing_skill = missing_skill.where(EventRequiredSkill.skill.notin_(sorted(skills)))
+    filters = [
+        Event.start_date > now,
+        func.coalesce(Event.registration_deadline, Event.start_date) > now,
+        ~missing_skill.exists(),
+    ]
+
+    # Ограничение 0 (как и NULL) - без ограничения; без даты рождения подходят только такие
+    min_age, max_age = func.coalesce(Event.min_age, 0), func.coalesce(Event.max_age, 0)
+    if age is None:
+        filters += [min_age == 0, max_age == 0]
+    else:
+        filters += [min_age <= age, or_(max_age == 0, max_age >= age)]
+    return filters
+
+
+def _facet_rows(db: Session, filters: list) -> List[tuple]:
+    """Один GROUP BY по всем измерениям фасетов"""
+    has_free_slots = case(
+        (or_(Event.max_volunteers == 0, Event.max_volunteers > Event.current_volunteers_count), True),
+        else_=False
+    )
+    rows = db.query(
+        Event.category, Event.status, Event.meal_provided, Event.transport_provided,
+        has_free_slots.label("has_free_slots"), func.count(Event.id).label("count")
+    ).filter(*filters).group_by(
+        Event.category, Event.status, Event.meal_provided, Event.transport_provided, has_free_slots
+    ).all()
+    return [
+        (row.category.value, row.status.value, bool(row.meal_provided), bool(row.transport_provided),
+         bool(row.has_free_slots), row.count)
+        for row in rows
+    ]
+
+
+def get_event_facets(
+        db: Session,
+        filters: list,
+        cache_key: tuple,
+        status: EventStatus,
+        category: Optional[EventCategory] = None
+) -> Dict:
+    """
+    Счетчики фасетов для списка мероприятий.
+
+    Сгруппированные строки считаются по нефасетным фильтрам (cache_key их
+    описывает) и кэшируются; выбранные статус и категория применяются при
+    свертке. Счетчик каждого фасета не учитывает собственный фильтр, чтобы
+    показывать, сколько мероприятий будет при выборе другого значения.
+    """
+    rows = events_cache.get_or_set(("facets",) + cache_key, lambda: _facet_rows(db, filters))
+
+    facets = {
+        "category": {item.value: 0 for item in EventCategory},
+        "status": {item.value: 0 for item in EventStatus},
+        "meal_provided": 0,
+        "transport_provided": 0,
+        "has_free_slots": 0,
+    }
+    for row_category, row_status, meal_provided, transport_provided, has_free_slots, count in rows:
+        status_match = row_status == status.value
+        category_match = category is None or row_category == category.value
+        if status_match:
+            facets["category"][row_category] += count
+        if category_match:
+            facets["status"][row_status] += count
+        if status_match and category_match:
+            facets["meal_provided"] += count if meal_provided else 0
+            facets["transport_provided"] += count if transport_provided else 0
+            facets["has_free_slots"] += count if has_free_slots else 0
+    return facets
@@ -0,0 +1,353 @@
+"""
+Экспорт данных в файлы.
+
+Функции экспорта используются и в запросе (небольшие выгрузки),
+и в фоновых задачах (см. backend/services/job_service.py).
+Набор данных описывается запросом и списком типизированных колонок,
+формат (CSV, NDJSON, Parquet) - отдельным писателем. Строки читаются
+из курсора пачками и сразу отдаются писателю, весь результат в память
+не загружается.
+
+Параметры экспорта - только JSON-типы, чтобы их можно было сохранить
+в jobs.params и передать в другой процесс.
+"""
+
+import csv
+import json
+import os
+from datetime import datetime
+from enum import Enum
+from io import StringIO
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from backend.models.user import User, UserRole
+from backend.models.event import Event, EventStatus, EventCategory
+from backend.models.registration import Registration
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet - опциональная зависимость
+    pa = None
+    pq = None
+
+# Размер пачки при чтении из курсора (и размер row group в Parquet)
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
+
+
+# Формат -> (media type, расширение файла)
+FORMATS = {
+    ExportFormat.CSV: ("text/csv", ".csv"),
+    ExportFormat.NDJSON: ("application/x-ndjson", ".ndjson"),
+    ExportFormat.PARQUET: ("application/vnd.apache.parquet", ".parquet"),
+}
+
+
+def parquet_available() -> bool:
+    return pa is not None
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _full_name(row) -> str:
+    return f"{row.first_name} {row.last_name}" if row.last_name else row.first_name
+
+
+# === НАБОРЫ ДАННЫХ ===
+# Колонка: (имя, тип, функция получения значения из строки запроса).
+# Типы: int, string, category (словарная кодировка в Parquet), timestamp, bool.
+
+def events_export_query(db: Session, params: Dict):
+    """Запрос для экспорта мероприятий по фильтрам"""
+    # Число волонтеров - хранимый счетчик мероприятия, без подсчета заявок
+    query = db.query(
+        Event.id, Event.title, Event.status, Event.category,
+        Event.start_date, Event.end_date, Event.location,
+        Event.max_volunteers, Event.current_volunteers_count
+    )
+
+    if params.get("status"):
+        query = query.filter(Event.status == EventStatus(params["status"]))
+    if params.get("category"):
+        query = query.filter(Event.category == EventCategory(params["category"]))
+    if params.get("start_date"):
+        query = query.filter(Event.start_date >= _parse_datetime(params["start_date"]))
+    if params.get("end_date"):
+        query = query.filter(Event.end_date <= _parse_datetime(params["end_date"]))
+    if params.get("search"):
+        search_term = f"%{params['search']}%"
+        query = query.filter(
+            or_(
+                Event.title.ilike(search_term),
+                Event.description.ilike(search_term),
+                Event.location.ilike(search_term)
+            )
+        )
+    return query.order_by(Event.id)
+
+
+EVENTS_COLUMNS = [
+    ("id", "int", lambda r: r.id),
+    ("title", "string", lambda r: r.title),
+    ("status", "category", lambda r: r.status.value),
+    ("category", "category", lambda r: r.category.value),
+    ("start_date", "timestamp", lambda r: r.start_date),
+    ("end_date", "timestamp", lambda r: r.end_date),
+    ("location", "string", lambda r: r.location),
+    ("max_volunteers", "int", lambda r: r.max_volunteers),
+    ("current_volunteers_count", "int", lambda r: r.current_volunteers_count),
+]
+
+
+def event_registrations_export_query(db: Session, params: Dict):
+    """Запрос для экспорта заявок на мероприятие (с данными волонтера, без N+1)"""
+    return (
+        db.query(User.id, User.first_name, User.last_name, User.email, User.phone, Registration.status)
+        .join(User, User.id == Registration.user_id)
+        .filter(Registration.event_id == params["event_id"])
+        .order_by(Registration.id)
+    )
+
+
+EVENT_REGISTRATIONS_COLUMNS = [
+    ("user_id", "int", lambda r: r.id),
+    ("full_name", "string", _full_name),
+    ("email", "string", lambda r: r.email),
+    ("phone", "string", lambda r: r.phone),
+    ("status", "category", lambda r: r.status.value),
+]
+
+
+def users_export_query(db: Session, params: Dict):
+    """Запрос для экспорта пользователей (админка)"""
+    query = db.query(
+        User.id, User.telegram_user_id, User.telegram_username, User.first_name, User.last_name,
+        User.email, User.phone, User.role, User.location, User.organization_name,
+        User.is_active, User.is_verified, User.created_at, User.last_activity
+    )
+    if params.get("role"):
+        query = query.filter(User.role == UserRole(params["role"]))
+    if params.get("search"):
+        search = f"%{params['search']}%"
+        query = query.filter(
+            (User.first_name.ilike(search)) |
+            (User.last_name.ilike(search)) |
+            (User.email.ilike(search)) |
+            (User.organization_name.ilike(search))
+        )
+    return query.order_by(User.id)
+
+
+USERS_COLUMNS = [
+    ("id", "int", lambda r: r.id),
+    ("telegram_user_id", "int", lambda r: r.telegram_user_id),
+    ("telegram_username", "string", lambda r: r.telegram_username),
+    ("full_name", "string", _full_name),
+    ("email", "string", lambda r: r.email),
+    ("phone", "string", lambda r: r.phone),
+    ("role", "category", lambda r: r.role.value if r.role else None),
+    ("location", "string", lambda r: r.location),
+    ("organization_name", "string", lambda r: r.organization_name),
+    ("is_active", "bool", lambda r: r.is_active),
+    ("is_verified", "bool", lambda r: r.is_verified),
+    ("created_at", "timestamp", lambda r: r.created_at),
+    ("last_activity", "timestamp", lambda r: r.last_activity),
+]
+
+
+# Реестр экспортов: тип задачи -> (запрос, колонки, базовое имя файла)
+EXPORTS: Dict[str, tuple] = {
+    "events_export": (events_export_query, EVENTS_COLUMNS, "events"),
+    "event_registrations_export": (event_registrations_export_query, EVENT_REGISTRATIONS_COLUMNS, "registrations"),
+    "users_export": (users_export_query, USERS_COLUMNS, "users"),
+}
+
+
+def get_export(job_type: str) -> tuple:
+    if job_type not in EXPORTS:
+        raise ValueError(f"Unknown export type: {job_type}")
+    return EXPORTS[job_type]
+
+
+def get_format(params: Dict) -> ExportFormat:
+    export_format = ExportFormat(params.get("format") or ExportFormat.CSV.value)
+    if export_format == ExportFormat.PARQUET and not parquet_available():
+        raise ValueError("Parquet export requires pyarrow to be installed")
+    return export_format
+
+
+def count_export_rows(query) -> int:
+    """Количество строк экспорта (для выбора: в запросе или фоновой задачей)"""
+    return query.order_by(None).count()
+
+
+# === ПИСАТЕЛИ ФОРМАТОВ ===
+# Принимают пачки строк и возвращают байтовые куски для файла или HTTP-ответа.
+
+def _iter_batches(query, stats: Optional[Dict] = None) -> Iterator[list]:
+    rows = iter(query.yield_per(EXPORT_BATCH_SIZE))
+    while True:
+        batch = list(islice(rows, EXPORT_BATCH_SIZE))
+        if not batch:
+            return
+        if stats is not None:
+            stats["rows"] = stats.get("rows", 0) + len(batch)
+        yield batch
+
+
+def _iter_csv(batches, columns) -> Iterator[bytes]:
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _, _ in columns])
+    for batch in batches:
+        for row in batch:
+            writer.writerow([getter(row) for _, _, getter in columns])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _iter_ndjson(batches, columns) -> Iterator[bytes]:
+    for batch in batches:
+        lines = []
+        for row in batch:
+            record = {}
+            for name, kind, getter in columns:
+                value = getter(row)
+                if kind == "timestamp" and value is not None:
+                    value = value.isoformat()
+                record[name] = value
+            lines.append(json.dumps(record, ensure_ascii=False))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink:
+    """Файлоподобный приемник: копит записанные куски, чтобы отдавать их по мере готовности"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _arrow_schema(columns):
+    types = {
+        "int": pa.int64(),
+        "string": pa.string(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "timestamp": pa.timestamp("us"),
+        "bool": pa.bool_(),
+    }
+    return pa.schema([(name, types[kind]) for name, kind, _ in columns])
+
+
+def _iter_parquet(batches, columns) -> Iterator[bytes]:
+    schema = _arrow_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for batch in batches:
+            arrays = []
+            for (_, kind, getter), field in zip(columns, schema):
+                values = [getter(row) for row in batch]
+                if kind == "category":
+                    arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+                else:
+                    arrays.append(pa.array(values, type=field.type))
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+WRITERS = {
+    ExportFormat.CSV: _iter_csv,
+    ExportFormat.NDJSON: _iter_ndjson,
+    ExportFormat.PARQUET: _iter_parquet,
+}
+
+
+def iter_export(db: Session, job_type: str, params: Dict, stats: Optional[Dict] = None) -> Iterator[bytes]:
+    """Экспорт как поток байтовых кусков в выбранном формате"""
+    query_func, columns, _ = get_export(job_type)
+    writer = WRITERS[get_format(params)]
+    for chunk in writer(_iter_batches(query_func(db, params), stats), columns):
+        if chunk:
+            yield chunk
+
+
+def stream_export(job_type: str, params: Dict) -> Iterator[bytes]:
+    """Поток для StreamingResponse: собственная сессия живет, пока отдается ответ"""
+    from backend.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        yield from iter_export(db, job_type, params)
+    finally:
+        db.close()
+
+
+def export_file_info(job_type: str, params: Dict) -> tuple:
+    """(media type, имя файла) для результата экспорта"""
+    _, _, basename = get_export(job_type)
+    media_type, extension = FORMATS[get_format(params)]
+    return media_type, f"{basename}{extension}"
+
+
+def run_export_to_file(job_type: str, params: Dict, path: str) -> int:
+    """
+    Выполнить экспорт в файл.
+
+    Точка входа для пула процессов: открывает собственную сессию БД,
+    пишет во временный файл и атомарно переименовывает его в path.
+    Возвращает число выгруженных строк.
+    """
+    from backend.database import SessionLocal
+
+    stats = {"rows": 0}
+    tmp_path = f"{path}.part"
+    db = SessionLocal()
+    try:
+        with open(tmp_path, "wb") as fileobj:
+            for chunk in iter_export(db, job_type, params, stats):
+                fileobj.write(chunk)
+        os.replace(tmp_path, path)
+        return stats["rows"]
+    finally:
+        db.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
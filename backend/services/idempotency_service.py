@@ -0,0 +1,127 @@
+"""
+Хранилище ответов для запросов с заголовком Idempotency-Key.
+
+Перед выполнением запроса ключ занимается вставкой строки без ответа
+(первичный ключ не дает занять его дважды, в том числе из разных
+воркеров). После ответа строка дополняется статусом и телом, и повтор
+с тем же ключом получает сохраненный ответ без выполнения запроса.
+Ответ 5xx не сохраняется - ключ освобождается, и клиент может повторить.
+
+Завершенные ответы дополнительно держатся в памяти процесса:
+повторы обычно приходят в течение секунд, и в БД за ними не ходим.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from backend.config import IDEMPOTENCY_TTL_HOURS
+from backend.core.logging import get_logger
+from backend.database import get_db_context
+from backend.models.idempotency import IdempotencyKey
+from backend.utils.cache import TTLCache
+
+logger = get_logger(__name__)
+
+# Через сколько секунд незавершенный ключ считается брошенным (воркер упал посреди запроса)
+STALE_LOCK_SECONDS = 60
+
+_completed_cache = TTLCache(ttl_seconds=300, max_size=2048)
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    request_hash: str
+    status_code: Optional[int]
+    content_type: Optional[str]
+    body: Optional[bytes]
+
+    @property
+    def is_completed(self) -> bool:
+        return self.status_code is not None
+
+
+def acquire_key(key: str, request_hash: str) -> Optional[StoredResponse]:
+    """
+    Занять ключ перед выполнением запроса.
+    None - ключ наш, запрос надо выполнить; иначе - уже существующая запись.
+    """
+    cached = _completed_cache.get(key)
+    if cached is not None:
+        return cached
+
+    for _ in range(2):
+        now = datetime.utcnow()
+        try:
+            with get_db_context() as db:
+                db.execute(insert(IdempotencyKey).values(
+                    key=key,
+                    request_hash=request_hash,
+                    created_at=now,
+                    expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+                ))
+            return None
+        except IntegrityError:
+            pass
+
+        with get_db_context() as db:
+            row = db.execute(select(IdempotencyKey).where(IdempotencyKey.key == key)).scalar_one_or_none()
+            if row is None:
+                # Строку успели удалить (ответ 5xx) - пробуем занять ключ еще раз
+                continue
+
+            expired = row.expires_at <= now
+            stale = not row.is_completed and row.created_at <= now - timedelta(seconds=STALE_LOCK_SECONDS)
+            if expired or stale:
+                # Перехватываем ключ, только если его не перехватил кто-то другой
+                result = db.execute(
+                    update(IdempotencyKey)
+                    .where(IdempotencyKey.key == key, IdempotencyKey.created_at == row.created_at)
+                    .values(request_hash=request_hash, status_code=None, content_type=None, body=None,
+                            created_at=now, expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS))
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount == 1:
+                    return None
+
+            stored = StoredResponse(row.request_hash, row.status_code, row.content_type, row.body)
+        break
+    else:
+        # Ключ то занимают, то освобождают - считаем, что запрос еще выполняется
+        return StoredResponse(request_hash, None, None, None)
+
+    if stored.is_completed:
+        _completed_cache.set(key, stored)
+    return stored
+
+
+def save_response(key: str, status_code: int, content_type: Optional[str], body: bytes):
+    """Сохранить ответ для занятого ключа"""
+    with get_db_context() as db:
+        row = db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(status_code=status_code, content_type=content_type, body=body)
+            .returning(IdempotencyKey.request_hash)
+        ).one_or_none()
+    if row is not None:
+        _completed_cache.set(key, StoredResponse(row.request_hash, status_code, content_type, body))
+
+
+def release_key(key: str):
+    """Освободить ключ без сохранения ответа"""
+    with get_db_context() as db:
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)))
+
+
+def purge_expired_keys(now: Optional[datetime] = None) -> int:
+    """Удалить просроченные ключи. Возвращает число удаленных"""
+    now = now or datetime.utcnow()
+    with get_db_context() as db:
+        result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+    if result.rowcount:
+        logger.info(f"Удалено просроченных ключей идемпотентности: {result.rowcount}")
+    return result.rowcount
@@ -0,0 +1,198 @@
+"""
+Фоновые задачи: координатор на asyncio + пул процессов для CPU-работы.
+
+Задача хранится в таблице jobs. Координатор (JobRunner) создает запись,
+запускает работу в пуле процессов и обновляет статус. Результат пишется
+в JOBS_RESULT_DIR и отдается через /api/jobs/{id}/result.
+
+Задачи, оставшиеся в pending/running после перезапуска, при старте
+помечаются failed (их процессы уже не работают), частичные файлы удаляются.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from backend.config import DATABASE_URL, JOBS_MAX_WORKERS, JOBS_RESULT_DIR, JOBS_RESULT_TTL_HOURS
+from backend.core.logging import get_logger
+from backend.database import get_db_context
+from backend.models.job import Job, JobStatus
+from backend.models.user import User
+from backend.services.export_service import get_export, get_format, export_file_info, run_export_to_file
+
+logger = get_logger(__name__)
+
+
+class JobRunner:
+    """Координатор фоновых задач"""
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.cleanup_task = None
+
+    async def start(self):
+        """Запуск пула процессов и фоновой очистки старых результатов"""
+        # In-memory SQLite не видна из другого процесса - работаем в потоках
+        if not DATABASE_URL.endswith(":memory:"):
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        await asyncio.to_thread(self._fail_interrupted_jobs)
+        self.cleanup_task = asyncio.create_task(self._cleanup_old_results())
+
+    async def stop(self):
+        """Остановка: отменяем незавершенные задачи и гасим пул"""
+        if self.cleanup_task:
+            self.cleanup_task.cancel()
+        for task in list(self.tasks.values()):
+            task.cancel()
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def submit(self, db: Session, user: User, job_type: str, params: Dict) -> Job:
+        """Создать задачу и поставить ее в очередь"""
+        get_export(job_type)  # ValueError для неизвестного типа или формата
+        get_format(params)
+
+        job = Job(user_id=user.id, job_type=job_type, params=params, status=JobStatus.PENDING)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self.tasks[job.id] = asyncio.create_task(self._run(job.id, job_type, params))
+        logger.info(f"Задача {job.id} ({job_type}) поставлена в очередь пользователем {user.id}")
+        return job
+
+    def cancel(self, db: Session, job: Job) -> Job:
+        """Отменить задачу. Уже запущенная в процессе работа доигрывается, но ее файл удаляется"""
+        if job.is_finished:
+            return job
+
+        was_pending = job.status == JobStatus.PENDING
+        job.status = JobStatus.CANCELLED
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        db.refresh(job)
+
+        # Запущенную задачу не прерываем: процесс все равно допишет файл,
+        # а _run дождется его и удалит, увидев, что задача отменена
+        task = self.tasks.get(job.id)
+        if task and was_pending:
+            task.cancel()
+        return job
+
+    async def _run(self, job_id: str, job_type: str, params: Dict):
+        media_type, filename = export_file_info(job_type, params)
+        path = _result_path(job_id, filename)
+
+        try:
+            if not await asyncio.to_thread(self._mark_running, job_id):
+                return  # отменена до запуска
+
+            loop = asyncio.get_running_loop()
+            rows = await loop.run_in_executor(self.executor, run_export_to_file, job_type, params, path)
+
+            completed = await asyncio.to_thread(
+                self._mark_completed, job_id, path, filename, media_type, rows
+            )
+            if not completed:
+                _remove_file(path)
+        except asyncio.CancelledError:
+            logger.info(f"Задача {job_id} отменена")
+        except Exception as e:
+            logger.error(f"Задача {job_id} завершилась с ошибкой: {e}", exc_info=True)
+            await asyncio.to_thread(self._mark_failed, job_id, str(e))
+            _remove_file(path)
+        finally:
+            self.tasks.pop(job_id, None)
+
+    def _mark_running(self, job_id: str) -> bool:
+        with get_db_context() as db:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            if not job or job.status != JobStatus.PENDING:
+                return False
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.utcnow()
+            return True
+
+    def _mark_completed(self, job_id: str, path: str, filename: str, media_type: str, rows: int) -> bool:
+        with get_db_context() as db:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            if not job or job.status != JobStatus.RUNNING:
+                return False
+            job.status = JobStatus.COMPLETED
+            job.result_path = path
+            job.result_filename = filename
+            job.media_type = media_type
+            job.rows_count = rows
+            job.finished_at = datetime.utcnow()
+            return True
+
+    def _mark_failed(self, job_id: str, error: str):
+        with get_db_context() as db:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            if job and not job.is_finished:
+                job.status = JobStatus.FAILED
+                job.error = error
+                job.finished_at = datetime.utcnow()
+
+    def _fail_interrupted_jobs(self):
+        """Задачи, прерванные перезапуском, - в failed, их частичные файлы - удалить"""
+        with get_db_context() as db:
+            interrupted = db.query(Job).filter(Job.status.in_([JobStatus.PENDING, JobStatus.RUNNING])).all()
+            for job in interrupted:
+                job.status = JobStatus.FAILED
+                job.error = "Interrupted by server restart"
+                job.finished_at = datetime.utcnow()
+                try:
+                    path = _result_path(job.id, export_file_info(job.job_type, job.params or {})[1])
+                except ValueError:
+                    continue  # неизвестный тип или формат - файла не было
+                _remove_file(path)
+                _remove_file(f"{path}.part")
+            if interrupted:
+                logger.info(f"Прерванных перезапуском задач: {len(interrupted)}")
+
+    def _delete_expired_results(self):
+        expire_before = datetime.utcnow() - timedelta(hours=JOBS_RESULT_TTL_HOURS)
+        with get_db_context() as db:
+            expired = db.query(Job).filter(Job.created_at < expire_before).all()
+            for job in expired:
+                if job.result_path and os.path.exists(job.result_path):
+                    os.remove(job.result_path)
+                db.delete(job)
+            if expired:
+                logger.info(f"Удалено {len(expired)} устаревших задач")
+
+    async def _cleanup_old_results(self):
+        """Очистка устаревших результатов каждый час"""
+        while True:
+            try:
+                await asyncio.to_thread(self._delete_expired_results)
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in jobs cleanup task: {e}")
+                await asyncio.sleep(3600)
+
+
+def _result_path(job_id: str, filename: str) -> str:
+    return str(JOBS_RESULT_DIR / f"{job_id}{os.path.splitext(filename)[1]}")
+
+
+def _remove_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+job_runner = JobRunner(max_workers=JOBS_MAX_WORKERS)
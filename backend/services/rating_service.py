@@ -0,0 +1,79 @@
+"""
+Оценки участия волонтеров.
+
+Организатор ставит заявке оценку участия (1-5) и отзыв. Агрегаты -
+число, сумма и распределение оценок - хранятся у волонтера и у
+мероприятия и меняются инкрементными UPDATE в той же транзакции, что
+и сама оценка, поэтому средний балл отдается без просмотра заявок.
+
+Оценка заявки меняется условным UPDATE по прежнему значению: из двух
+параллельных переоценок одной заявки вторая перечитывает оценку и
+применяет к агрегатам свою разницу, а не разницу от того же старого
+значения. Агрегаты меняются мимо ORM - изменения пишутся в журнал явно.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from backend.models.event import Event
+from backend.models.registration import Registration
+from backend.models.user import User
+from backend.services.change_log_service import record_event_changes, record_registration_changes
+
+# Сколько раз перечитывать оценку, если ее успела изменить параллельная транзакция
+RATING_RETRIES = 5
+
+
+def _aggregate_delta(model, old: Optional[int], new: Optional[int]) -> dict:
+    """Значения для UPDATE агрегатов при замене оценки old на new (None - оценки нет)"""
+    if old == new:
+        return {}
+    values = {}
+    count_delta = (new is not None) - (old is not None)
+    if count_delta:
+        values["rating_count"] = model.rating_count + count_delta
+    values["rating_sum"] = model.rating_sum + (new or 0) - (old or 0)
+    if old is not None:
+        values[f"rating_{old}"] = getattr(model, f"rating_{old}") - 1
+    if new is not None:
+        values[f"rating_{new}"] = getattr(model, f"rating_{new}") + 1
+    return values
+
+
+def rate_registration(db: Session, registration_id: int, rating: Optional[int],
+                      feedback: Optional[str]) -> bool:
+    """
+    Поставить оценку заявке (rating=None - снять) и обновить агрегаты волонтера и мероприятия.
+    False - оценку все время меняла параллельная транзакция. Коммит - на вызывающем.
+    """
+    for _ in range(RATING_RETRIES):
+        old = db.execute(select(Registration.rating).where(Registration.id == registration_id)).scalar()
+        row = db.execute(
+            update(Registration)
+            .where(
+                Registration.id == registration_id,
+                Registration.rating.is_(None) if old is None else Registration.rating == old
+            )
+            .values(rating=rating, feedback=feedback, updated_at=datetime.utcnow())
+            .returning(Registration.id, Registration.event_id, Registration.user_id)
+            .execution_options(synchronize_session=False)
+        ).one_or_none()
+        if row is None:
+            continue
+        record_registration_changes(db, [row])
+
+        if old != rating:
+            db.execute(
+                update(User).where(User.id == row.user_id).values(**_aggregate_delta(User, old, rating))
+                .execution_options(synchronize_session=False)
+            )
+            db.execute(
+                update(Event).where(Event.id == row.event_id).values(**_aggregate_delta(Event, old, rating))
+                .execution_options(synchronize_session=False)
+            )
+            record_event_changes(db, row.event_id)
+        return True
+    return False
@@ -0,0 +1,221 @@
+"""
+Рекомендации мероприятий для волонтера.
+
+В памяти процесса хранится инвертированный индекс по предстоящим
+опубликованным мероприятиям: навык/тег -> {id мероприятия: вес} и
+категория -> {id мероприятия}. Скор считается только по спискам тех
+навыков и интересов, что есть у волонтера, - все мероприятия не
+просматриваются.
+
+Индекс обновляется после коммита сессии, в которой изменялись
+мероприятия (слушатели after_flush/after_commit), и целиком
+перестраивается раз в REBUILD_INTERVAL_SECONDS: так подхватываются
+изменения из других воркеров и массовые UPDATE в обход ORM.
+"""
+
+import heapq
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from itertools import chain
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+from backend.models.event import Event, EventStatus, EventCategory
+from backend.models.volunteer_profile import VolunteerProfile
+from backend.utils.helpers import normalize_skill, normalize_skills
+
+# Веса совпадений
+REQUIRED_SKILL_WEIGHT = 3
+PREFERRED_SKILL_WEIGHT = 2
+TAG_WEIGHT = 1
+CATEGORY_WEIGHT = 2
+
+REBUILD_INTERVAL_SECONDS = 300
+
+_CATEGORY_VALUES = {category.value for category in EventCategory}
+
+
+class EventSnapshot(NamedTuple):
+    """Данные мероприятия, нужные индексу (снимаются до коммита)"""
+    id: int
+    status: EventStatus
+    start_date: datetime
+    category: Optional[str]
+    terms: Dict[str, int]
+
+    @property
+    def indexable(self) -> bool:
+        return self.status == EventStatus.PUBLISHED and self.start_date > datetime.utcnow()
+
+
+def _event_terms(required_skills, preferred_skills, tags) -> Dict[str, int]:
+    terms: Dict[str, int] = {}
+    for values, weight in ((tags, TAG_WEIGHT), (preferred_skills, PREFERRED_SKILL_WEIGHT),
+                           (required_skills, REQUIRED_SKILL_WEIGHT)):
+        for term in normalize_skills(values):
+            terms[term] = max(terms.get(term, 0), weight)
+    return terms
+
+
+def snapshot_event(event) -> EventSnapshot:
+    """Снимок мероприятия (модели или строки запроса с теми же полями)"""
+    category = event.category.value if event.category else None
+    return EventSnapshot(
+        id=event.id,
+        status=event.status,
+        start_date=event.start_date,
+        category=category,
+        terms=_event_terms(event.required_skills, event.preferred_skills, event.tags),
+    )
+
+
+class RecommendationIndex:
+    """Инвертированный индекс мероприятий по навыкам, тегам и категориям"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: Dict[int, EventSnapshot] = {}
+        self._terms: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._categories: Dict[str, Set[int]] = defaultdict(set)
+        self._built_at: Optional[float] = None
+
+    @property
+    def is_built(self) -> bool:
+        return self._built_at is not None
+
+    def rebuild(self, db: Session):
+        """Полная перестройка по предстоящим опубликованным мероприятиям"""
+        rows = db.query(
+            Event.id, Event.status, Event.start_date, Event.category,
+            Event.required_skills, Event.preferred_skills, Event.tags
+        ).filter(
+            Event.status == EventStatus.PUBLISHED,
+            Event.start_date > datetime.utcnow()
+        ).all()
+
+        events: Dict[int, EventSnapshot] = {}
+        terms: Dict[str, Dict[int, int]] = defaultdict(dict)
+        categories: Dict[str, Set[int]] = defaultdict(set)
+        for row in rows:
+            snapshot = snapshot_event(row)
+            events[snapshot.id] = snapshot
+            for term, weight in snapshot.terms.items():
+                terms[term][snapshot.id] = weight
+            if snapshot.category:
+                categories[snapshot.category].add(snapshot.id)
+
+        with self._lock:
+            self._events, self._terms, self._categories = events, terms, categories
+            self._built_at = time.monotonic()
+
+    def ensure_fresh(self, db: Session):
+        if self._built_at is None or time.monotonic() - self._built_at > REBUILD_INTERVAL_SECONDS:
+            self.rebuild(db)
+
+    def apply(self, changes: Dict[int, Optional[EventSnapshot]]):
+        """Применить изменения: снимок - переиндексировать, None - удалить"""
+        if not self.is_built:
+            return
+        with self._lock:
+            for event_id, snapshot in changes.items():
+                self._remove(event_id)
+                if snapshot is not None and snapshot.indexable:
+                    self._add(snapshot)
+
+    def _add(self, snapshot: EventSnapshot):
+        self._events[snapshot.id] = snapshot
+        for term, weight in snapshot.terms.items():
+            self._terms[term][snapshot.id] = weight
+        if snapshot.category:
+            self._categories[snapshot.category].add(snapshot.id)
+
+    def _remove(self, event_id: int):
+        snapshot = self._events.pop(event_id, None)
+        if snapshot is None:
+            return
+        for term in snapshot.terms:
+            postings = self._terms.get(term)
+            if postings is not None:
+                postings.pop(event_id, None)
+                if not postings:
+                    del self._terms[term]
+        if snapshot.category:
+            self._categories[snapshot.category].discard(event_id)
+
+    def top(self, terms: Set[str], categories: Set[str], exclude_ids: Set[int],
+            limit: int) -> List[Tuple[int, int, List[str]]]:
+        """Top-K мероприятий: [(id, скор, совпавшие навыки)], по убыванию скора, затем по дате"""
+        now = datetime.utcnow()
+        scores: Dict[int, int] = defaultdict(int)
+        matched: Dict[int, List[str]] = defaultdict(list)
+
+        with self._lock:
+            for term in terms:
+                for event_id, weight in self._terms.get(term, {}).items():
+                    scores[event_id] += weight
+                    matched[event_id].append(term)
+            for category in categories:
+                for event_id in self._categories.get(category, ()):
+                    scores[event_id] += CATEGORY_WEIGHT
+
+            candidates = [
+                (score, -self._events[event_id].start_date.timestamp(), event_id)
+                for event_id, score in scores.items()
+                if event_id not in exclude_ids and self._events[event_id].start_date > now
+            ]
+
+        best = heapq.nlargest(limit, candidates)
+        return [(event_id, score, sorted(matched[event_id])) for score, _, event_id in best]
+
+
+recommendation_index = RecommendationIndex()
+
+
+def profile_terms(profile: VolunteerProfile) -> Tuple[Set[str], Set[str]]:
+    """(навыки и интересы, предпочитаемые категории) волонтера"""
+    terms = normalize_skills(profile.skills) | normalize_skills(profile.interests)
+    activities = chain(profile.preferred_activities or [], profile.interests or [])
+    categories = {value for value in map(normalize_skill, activities) if value in _CATEGORY_VALUES}
+    return terms, categories
+
+
+def recommend_events(db: Session, profile: VolunteerProfile, exclude_ids: Set[int],
+                     limit: int) -> List[Tuple[int, int, List[str]]]:
+    """Рекомендации для профиля волонтера (id мероприятий со скором)"""
+    terms, categories = profile_terms(profile)
+    if not terms and not categories:
+        return []
+    recommendation_index.ensure_fresh(db)
+    return recommendation_index.top(terms, categories, exclude_ids, limit)
+
+
+# === СИНХРОНИЗАЦИЯ С БД ===
+# Снимки берутся при flush (атрибуты еще загружены) и применяются только после коммита.
+
+_CHANGES_KEY = "recommendation_changes"
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _collect_event_changes(session, flush_context):
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Event):
+            session.info.setdefault(_CHANGES_KEY, {})[obj.id] = snapshot_event(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Event):
+            session.info.setdefault(_CHANGES_KEY, {})[obj.id] = None
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _apply_event_changes(session):
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if changes:
+        recommendation_index.apply(changes)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _discard_event_changes(session):
+    session.info.pop(_CHANGES_KEY, None)
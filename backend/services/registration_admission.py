@@ -0,0 +1,242 @@
+"""
+Прием заявок на мероприятия пачками (group commit).
+
+Когда открывается популярное мероприятие, за секунду приходят сотни
+заявок, и каждая отдельной транзакцией - отдельный коммит и fsync
+SQLite. Здесь заявки собираются в очередь, пачка копится
+REGISTRATION_BATCH_WINDOW_MS (пока пишется предыдущая пачка, следующая
+набирается сама) и записывается одной транзакцией:
+
+- повторные активные заявки отсекаются одним SELECT по парам (user, event);
+- места на каждое мероприятие пачки занимаются одним UPDATE под
+  блокировкой строки мероприятия (reserve_slots), заявки в порядке
+  поступления получают CONFIRMED, пока хватает мест, остальные - WAITLISTED;
+- все заявки вставляются одним INSERT ... RETURNING.
+
+Каждый ожидающий запрос получает свой результат. Пачки пишутся по одной,
+в отдельном потоке, так что цикл событий продолжает принимать запросы.
+Если параллельная транзакция (другой воркер) успела создать такую же
+заявку, пачка откатывается и записывается по одной заявке.
+"""
+
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.config import REGISTRATION_BATCH_MAX_SIZE, REGISTRATION_BATCH_WINDOW_MS
+from backend.core.logging import get_logger
+from backend.database import get_db_context
+from backend.models.event import Event
+from backend.models.registration import Registration, RegistrationStatus, ACTIVE_STATUSES
+from backend.services.change_log_service import record_registration_changes
+from backend.services.registration_service import reserve_slots
+
+logger = get_logger(__name__)
+
+# Как БД сообщает о нарушении uq_registrations_active_user_event: Postgres называет индекс, SQLite - его колонки
+_ACTIVE_INDEX_MARKERS = (
+    "uq_registrations_active_user_event",
+    "UNIQUE constraint failed: registrations.user_id, registrations.event_id",
+)
+
+
+class DuplicateRegistrationError(Exception):
+    """У волонтера уже есть активная заявка на это мероприятие"""
+
+
+@dataclass(frozen=True)
+class AdmissionResult:
+    registration_id: int
+    status: RegistrationStatus
+    registered_at: datetime
+    confirmed_at: Optional[datetime]
+    # Эта заявка заняла последнее место - пора уведомить организатора
+    event_full: bool
+
+
+@dataclass
+class _PendingRegistration:
+    user_id: int
+    event_id: int
+    fields: Dict[str, Optional[str]]
+    submitted_at: datetime
+    future: asyncio.Future = field(repr=False)
+
+
+class RegistrationAdmission:
+    """Очередь заявок и фоновый цикл, записывающий их пачками"""
+
+    def __init__(self, window_ms: int = 5, max_batch_size: int = 200):
+        self.window_seconds = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            # Ждем выхода цикла: он сам завершит запросы пачки, которую набирал или писал
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        while self.queue is not None and not self.queue.empty():
+            _fail_stopped([self.queue.get_nowait()])
+
+    async def submit(self, user_id: int, event_id: int, fields: Dict[str, Optional[str]]) -> AdmissionResult:
+        """
+        Подать заявку и дождаться записи ее пачки.
+        DuplicateRegistrationError - у волонтера уже есть активная заявка.
+        """
+        if self.task is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait(_PendingRegistration(user_id, event_id, fields, datetime.utcnow(), future))
+        return await future
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = []
+            try:
+                batch.append(await self.queue.get())
+                deadline = loop.time() + self.window_seconds
+                while len(batch) < self.max_batch_size:
+                    if not self.queue.empty():
+                        batch.append(self.queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                results = await asyncio.to_thread(self._admit, batch)
+                for pending, result in zip(batch, results):
+                    if pending.future.done():
+                        continue
+                    if isinstance(result, Exception):
+                        pending.future.set_exception(result)
+                    else:
+                        pending.future.set_result(result)
+            except asyncio.CancelledError:
+                # Заявки пачки уже вынуты из очереди - без ответа их запросы ждали бы вечно
+                _fail_stopped(batch)
+                break
+            except Exception as e:
+                logger.error(f"Error in registration admission: {e}")
+
+    def _admit(self, batch: List[_PendingRegistration]) -> List[Union[AdmissionResult, Exception]]:
+        """Записать пачку одной транзакцией; результат - по заявке на каждый запрос"""
+        try:
+            with get_db_context() as db:
+                return _write_batch(db, batch)
+        except IntegrityError as e:
+            if len(batch) == 1:
+                return [DuplicateRegistrationError() if _is_duplicate(e) else e]
+            logger.info(f"Конфликт при записи пачки заявок ({len(batch)}), записываем по одной")
+            return [self._admit([pending])[0] for pending in batch]
+        except Exception as e:
+            logger.error(f"Ошибка записи пачки заявок: {e}")
+            return [e] * len(batch)
+
+
+def _fail_stopped(batch: List[_PendingRegistration]):
+    for pending in batch:
+        if not pending.future.done():
+            pending.future.set_exception(RuntimeError("Registration admission stopped"))
+
+
+def _is_duplicate(error: IntegrityError) -> bool:
+    """Нарушен уникальный индекс активных заявок (а не, например, внешний ключ удаленного мероприятия)"""
+    message = str(error.orig)
+    return any(marker in message for marker in _ACTIVE_INDEX_MARKERS)
+
+
+def _write_batch(db: Session, batch: List[_PendingRegistration]) -> List[Union[AdmissionResult, Exception]]:
+    results: List[Union[AdmissionResult, Exception, None]] = [None] * len(batch)
+
+    # Повторные заявки: уже активные в БД и дубли внутри самой пачки
+    pairs = {(pending.user_id, pending.event_id) for pending in batch}
+    taken = set(db.execute(
+        select(Registration.user_id, Registration.event_id).where(
+            tuple_(Registration.user_id, Registration.event_id).in_(pairs),
+            Registration.status.in_(ACTIVE_STATUSES)
+        )
+    ).all())
+    by_event = defaultdict(list)
+    for index, pending in enumerate(batch):
+        pair = (pending.user_id, pending.event_id)
+        if pair in taken:
+            results[index] = DuplicateRegistrationError()
+            continue
+        taken.add(pair)
+        by_event[pending.event_id].append(index)
+
+    # Места - одним UPDATE на мероприятие (по возрастанию id, чтобы воркеры не ждали друг друга по кругу)
+    now = datetime.utcnow()
+    rows, row_indexes = [], []
+    for event_id in sorted(by_event):
+        indexes = by_event[event_id]
+        granted = reserve_slots(db, event_id, len(indexes))
+        for position, index in enumerate(indexes):
+            pending = batch[index]
+            confirmed = position < granted
+            rows.append({
+                **pending.fields,
+                "user_id": pending.user_id,
+                "event_id": event_id,
+                "status": RegistrationStatus.CONFIRMED if confirmed else RegistrationStatus.WAITLISTED,
+                "registered_at": pending.submitted_at,
+                "confirmed_at": now if confirmed else None,
+            })
+            row_indexes.append(index)
+    if not rows:
+        return results
+
+    registration_ids = db.execute(
+        insert(Registration).returning(Registration.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    record_registration_changes(
+        db, [(registration_id, row["event_id"], row["user_id"]) for registration_id, row in zip(registration_ids, rows)]
+    )
+
+    # Кто занял последнее место: последняя подтвержденная заявка мероприятия, если оно заполнено
+    full_events = {
+        event.id for event in db.execute(
+            select(Event.id).where(
+                Event.id.in_(by_event), Event.max_volunteers > 0,
+                Event.current_volunteers_count >= Event.max_volunteers
+            )
+        )
+    }
+    last_confirmed = {
+        row["event_id"]: registration_id for registration_id, row in zip(registration_ids, rows)
+        if row["status"] == RegistrationStatus.CONFIRMED
+    }
+
+    for registration_id, row, index in zip(registration_ids, rows, row_indexes):
+        results[index] = AdmissionResult(
+            registration_id=registration_id,
+            status=row["status"],
+            registered_at=row["registered_at"],
+            confirmed_at=row["confirmed_at"],
+            event_full=row["event_id"] in full_events and last_confirmed.get(row["event_id"]) == registration_id
+        )
+    return results
+
+
+registration_admission = RegistrationAdmission(
+    window_ms=REGISTRATION_BATCH_WINDOW_MS,
+    max_batch_size=REGISTRATION_BATCH_MAX_SIZE
+)
@@ -0,0 +1,134 @@
+"""
+Места на мероприятиях и лист ожидания.
+
+Счетчик events.current_volunteers_count меняется только условными
+UPDATE: проверка "есть свободное место" и инкремент выполняются одним
+запросом в БД, поэтому параллельные заявки на последнее место не могут
+обе пройти. Результат смотрим по rowcount.
+
+Объекты Event в сессии после этих запросов не синхронизируются -
+актуальный счетчик читается после коммита. Изменение счетчика пишется
+в журнал изменений явно (UPDATE идет мимо ORM).
+
+Если мест нет, заявка встает в лист ожидания (WAITLISTED). Освободившееся
+место сразу отдается первой заявке очереди (по id) в той же транзакции.
+"""
+
+from datetime import datetime
+from typing import Collection, List, Optional
+
+from sqlalchemy import case, or_, select, update
+from sqlalchemy.orm import Session
+
+from backend.models.event import Event
+from backend.models.registration import Registration, RegistrationStatus
+from backend.services.change_log_service import record_event_changes
+from backend.services.schedule_service import invalidate_schedules
+from backend.utils.cache import TTLCache
+
+# Страницы "моих заявок" - экран открывается почти при каждом запуске приложения.
+# Ключ начинается с user_id; записи пользователя сбрасываются после коммита изменений его заявок.
+# Изменения самих мероприятий (название, дата) видны с задержкой не больше TTL.
+my_registrations_cache = TTLCache(ttl_seconds=60, max_size=4096)
+
+
+def invalidate_user_registrations(*user_ids: int):
+    """Сбросить кэш заявок и расписания пользователей (вызывается после коммита)"""
+    # Пустой список - никого не затронули (invalidate_schedules() без аргументов сбросил бы всех)
+    if not user_ids:
+        return
+    for user_id in set(user_ids):
+        my_registrations_cache.invalidate((user_id,))
+    invalidate_schedules(*user_ids)
+
+
+def reserve_slot(db: Session, event_id: int) -> Optional[int]:
+    """
+    Занять место, если оно есть (max_volunteers == 0 - без ограничения).
+    Возвращает новое значение счетчика (UPDATE ... RETURNING) или None, если мест нет.
+    """
+    volunteers_count = db.execute(
+        update(Event)
+        .where(
+            Event.id == event_id,
+            or_(Event.max_volunteers == 0, Event.current_volunteers_count < Event.max_volunteers)
+        )
+        .values(current_volunteers_count=Event.current_volunteers_count + 1)
+        .returning(Event.current_volunteers_count)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    if volunteers_count is not None:
+        record_event_changes(db, event_id)
+    return volunteers_count
+
+
+def reserve_slots(db: Session, event_id: int, wanted: int) -> int:
+    """
+    Занять до wanted мест. Возвращает, сколько мест удалось занять.
+    Первый UPDATE не меняет счетчик, а блокирует строку мероприятия до коммита
+    и возвращает его значение - по нему число мест считается без повторов.
+    """
+    row = db.execute(
+        update(Event)
+        .where(
+            Event.id == event_id,
+            or_(Event.max_volunteers == 0, Event.current_volunteers_count < Event.max_volunteers)
+        )
+        .values(current_volunteers_count=Event.current_volunteers_count)
+        .returning(Event.max_volunteers, Event.current_volunteers_count)
+        .execution_options(synchronize_session=False)
+    ).one_or_none()
+    if row is None or wanted <= 0:
+        return 0
+    if row.max_volunteers == 0:
+        granted = wanted
+    else:
+        granted = min(wanted, row.max_volunteers - row.current_volunteers_count)
+
+    db.execute(
+        update(Event)
+        .where(Event.id == event_id)
+        .values(current_volunteers_count=Event.current_volunteers_count + granted)
+        .execution_options(synchronize_session=False)
+    )
+    record_event_changes(db, event_id)
+    return granted
+
+
+def release_slot(db: Session, event_id: int, count: int = 1):
+    """Освободить count мест"""
+    result = db.execute(
+        update(Event)
+        .where(Event.id == event_id, Event.current_volunteers_count > 0)
+        .values(current_volunteers_count=case(
+            (Event.current_volunteers_count > count, Event.current_volunteers_count - count), else_=0
+        ))
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        record_event_changes(db, event_id)
+
+
+def promote_from_waitlist(db: Session, event_id: int, exclude_ids: Collection[int] = (),
+                          limit: int = 1) -> List[Registration]:
+    """
+    Подтвердить до limit первых заявок из листа ожидания, сколько хватит мест.
+    Возвращает подтвержденные заявки (уведомления отправляются после коммита).
+    """
+    query = db.query(Registration).filter(
+        Registration.event_id == event_id,
+        Registration.status == RegistrationStatus.WAITLISTED
+    )
+    if exclude_ids:
+        query = query.filter(Registration.id.notin_(exclude_ids))
+    # Параллельные отмены не должны поднять одни и те же заявки
+    heads = query.order_by(Registration.id).limit(limit).with_for_update(skip_locked=True).all()
+    if not heads:
+        return []
+
+    promoted = heads[:reserve_slots(db, event_id, len(heads))]
+    now = datetime.utcnow()
+    for registration in promoted:
+        registration.status = RegistrationStatus.CONFIRMED
+        registration.confirmed_at = now
+    return promoted
@@ -0,0 +1,126 @@
+"""
+Пересечения по времени с подтвержденными мероприятиями волонтера.
+
+Расписание волонтера - его подтвержденные заявки на еще не закончившиеся
+мероприятия - загружается одним запросом и хранится в кэше как массив
+интервалов, отсортированный по началу, с префиксным максимумом концов.
+Проверка одного мероприятия - один бинарный поиск: среди интервалов,
+начавшихся раньше конца проверяемого, достаточно взять тот, что кончается
+позже всех. Поэтому флаг conflicts для страницы из 50 мероприятий не
+требует ни одного запроса, кроме загрузки расписания.
+
+Для одного мероприятия (карточка) то же условие есть и в виде подзапроса
+EXISTS (conflict_exists) - флаг приходит тем же SELECT, что и мероприятие.
+
+Интервалы полуоткрытые: мероприятие, начавшееся ровно в момент окончания
+другого, с ним не пересекается.
+
+Кэш сбрасывается после изменения заявок волонтера (invalidate_user_registrations)
+и при переносе мероприятий; прочие изменения мероприятий видны с задержкой не больше TTL.
+"""
+
+from bisect import bisect_left
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, aliased
+
+from backend.models.event import Event, EventStatus
+from backend.models.registration import Registration, RegistrationStatus
+from backend.utils.cache import TTLCache
+
+# Ключ - (user_id,)
+schedule_cache = TTLCache(ttl_seconds=60, max_size=4096)
+
+
+class Schedule:
+    """Интервалы подтвержденных мероприятий по возрастанию начала и префиксный максимум концов"""
+
+    def __init__(self, intervals: Iterable[Tuple[datetime, datetime, int]]):
+        items = sorted(intervals)
+        self.starts: List[datetime] = [start for start, _, _ in items]
+        self.ends: List[datetime] = [end for _, end, _ in items]
+        self.event_ids: List[int] = [event_id for _, _, event_id in items]
+        # latest[i] - индекс интервала с самым поздним концом среди первых i + 1
+        self.latest: List[int] = []
+        for index, end in enumerate(self.ends):
+            if not self.latest or end > self.ends[self.latest[-1]]:
+                self.latest.append(index)
+            else:
+                self.latest.append(self.latest[-1])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def conflict(self, start: datetime, end: datetime, exclude_event_id: Optional[int] = None) -> Optional[int]:
+        """id подтвержденного мероприятия, пересекающегося с [start, end), или None"""
+        # Кандидаты - интервалы, начавшиеся раньше end
+        count = bisect_left(self.starts, end)
+        if count == 0:
+            return None
+        index = self.latest[count - 1]
+        if self.ends[index] <= start:
+            return None
+        if self.event_ids[index] != exclude_event_id:
+            return self.event_ids[index]
+        # Самое позднее - само проверяемое мероприятие: ищем другое среди кандидатов
+        for index in range(count):
+            if self.ends[index] > start and self.event_ids[index] != exclude_event_id:
+                return self.event_ids[index]
+        return None
+
+
+def _load_schedule(db: Session, user_id: int) -> Schedule:
+    rows = db.execute(
+        select(Event.start_date, Event.end_date, Event.id)
+        .join(Registration, Registration.event_id == Event.id)
+        .where(
+            Registration.user_id == user_id,
+            Registration.status == RegistrationStatus.CONFIRMED,
+            Event.status == EventStatus.PUBLISHED,
+            Event.end_date > datetime.utcnow()
+        )
+    ).all()
+    return Schedule((row.start_date, row.end_date, row.id) for row in rows)
+
+
+def get_schedule(db: Session, user_id: int) -> Schedule:
+    """Расписание волонтера (из кэша или одним запросом)"""
+    return schedule_cache.get_or_set((user_id,), lambda: _load_schedule(db, user_id))
+
+
+def find_conflicts(db: Session, user_id: int, events: Iterable[Event]) -> set:
+    """id мероприятий, пересекающихся с другими подтвержденными мероприятиями волонтера"""
+    schedule = get_schedule(db, user_id)
+    if not schedule:
+        return set()
+    return {
+        event.id for event in events
+        if schedule.conflict(event.start_date, event.end_date, exclude_event_id=event.id) is not None
+    }
+
+
+def conflict_exists(user_id: int):
+    """
+    EXISTS для запроса по Event: мероприятие пересекается с другим
+    подтвержденным мероприятием волонтера (то же, что Schedule.conflict)
+    """
+    other = aliased(Event)
+    return select(Registration.id).join(other, other.id == Registration.event_id).where(
+        Registration.user_id == user_id,
+        Registration.status == RegistrationStatus.CONFIRMED,
+        other.status == EventStatus.PUBLISHED,
+        other.end_date > datetime.utcnow(),
+        other.id != Event.id,
+        other.start_date < Event.end_date,
+        other.end_date > Event.start_date
+    ).exists()
+
+
+def invalidate_schedules(*user_ids: int):
+    """Сбросить расписания пользователей (без аргументов - всех)"""
+    if not user_ids:
+        schedule_cache.invalidate()
+    for user_id in set(user_ids):
+        schedule_cache.invalidate((user_id,))
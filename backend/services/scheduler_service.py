@@ -0,0 +1,118 @@
+"""
+Периодические задачи по расписанию.
+
+Завершение прошедших мероприятий: опубликованные мероприятия, у которых
+прошла дата окончания, переводятся в COMPLETED вместе с подтвержденными
+заявками. Все делается set-based запросами пачками по SCHEDULER_BATCH_SIZE
+мероприятий: UPDATE по списку id и одна вставка INSERT ... SELECT в журнал
+действий на пачку.
+
+Заодно удаляются просроченные ключи идемпотентности и старые записи
+журнала изменений, и заранее загружаются списки участников для чек-ина
+мероприятий, которые скоро начнутся.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert, literal, select, update
+
+from backend.config import SCHEDULER_BATCH_SIZE, SCHEDULER_INTERVAL_SECONDS
+from backend.core.logging import get_logger
+from backend.database import get_db_context
+from backend.models.event import Event, EventStatus, EventLog, EventActionType
+from backend.models.registration import Registration, RegistrationStatus
+from backend.services.change_log_service import (
+    record_event_changes, record_registration_changes, purge_change_log
+)
+from backend.services.checkin_service import checkin_desk
+from backend.services.event_service import invalidate_events_cache
+from backend.services.idempotency_service import purge_expired_keys
+from backend.services.registration_service import my_registrations_cache
+from backend.services.schedule_service import invalidate_schedules
+
+logger = get_logger(__name__)
+
+
+def complete_finished_events(now: Optional[datetime] = None) -> int:
+    """Завершить прошедшие мероприятия и их подтвержденные заявки. Возвращает число мероприятий"""
+    now = now or datetime.utcnow()
+    completed = 0
+    while True:
+        with get_db_context() as db:
+            event_ids = db.execute(
+                select(Event.id).where(
+                    Event.status == EventStatus.PUBLISHED,
+                    Event.end_date <= now
+                ).order_by(Event.end_date).limit(SCHEDULER_BATCH_SIZE)
+            ).scalars().all()
+            if not event_ids:
+                break
+
+            db.execute(
+                update(Event)
+                .where(Event.id.in_(event_ids), Event.status == EventStatus.PUBLISHED)
+                .values(status=EventStatus.COMPLETED, updated_at=now)
+            )
+            completed_registrations = db.execute(
+                update(Registration)
+                .where(Registration.event_id.in_(event_ids), Registration.status == RegistrationStatus.CONFIRMED)
+                .values(status=RegistrationStatus.COMPLETED, completed_at=now, updated_at=now)
+                .returning(Registration.id, Registration.event_id, Registration.user_id)
+            ).all()
+            record_event_changes(db, *event_ids)
+            record_registration_changes(db, completed_registrations)
+
+            # Журнал - одной вставкой на пачку, действие записывается от имени организатора
+            log_rows = select(
+                Event.id,
+                Event.creator_id,
+                literal(EventActionType.COMPLETE, EventLog.action.type),
+                literal("completed by scheduler"),
+            ).where(Event.id.in_(event_ids))
+            db.execute(insert(EventLog).from_select(["event_id", "user_id", "action", "details"], log_rows))
+
+        completed += len(event_ids)
+        if len(event_ids) < SCHEDULER_BATCH_SIZE:
+            break
+
+    if completed:
+        invalidate_events_cache()
+        my_registrations_cache.invalidate()
+        invalidate_schedules()
+        logger.info(f"Завершено прошедших мероприятий: {completed}")
+    return completed
+
+
+class Scheduler:
+    """Фоновый цикл периодических задач (запускается в lifespan приложения)"""
+
+    def __init__(self, interval_seconds: int = 300):
+        self.interval_seconds = interval_seconds
+        self.task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(complete_finished_events)
+                await asyncio.to_thread(purge_expired_keys)
+                await asyncio.to_thread(purge_change_log)
+                await asyncio.to_thread(checkin_desk.preload)
+                await asyncio.sleep(self.interval_seconds)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in scheduler task: {e}")
+                await asyncio.sleep(self.interval_seconds)
+
+
+scheduler = Scheduler(interval_seconds=SCHEDULER_INTERVAL_SECONDS)
@@ -0,0 +1,65 @@
+"""
+Простой in-memory кэш с временем жизни записей.
+
+Кэш живет в процессе приложения: при нескольких воркерах у каждого
+свой экземпляр, поэтому сюда кладутся только данные, для которых
+допустима задержка не больше ttl_seconds. Ключи - кортежи; первый
+элемент обычно задает "пространство" (пользователь, тип выборки),
+по которому записи сбрасываются через invalidate(prefix).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Кэш с TTL и вытеснением самых старых записей при переполнении"""
+
+    def __init__(self, ttl_seconds: float = 60, max_size: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Значение из кэша или результат factory() (вычисляется вне блокировки)"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, prefix: Optional[tuple] = None):
+        """Сбросить все записи или только ключи-кортежи, начинающиеся с prefix"""
+        with self._lock:
+            if prefix is None:
+                self._data.clear()
+                return
+            size = len(prefix)
+            for key in [k for k in self._data if isinstance(k, tuple) and k[:size] == prefix]:
+                del self._data[key]
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,143 @@
+"""
+Геоутилиты: geohash, расстояния и условия поиска в радиусе.
+
+Координаты хранятся в колонках latitude/longitude, рядом - geohash точки
+(индексируемая строка). Поиск в радиусе сначала отбирает кандидатов по
+префиксам geohash (диапазоны по индексу), затем отсекает лишнее по
+расстоянию в равнопромежуточной проекции - чистая арифметика, которая
+работает и в SQLite, и в Postgres. Долгота замыкается на ±180°: и соседние
+ячейки, и расстояние считаются через антимеридиан.
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+GEOHASH_PRECISION = 9  # ячейка ~5 м
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Geohash точки"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # четные биты - долгота
+    while len(chars) < precision:
+        rng, coord = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def geohash_or_none(latitude: Optional[float], longitude: Optional[float]) -> Optional[str]:
+    if latitude is None or longitude is None:
+        return None
+    return encode_geohash(latitude, longitude)
+
+
+def _cell_size(precision: int) -> Tuple[float, float]:
+    """Размер ячейки geohash в градусах (широта, долгота)"""
+    lat_bits = 5 * precision // 2
+    lon_bits = 5 * precision - lat_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def covering_cells(latitude: float, longitude: float, radius_km: float) -> Optional[List[str]]:
+    """
+    Префиксы geohash, покрывающие круг: ячейка точки и 8 соседних
+    при максимальной точности, где ячейка не меньше радиуса.
+    None - радиус больше самой крупной ячейки, фильтр по префиксам не нужен.
+    """
+    # Масштаб долготы берем на ближайшей к полюсу границе круга
+    edge_latitude = min(abs(latitude) + radius_km / KM_PER_DEGREE, 90.0)
+    lon_scale = max(math.cos(math.radians(edge_latitude)), 0.01)
+    precision = 0
+    for candidate in range(1, GEOHASH_PRECISION + 1):
+        lat_size, lon_size = _cell_size(candidate)
+        if lat_size * KM_PER_DEGREE < radius_km or lon_size * KM_PER_DEGREE * lon_scale < radius_km:
+            break
+        precision = candidate
+    if precision == 0:
+        return None
+
+    lat_size, lon_size = _cell_size(precision)
+    cells = set()
+    for dlat in (-1, 0, 1):
+        cell_lat = latitude + dlat * lat_size
+        if not -90.0 <= cell_lat <= 90.0:
+            continue
+        for dlon in (-1, 0, 1):
+            cell_lon = (longitude + dlon * lon_size + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(cell_lat, cell_lon, precision))
+    return sorted(cells)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Расстояние по дуге большого круга, км"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def parse_point(value: str) -> Tuple[float, float]:
+    """Разбор строки "lat,lon" (ValueError при ошибке)"""
+    parts = value.split(",")
+    if len(parts) != 2:
+        raise ValueError("Point must be in 'lat,lon' format")
+    latitude, longitude = float(parts[0]), float(parts[1])
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("Coordinates are out of range")
+    return latitude, longitude
+
+
+def within_radius(model, latitude: float, longitude: float, radius_km: float, max_distance_km=None):
+    """
+    SQL-условие "точка model в радиусе radius_km".
+
+    max_distance_km - необязательное SQL-выражение с индивидуальным радиусом
+    строки (например, max_travel_distance волонтера), не больше radius_km.
+    """
+    conditions = [model.latitude.isnot(None), model.longitude.isnot(None)]
+
+    cells = covering_cells(latitude, longitude, radius_km)
+    if cells is not None:
+        # '~' больше любого символа geohash: [prefix, prefix~) - все ячейки внутри префикса
+        conditions.append(or_(*[and_(model.geohash >= cell, model.geohash < cell + "~") for cell in cells]))
+
+    lon_scale = math.cos(math.radians(latitude))
+    dlat = model.latitude - latitude
+    limit = (max_distance_km if max_distance_km is not None else radius_km) / KM_PER_DEGREE
+
+    # Круг, заходящий за ±180° долготы, проверяем и для точек по ту сторону - со сдвигом на 360°
+    lon_radius = radius_km / KM_PER_DEGREE / max(lon_scale, 0.01)
+    shifts = [0.0]
+    if longitude + lon_radius > 180.0:
+        shifts.append(360.0)
+    if longitude - lon_radius < -180.0:
+        shifts.append(-360.0)
+    distance_conditions = []
+    for shift in shifts:
+        dlon = (model.longitude + shift - longitude) * lon_scale
+        distance_conditions.append(dlat * dlat + dlon * dlon <= limit * limit)
+    conditions.append(or_(*distance_conditions))
+    return and_(*conditions)
@@ -0,0 +1,33 @@
+"""Вспомогательные функции"""
+
+import base64
+import json
+from typing import Iterable, List, Optional, Set
+
+
+def normalize_skill(value: Optional[str]) -> str:
+    """Нормализованная форма навыка/интереса для сравнения ("  Первая Помощь " -> "первая помощь")"""
+    if not value:
+        return ""
+    return " ".join(str(value).lower().replace("ё", "е").split())
+
+
+def normalize_skills(values: Optional[Iterable]) -> Set[str]:
+    """Множество нормализованных навыков (пустые значения отбрасываются)"""
+    return {skill for skill in (normalize_skill(v) for v in values or []) if skill}
+
+
+def encode_cursor(values: List) -> str:
+    """Курсор keyset-пагинации: значения ключа сортировки последней строки страницы"""
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List:
+    """Разбор курсора (ValueError при ошибке)"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
@@ -0,0 +1,29 @@
+"""Общие фикстуры: приложение на in-memory SQLite без фоновых компонентов"""
+
+import os
+
+os.environ.setdefault("ENVIRONMENT", "testing")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.database import Base, SessionLocal, engine
+from backend.main import app
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def client(db):
+    # Без with: lifespan (планировщик, фоновые задачи) не запускается
+    return TestClient(app)
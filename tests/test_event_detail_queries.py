@@ -0,0 +1,99 @@
+"""
+Число SQL-запросов GET /api/events/{id}.
+
+Запрос с JWT стоит ровно пять statements:
+- get_current_user: SELECT пользователя и UPDATE last_activity с коммитом;
+- обработчик: UPDATE views_count (он же проверка существования),
+  перечитывание current_user после коммита в get_current_user и один SELECT
+  мероприятия с организатором, заявкой и флагом пересечения волонтера
+  (и профилем для can_register) или статистикой заявок организатора.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event as sa_event
+
+from backend.api.auth import create_access_token
+from backend.database import engine
+from backend.models.event import Event, EventCategory, EventStatus
+from backend.models.registration import Registration, RegistrationStatus
+from backend.models.user import User, UserRole
+from backend.models.volunteer_profile import VolunteerProfile
+from backend.services.schedule_service import schedule_cache
+
+EVENT_DETAIL_STATEMENTS = 5
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sa_event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def auth_headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(user.id, user.telegram_user_id)}"}
+
+
+@pytest.fixture
+def setup(db):
+    organizer = User(telegram_user_id=1001, first_name="Org", role=UserRole.ORGANIZER)
+    volunteer = User(telegram_user_id=2001, first_name="Vol", role=UserRole.VOLUNTEER)
+    db.add_all([organizer, volunteer])
+    db.flush()
+    db.add(VolunteerProfile(user_id=volunteer.id, birth_date=datetime(1990, 1, 1), skills=["Вождение"]))
+
+    start = datetime.utcnow() + timedelta(days=2)
+    # Требования к возрасту и навыкам: can_register волонтера смотрит в профиль
+    event = Event(
+        creator_id=organizer.id, title="Detail", category=EventCategory.SOCIAL,
+        start_date=start, end_date=start + timedelta(hours=4), max_volunteers=10,
+        min_age=18, required_skills=["вождение"], status=EventStatus.PUBLISHED
+    )
+    # Подтвержденное мероприятие волонтера, пересекающееся с event
+    confirmed = Event(
+        creator_id=organizer.id, title="Confirmed", category=EventCategory.SOCIAL,
+        start_date=start + timedelta(hours=2), end_date=start + timedelta(hours=6), max_volunteers=10,
+        status=EventStatus.PUBLISHED
+    )
+    db.add_all([event, confirmed])
+    db.flush()
+    db.add(Registration(user_id=volunteer.id, event_id=confirmed.id, status=RegistrationStatus.CONFIRMED))
+    db.commit()
+    schedule_cache.invalidate()
+    return organizer, volunteer, event.id
+
+
+def test_event_detail_organizer_view(client, setup):
+    organizer, _, event_id = setup
+    headers = auth_headers(organizer)
+
+    with count_statements() as statements:
+        response = client.get(f"/api/events/{event_id}", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["total_registrations"] == 0
+    assert len(statements) == EVENT_DETAIL_STATEMENTS, statements
+
+
+def test_event_detail_volunteer_view(client, setup):
+    _, volunteer, event_id = setup
+    headers = auth_headers(volunteer)
+
+    with count_statements() as statements:
+        response = client.get(f"/api/events/{event_id}", headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["conflicts"] is True
+    assert data["can_register"] is True
+    assert len(statements) == EVENT_DETAIL_STATEMENTS, statements
@@ -0,0 +1,201 @@
+"""
+Места на мероприятии: счетчик current_volunteers_count и лист ожидания.
+
+Заявки подаются через RegistrationAdmission напрямую (пачками, как в
+приложении), смены статуса - через API заявок.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+from backend.api.auth import create_access_token
+from backend.models.event import Event, EventCategory, EventStatus
+from backend.models.registration import Registration, RegistrationStatus
+from backend.models.user import User, UserRole
+from backend.services.registration_admission import DuplicateRegistrationError, RegistrationAdmission
+
+
+def auth_headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(user.id, user.telegram_user_id)}"}
+
+
+@pytest.fixture(autouse=True)
+def no_bot(monkeypatch):
+    # Уведомления боту не отправляем
+    monkeypatch.setattr(requests, "post", lambda *args, **kwargs: None)
+
+
+@pytest.fixture
+def organizer(db):
+    user = User(telegram_user_id=1001, first_name="Org", role=UserRole.ORGANIZER)
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def volunteers(db):
+    users = [User(telegram_user_id=2001 + i, first_name=f"Vol{i}", role=UserRole.VOLUNTEER) for i in range(6)]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def make_event(db, organizer: User, max_volunteers: int) -> Event:
+    start = datetime.utcnow() + timedelta(days=2)
+    event = Event(
+        creator_id=organizer.id, title="Seats", category=EventCategory.SOCIAL,
+        start_date=start, end_date=start + timedelta(hours=4), max_volunteers=max_volunteers,
+        status=EventStatus.PUBLISHED
+    )
+    db.add(event)
+    db.commit()
+    return event
+
+
+def make_registrations(db, event: Event, volunteers, statuses) -> list:
+    """Заявки волонтеров в статусах statuses; счетчик мест - по занимающим место"""
+    registrations = [
+        Registration(user_id=volunteer.id, event_id=event.id, status=status)
+        for volunteer, status in zip(volunteers, statuses)
+    ]
+    db.add_all(registrations)
+    event.current_volunteers_count = sum(
+        1 for status in statuses if status in (RegistrationStatus.CONFIRMED, RegistrationStatus.COMPLETED)
+    )
+    db.commit()
+    return registrations
+
+
+def seats_taken(db, event_id: int) -> int:
+    db.expire_all()
+    return db.get(Event, event_id).current_volunteers_count
+
+
+def statuses(db, registrations) -> list:
+    db.expire_all()
+    return [db.get(Registration, registration.id).status for registration in registrations]
+
+
+def submit_all(requests_to_submit, max_batch_size: int = 200) -> list:
+    """Подать заявки одновременно; результат или исключение на каждую"""
+    async def run():
+        admission = RegistrationAdmission(window_ms=5, max_batch_size=max_batch_size)
+        await admission.start()
+        try:
+            return await asyncio.gather(
+                *(admission.submit(user_id, event_id, {}) for user_id, event_id in requests_to_submit),
+                return_exceptions=True
+            )
+        finally:
+            await admission.stop()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("max_batch_size", [200, 2])
+def test_concurrent_registrations_respect_capacity(db, organizer, volunteers, max_batch_size):
+    event = make_event(db, organizer, max_volunteers=2)
+
+    results = submit_all([(volunteer.id, event.id) for volunteer in volunteers[:5]], max_batch_size)
+
+    # Места получают первые поданные заявки, остальные встают в лист ожидания
+    assert [result.status for result in results] == [RegistrationStatus.CONFIRMED] * 2 + [RegistrationStatus.WAITLISTED] * 3
+    assert [result.event_full for result in results] == [False, True, False, False, False]
+    assert seats_taken(db, event.id) == 2
+
+
+def test_duplicate_registration_rejected(db, organizer, volunteers):
+    event = make_event(db, organizer, max_volunteers=5)
+    volunteer = volunteers[0]
+
+    # Дубль внутри одной пачки
+    first, second = submit_all([(volunteer.id, event.id), (volunteer.id, event.id)])
+    assert first.status == RegistrationStatus.CONFIRMED
+    assert isinstance(second, DuplicateRegistrationError)
+
+    # Дубль уже записанной активной заявки
+    [third] = submit_all([(volunteer.id, event.id)])
+    assert isinstance(third, DuplicateRegistrationError)
+
+    assert db.query(Registration).filter(Registration.event_id == event.id).count() == 1
+    assert seats_taken(db, event.id) == 1
+
+
+def test_cancel_promotes_from_waitlist(db, client, organizer, volunteers):
+    event = make_event(db, organizer, max_volunteers=1)
+    registrations = make_registrations(db, event, volunteers[:3], [
+        RegistrationStatus.CONFIRMED, RegistrationStatus.WAITLISTED, RegistrationStatus.WAITLISTED
+    ])
+
+    response = client.delete(f"/api/registrations/{registrations[0].id}", headers=auth_headers(volunteers[0]))
+
+    assert response.status_code == 200
+    assert statuses(db, registrations) == [
+        RegistrationStatus.CANCELLED, RegistrationStatus.CONFIRMED, RegistrationStatus.WAITLISTED
+    ]
+    assert seats_taken(db, event.id) == 1
+
+    # Повторная отмена место второй раз не освобождает
+    response = client.delete(f"/api/registrations/{registrations[0].id}", headers=auth_headers(volunteers[0]))
+
+    assert response.status_code == 400
+    assert statuses(db, registrations)[1:] == [RegistrationStatus.CONFIRMED, RegistrationStatus.WAITLISTED]
+    assert seats_taken(db, event.id) == 1
+
+
+def test_complete_keeps_seat(db, client, organizer, volunteers):
+    event = make_event(db, organizer, max_volunteers=1)
+    registrations = make_registrations(db, event, volunteers[:2], [
+        RegistrationStatus.CONFIRMED, RegistrationStatus.WAITLISTED
+    ])
+
+    response = client.put(
+        f"/api/registrations/{registrations[0].id}", headers=auth_headers(organizer), json={"status": "completed"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert statuses(db, registrations) == [RegistrationStatus.COMPLETED, RegistrationStatus.WAITLISTED]
+    assert seats_taken(db, event.id) == 1
+
+
+def test_bulk_cancel_releases_seats(db, client, organizer, volunteers):
+    event = make_event(db, organizer, max_volunteers=4)
+    registrations = make_registrations(db, event, volunteers, [
+        RegistrationStatus.CONFIRMED, RegistrationStatus.CONFIRMED, RegistrationStatus.COMPLETED,
+        RegistrationStatus.CONFIRMED, RegistrationStatus.WAITLISTED, RegistrationStatus.WAITLISTED
+    ])
+    first, second, completed, _, waiting, last = registrations
+
+    # Освобождают место две подтвержденные и завершенная; отмена из листа ожидания - нет
+    response = client.patch("/api/registrations/bulk", headers=auth_headers(organizer), json={
+        "ids": [first.id, second.id, completed.id, waiting.id], "status": "cancelled"
+    })
+
+    assert response.status_code == 200
+    data = response.json()
+    assert sorted(data["updated"]) == sorted([first.id, second.id, completed.id, waiting.id])
+    assert data["promoted"] == [last.id]
+    assert seats_taken(db, event.id) == 2
+
+
+def test_bulk_complete_keeps_seats(db, client, organizer, volunteers):
+    event = make_event(db, organizer, max_volunteers=2)
+    registrations = make_registrations(db, event, volunteers[:3], [
+        RegistrationStatus.CONFIRMED, RegistrationStatus.CONFIRMED, RegistrationStatus.WAITLISTED
+    ])
+
+    response = client.patch("/api/registrations/bulk", headers=auth_headers(organizer), json={
+        "ids": [registration.id for registration in registrations[:2]], "status": "completed"
+    })
+
+    assert response.status_code == 200
+    assert response.json()["promoted"] == []
+    assert statuses(db, registrations) == [
+        RegistrationStatus.COMPLETED, RegistrationStatus.COMPLETED, RegistrationStatus.WAITLISTED
+    ]
+    assert seats_taken(db, event.id) == 2